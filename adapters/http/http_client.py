@@ -0,0 +1,110 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    text: str
+    status_code: int
+    # True quando o servidor respondeu 304: o conteúdo é o mesmo da última resposta 200
+    not_modified: bool = False
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartilhado pelos scrapers:
+    - Session com pool de conexões (keep-alive) e compressão gzip/deflate;
+    - timeouts explícitos de conexão e leitura;
+    - retentativas com backoff exponencial e jitter (erros de rede, 429 e 5xx);
+    - GET condicional (ETag / Last-Modified): páginas inalteradas custam um 304.
+    """
+
+    def __init__(self, timeout: Tuple[float, float] = (5.0, 30.0), retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 8.0, pool_size: int = 10, user_agent: str = DEFAULT_USER_AGENT):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": user_agent,
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+        self._lock = threading.Lock()
+        # url -> (etag, last_modified, texto da última resposta 200)
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str], str]] = {}
+
+    def get(self, url: str, conditional: bool = True) -> FetchResult:
+        """
+        GET com retentativas. Com conditional=True, envia os validadores da última resposta
+        e, em caso de 304, devolve o texto anterior com not_modified=True.
+        Levanta requests.RequestException se todas as tentativas falharem.
+        """
+        headers = {}
+        with self._lock:
+            cached = self._validators.get(url) if conditional else None
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self._request_with_retry(url, headers)
+
+        if response.status_code == 304 and cached:
+            return FetchResult(text=cached[2], status_code=304, not_modified=True)
+
+        response.raise_for_status()
+        text = response.text
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if conditional and (etag or last_modified):
+            with self._lock:
+                self._validators[url] = (etag, last_modified, text)
+        return FetchResult(text=text, status_code=response.status_code)
+
+    def _request_with_retry(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return response
+                logging.warning(f"HTTP {response.status_code} em {url} (tentativa {attempt + 1}/{self.retries + 1})")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"Falha de rede em {url} (tentativa {attempt + 1}/{self.retries + 1}): {e}")
+            time.sleep(self._delay(attempt))
+
+    def _delay(self, attempt: int) -> float:
+        # Backoff exponencial com jitter completo: evita que vários clientes tentem de novo ao mesmo tempo
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+_default_client: Optional[HttpClient] = None
+_default_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Cliente compartilhado pelo processo (um único pool de conexões para todos os scrapers)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
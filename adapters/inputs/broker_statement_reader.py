@@ -0,0 +1,165 @@
+import io
+import logging
+import os
+import unicodedata
+from typing import IO, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from core.entities.portfolio import Transaction
+
+# Nomes de coluna aceitos (sem acento, minúsculos) para cada campo do extrato.
+# O padrão é o relatório de negociação da Área do Investidor da B3; os demais cobrem exportações de corretoras.
+COLUMN_ALIASES = {
+    "date": ["data do negocio", "data da operacao", "data do pregao", "data negocio", "data", "date"],
+    "type": ["tipo de movimentacao", "compra/venda", "c/v", "operacao", "tipo", "type"],
+    "ticker": ["codigo de negociacao", "codigo", "ticker", "ativo", "papel", "produto"],
+    "quantity": ["quantidade", "qtde", "qtd", "quantity"],
+    "price": ["preco unitario", "preco", "price"],
+}
+
+TRADE_TYPE_MAP = {"c": "BUY", "compra": "BUY", "buy": "BUY", "v": "SELL", "venda": "SELL", "sell": "SELL"}
+
+# Código de negociação (ex: HGLG11); o sufixo F do mercado fracionário é descartado
+TICKER_PATTERN = r"^\s*([A-Z]{4}\d{1,2})F?\b"
+
+Source = Union[str, IO]
+
+
+def _normalize_header(name) -> str:
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().split())
+
+
+def _parse_number(values: pd.Series, integer: bool = False) -> pd.Series:
+    """Aceita formato brasileiro (1.234,56 / R$ 10,50) e decimal com ponto (10.5)."""
+    text = values.astype(str).str.replace("R$", "", regex=False).str.replace(r"\s", "", regex=True)
+    brazilian = text.str.contains(",", regex=False)
+    if integer:
+        # Quantidades: 1.000 é milhar, não decimal
+        brazilian |= text.str.fullmatch(r"\d{1,3}(\.\d{3})+")
+    text = text.where(~brazilian, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    text = values.astype(str).str.strip()
+    dates = pd.to_datetime(text, format="%d/%m/%Y", errors="coerce")
+    missing = dates.isna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(text[missing], format="ISO8601", errors="coerce")
+    return dates
+
+
+class BrokerStatementReader:
+    """
+    Lê extratos de negociação (CSV ou XLSX) em blocos de chunksize linhas, sem carregar o arquivo inteiro.
+
+    Cada bloco vira uma lista de Transaction normalizadas (data ISO, ticker sem sufixo fracionário,
+    BUY/SELL, números no formato brasileiro ou com ponto). Linhas que não são compra/venda de um
+    ticker válido (ex: eventos, totais) são ignoradas e contadas em skipped.
+    """
+
+    def __init__(self, chunksize: int = 10_000, encoding: str = "utf-8-sig"):
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self.rows_read = 0
+        self.skipped = 0
+
+    def read(self, source: Source, filename: Optional[str] = None) -> Iterator[List[Transaction]]:
+        """source: caminho do arquivo ou objeto de arquivo (ex: upload do Streamlit); filename define o formato."""
+        name = filename or (source if isinstance(source, str) else getattr(source, "name", ""))
+        extension = os.path.splitext(str(name))[1].lower()
+        if extension in (".xlsx", ".xlsm"):
+            frames = self._xlsx_chunks(source)
+        elif extension in (".csv", ".txt", ""):
+            frames = self._csv_chunks(source)
+        else:
+            raise ValueError(f"Formato de extrato não suportado: {extension}")
+
+        for frame in frames:
+            transactions = self._to_transactions(frame)
+            if transactions:
+                yield transactions
+
+    def _csv_chunks(self, source: Source) -> Iterator[pd.DataFrame]:
+        if isinstance(source, str):
+            with open(source, "r", encoding=self.encoding, newline="") as f:
+                yield from self._csv_from_text(f)
+        else:
+            source.seek(0)
+            text = io.TextIOWrapper(source, encoding=self.encoding, newline="")
+            try:
+                yield from self._csv_from_text(text)
+            finally:
+                # Devolve o arquivo ao chamador sem fechá-lo
+                text.detach()
+
+    def _csv_from_text(self, f) -> Iterator[pd.DataFrame]:
+        # Separador detectado pelo cabeçalho: ";" nos arquivos brasileiros, "," nos demais
+        header = f.readline()
+        sep = ";" if header.count(";") >= header.count(",") else ","
+        columns = [column.strip() for column in header.rstrip("\r\n").split(sep)]
+        yield from pd.read_csv(
+            f, sep=sep, names=columns, header=None, dtype=str, keep_default_na=False, chunksize=self.chunksize,
+        )
+
+    def _xlsx_chunks(self, source: Source) -> Iterator[pd.DataFrame]:
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError("Instale o pacote openpyxl para importar planilhas XLSX.")
+
+        # read_only: as linhas são lidas sob demanda, sem montar a planilha inteira em memória
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            columns = [str(value).strip() if value is not None else "" for value in next(rows, [])]
+            block = []
+            for row in rows:
+                block.append(["" if value is None else str(value) for value in row])
+                if len(block) >= self.chunksize:
+                    yield pd.DataFrame(block, columns=columns[:len(block[0])])
+                    block = []
+            if block:
+                yield pd.DataFrame(block, columns=columns[:len(block[0])])
+        finally:
+            workbook.close()
+
+    def _resolve_columns(self, frame: pd.DataFrame) -> dict:
+        headers = {_normalize_header(column): column for column in frame.columns}
+        resolved = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            column = next((headers[alias] for alias in aliases if alias in headers), None)
+            if column is None:
+                raise ValueError(f"Coluna obrigatória não encontrada no extrato: {aliases[0]}")
+            resolved[field] = column
+        return resolved
+
+    def _to_transactions(self, frame: pd.DataFrame) -> List[Transaction]:
+        columns = self._resolve_columns(frame)
+        dates = _parse_dates(frame[columns["date"]])
+        kinds = frame[columns["type"]].astype(str)
+        # Poucos valores distintos (Compra/Venda/...): normaliza cada um uma única vez
+        types = kinds.map({kind: TRADE_TYPE_MAP.get(_normalize_header(kind)) for kind in kinds.unique()})
+        tickers = frame[columns["ticker"]].astype(str).str.upper().str.extract(TICKER_PATTERN, expand=False)
+        quantities = _parse_number(frame[columns["quantity"]], integer=True)
+        prices = _parse_number(frame[columns["price"]])
+
+        valid = dates.notna() & types.notna() & tickers.notna() & (quantities > 0) & (prices >= 0)
+        self.rows_read += len(frame)
+        self.skipped += int((~valid).sum())
+        if not valid.all():
+            logging.debug(f"{int((~valid).sum())} linhas do extrato ignoradas (não são compra/venda válidas)")
+
+        return [
+            Transaction(date=date, ticker=ticker, quantity=quantity, price=price, type=kind)
+            for date, ticker, quantity, price, kind in zip(
+                np.datetime_as_string(dates[valid].to_numpy(dtype="datetime64[s]"), unit="s").tolist(),
+                tickers[valid].tolist(),
+                quantities[valid].astype("int64").tolist(),
+                prices[valid].round(6).tolist(),
+                types[valid].tolist(),
+            )
+        ]
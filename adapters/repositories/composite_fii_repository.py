@@ -0,0 +1,149 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import fields, replace
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.entities.fii import FII
+
+FASTEST = "fastest"
+MERGE = "merge"
+
+FII_FIELDS = [field.name for field in fields(FII) if field.name != "ticker"]
+# Os parsers gravam 0.0 em células ilegíveis; cotação e P/VP zerados (ou negativos) não são valores reais
+POSITIVE_FIELDS = {"price", "pvp"}
+
+
+class CompositeFIIRepository:
+    """
+    Consulta várias fontes de mercado (ex: Fundamentus e FundsExplorer) em paralelo.
+
+    Políticas:
+    - "fastest": devolve a primeira resposta não vazia.
+    - "merge": une por ticker; cada campo vem da primeira fonte (na ordem de field_precedence,
+      ou na ordem de sources) que tiver um valor válido para ele (cotação e P/VP precisam ser positivos).
+
+    Uma fonte que trava não bloqueia a resposta (limite de timeout segundos) e não é
+    disparada de novo enquanto a chamada anterior não terminar. Se uma fonte falha, vem
+    vazia ou estoura o tempo, o último resultado bom dela é reutilizado e marcado em
+    stale_sources; status traz o resultado de cada fonte na última chamada.
+    """
+
+    def __init__(self, sources: Dict[str, object], policy: str = MERGE, timeout: float = 20.0,
+                 field_precedence: Optional[Dict[str, Sequence[str]]] = None):
+        if policy not in (FASTEST, MERGE):
+            raise ValueError(f"Política desconhecida: {policy}")
+        self.sources = dict(sources)
+        self.policy = policy
+        self.timeout = timeout
+        self.field_precedence = {field: list(self.sources) for field in FII_FIELDS}
+        self.field_precedence.update({field: list(order) for field, order in (field_precedence or {}).items()})
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="market-source")
+        self._in_flight: Dict[str, Future] = {}
+        self._last_good: Dict[str, Tuple[List[FII], datetime]] = {}
+        self.status: Dict[str, str] = {}
+        self.stale_sources: Dict[str, datetime] = {}
+
+    def get_all(self) -> List[FII]:
+        futures = {self._submit(name): name for name in self.sources}
+        deadline = time.monotonic() + self.timeout
+        results: Dict[str, List[FII]] = {}
+        status = {name: "timeout" for name in self.sources}
+
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    fiis = future.result()
+                except Exception as e:
+                    logging.warning(f"Fonte de mercado {name} falhou: {e}")
+                    status[name] = "error"
+                    continue
+                if not fiis:
+                    status[name] = "empty"
+                    continue
+                status[name] = "ok"
+                results[name] = fiis
+            if self.policy == FASTEST and results:
+                break
+
+        for future in pending:
+            name = futures[future]
+            if results and self.policy == FASTEST:
+                # Continua em background e atualiza o último resultado bom da fonte
+                status[name] = "pending"
+            else:
+                logging.warning(f"Fonte de mercado {name} não respondeu em {self.timeout}s")
+
+        stale = {}
+        if self.policy == MERGE or not results:
+            # Fontes sem resposta válida nesta chamada: usa o último resultado bom, marcado como desatualizado
+            with self._lock:
+                for name in self.sources:
+                    if name not in results and name in self._last_good:
+                        results[name], stale[name] = self._last_good[name]
+
+        self.status = status
+        self.stale_sources = stale
+
+        if not results:
+            return []
+        if self.policy == FASTEST:
+            # Prefere dados frescos; na ordem de sources entre os disponíveis
+            name = next((n for n in self.sources if n in results and n not in stale), next(n for n in self.sources if n in results))
+            return list(results[name])
+        return self.merge(results)
+
+    def merge(self, results: Dict[str, List[FII]]) -> List[FII]:
+        """União por ticker com precedência por campo; a ordem segue a primeira fonte em que o ticker aparece."""
+        by_source = {name: {fii.ticker: fii for fii in fiis} for name, fiis in results.items()}
+        tickers: Dict[str, None] = {}
+        for name in self.sources:
+            for fii in results.get(name, []):
+                tickers.setdefault(fii.ticker)
+
+        merged = []
+        for ticker in tickers:
+            values = {}
+            for field in FII_FIELDS:
+                for name in self.field_precedence[field]:
+                    fii = by_source.get(name, {}).get(ticker)
+                    if fii is not None and self._is_valid(field, getattr(fii, field)):
+                        values[field] = getattr(fii, field)
+                        break
+            base = next(by_source[name][ticker] for name in self.sources if ticker in by_source.get(name, {}))
+            merged.append(replace(base, **values))
+        return merged
+
+    def _submit(self, name: str) -> Future:
+        # Single-flight por fonte: não empilha novas chamadas sobre uma que ainda está travada
+        with self._lock:
+            future = self._in_flight.get(name)
+            if future is None or future.done():
+                future = self._executor.submit(self._fetch, name)
+                self._in_flight[name] = future
+            return future
+
+    def _fetch(self, name: str) -> List[FII]:
+        fiis = self.sources[name].get_all()
+        if fiis:
+            with self._lock:
+                self._last_good[name] = (fiis, datetime.now())
+        return fiis
+
+    def _is_valid(self, field: str, value) -> bool:
+        if value is None or value == "":
+            return False
+        if isinstance(value, float) and math.isnan(value):
+            return False
+        return field not in POSITIVE_FIELDS or value > 0
@@ -1,24 +1,82 @@
 from bs4 import BeautifulSoup
+import lxml.html
 import requests
+from typing import Optional
+from adapters.http.http_client import HttpClient, get_http_client
 from core.entities.fii import FII
 import logging
 
+TABLE_CLASS = "default-fiis-table__container__table"
+
 class FIIRepository:
+    URL = "https://www.fundsexplorer.com.br/ranking"
+
+    def __init__(self, parser: str = "lxml", http_client: Optional[HttpClient] = None):
+        # "lxml": parse rápido com XPath direto na tabela; "html.parser": BeautifulSoup (modo legado)
+        self.parser = parser
+        self.http_client = http_client or get_http_client()
+        # Último resultado do parse, reaproveitado quando a página não mudou (HTTP 304)
+        self._last_fiis: Optional[list[FII]] = None
+
     def get_all(self) -> list[FII]:
-        url = "https://www.fundsexplorer.com.br/ranking"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+            response = self.http_client.get(self.URL)
         except requests.RequestException as e:
-            logging.error(f"Erro ao acessar {url}: {e}")
+            logging.error(f"Erro ao acessar {self.URL}: {e}")
             return []
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        if response.not_modified and self._last_fiis is not None:
+            return list(self._last_fiis)
+
+        if self.parser == "lxml":
+            fiis = self.parse_lxml(response.text)
+        else:
+            fiis = self.parse_soup(response.text)
+        self._last_fiis = fiis
+        return list(fiis)
 
-        table = soup.find("table", class_="default-fiis-table__container__table")
+    def parse_lxml(self, html: str) -> list[FII]:
+        tree = lxml.html.fromstring(html)
+
+        tables = tree.xpath(f'//table[contains(concat(" ", normalize-space(@class), " "), " {TABLE_CLASS} ")]')
+        if not tables:
+            # Tenta encontrar qualquer tabela se a classe específica falhar
+            tables = tree.xpath('//table')
+            if not tables:
+                logging.error("Tabela de FIIs não encontrada na página.")
+                return []
+        table = tables[0]
+
+        thead = table.find('.//thead')
+        headers_row = thead.iter('th') if thead is not None else []
+        col_map = self._map_columns([th.text_content() for th in headers_row])
+
+        if 'ticker' not in col_map:
+             logging.error("Coluna de Ticker não encontrada.")
+             return []
+
+        tbody = table.find('.//tbody')
+        rows = tbody.iter('tr') if tbody is not None else []
+        fiis = []
+
+        for row in rows:
+            # Lê apenas as células das colunas mapeadas
+            columns = row.xpath('.//td')
+            try:
+                values = {
+                    field: columns[index].text_content().strip() if index < len(columns) else ""
+                    for field, index in col_map.items()
+                }
+                fiis.append(self._build_fii(values))
+            except Exception as e:
+                continue
+
+        return fiis
+
+    def parse_soup(self, html: str) -> list[FII]:
+        soup = BeautifulSoup(html, "html.parser")
+
+        table = soup.find("table", class_=TABLE_CLASS)
         if table is None:
             # Tenta encontrar qualquer tabela se a classe específica falhar
             table = soup.find("table")
@@ -27,7 +85,7 @@ class FIIRepository:
                 return []
 
         headers_row = table.find("thead").find_all("th")
-        col_map = self._map_columns(headers_row)
+        col_map = self._map_columns([header.get_text() for header in headers_row])
 
         if 'ticker' not in col_map:
              logging.error("Coluna de Ticker não encontrada.")
@@ -39,35 +97,29 @@ class FIIRepository:
         for row in rows:
             columns = row.find_all("td")
             try:
-                ticker = self._get_text(columns, col_map.get('ticker'))
-                sector = self._get_text(columns, col_map.get('sector'))
-                price = self._parse_float(self._get_text(columns, col_map.get('price')))
-                liquidity = self._parse_float(self._get_text(columns, col_map.get('liquidity')))
-                pvp = self._parse_float(self._get_text(columns, col_map.get('pvp')))
-                dividend_yield = self._parse_float(self._get_text(columns, col_map.get('dy')))
-                vacancia = self._parse_float(self._get_text(columns, col_map.get('vacancia')))
-
-                fiis.append(
-                    FII(
-                        ticker=ticker,
-                        price=price,
-                        dividend_yield=dividend_yield,
-                        pvp=pvp,
-                        sector=sector,
-                        liquidity=liquidity,
-                        vacancia=vacancia,
-                    )
-                )
+                values = {field: self._get_text(columns, index) for field, index in col_map.items()}
+                fiis.append(self._build_fii(values))
             except Exception as e:
                 # Log leve para debug, mas continua processamento
                 continue
 
         return fiis
 
-    def _map_columns(self, headers) -> dict:
+    def _build_fii(self, values: dict) -> FII:
+        return FII(
+            ticker=values.get('ticker', ""),
+            price=self._parse_float(values.get('price', "")),
+            dividend_yield=self._parse_float(values.get('dy', "")),
+            pvp=self._parse_float(values.get('pvp', "")),
+            sector=values.get('sector', ""),
+            liquidity=self._parse_float(values.get('liquidity', "")),
+            vacancia=self._parse_float(values.get('vacancia', "")),
+        )
+
+    def _map_columns(self, headers: list[str]) -> dict:
         mapping = {}
         for i, header in enumerate(headers):
-            text = header.get_text().strip().lower()
+            text = header.strip().lower()
             if "código" in text or "fundo" in text:
                 mapping['ticker'] = i
             elif "setor" in text:
@@ -1,21 +1,25 @@
+import numpy as np
 import pandas as pd
-import requests
 import logging
 from io import StringIO
+from typing import Optional
+from adapters.http.http_client import HttpClient, get_http_client
 from core.entities.fii import FII
 
 class FundamentusRepository:
+    URL = "https://www.fundamentus.com.br/fii_resultado.php"
+
+    def __init__(self, http_client: Optional[HttpClient] = None):
+        self.http_client = http_client or get_http_client()
+        # Último resultado do parse, reaproveitado quando a página não mudou (HTTP 304)
+        self._last_fiis: Optional[list[FII]] = None
+
     def get_all(self) -> list[FII]:
-        url = "https://www.fundamentus.com.br/fii_resultado.php"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
         try:
             # O Fundamentus retorna uma tabela HTML simples, ideal para pd.read_html
-            # Precisamos passar o header simulando um browser para não sermos bloqueados
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+            response = self.http_client.get(self.URL)
+            if response.not_modified and self._last_fiis is not None:
+                return list(self._last_fiis)
             
             # Corrige FutureWarning usando StringIO
             html_content = StringIO(response.text)
@@ -28,53 +32,81 @@ class FundamentusRepository:
                 return []
                 
             df = dfs[0]
-            
-            # Mapeamento e limpeza
-            fiis = []
-            
-            # Colunas esperadas no Fundamentus:
-            # Papel, Segmento, Cotação, FFO Yield, Dividend Yield, P/VP, Valor de Mercado, Liquidez, Qtd de imóveis, Preço do m2, Aluguel do m2, Cap Rate, Vacância Média
-            
-            for _, row in df.iterrows():
-                try:
-                    ticker = str(row.get('Papel', '')).strip()
-                    sector = str(row.get('Segmento', '')).strip()
-                    
-                    price = self._clean_float(row.get('Cotação', 0))
-                    dy = self._clean_float(row.get('Dividend Yield', 0)) # Já vem em %? O pandas costuma converter se tiver decimal=","
-                    pvp = self._clean_float(row.get('P/VP', 0))
-                    liquidity = self._clean_float(row.get('Liquidez', 0))
-                    vacancia = self._clean_float(row.get('Vacância Média', 0))
-                    
-                    # No Fundamentus, DY e Vacância vêm como string "12,00%" se não for tratado,
-                    # mas o read_html com decimal="," ajuda. Se vier string com %, precisamos limpar.
-                    if isinstance(row.get('Dividend Yield'), str) and '%' in row.get('Dividend Yield'):
-                         dy = self._parse_pct(row.get('Dividend Yield'))
-                    
-                    if isinstance(row.get('Vacância Média'), str) and '%' in row.get('Vacância Média'):
-                         vacancia = self._parse_pct(row.get('Vacância Média'))
-
-                    fiis.append(
-                        FII(
-                            ticker=ticker,
-                            price=price,
-                            dividend_yield=dy,
-                            pvp=pvp,
-                            sector=sector,
-                            liquidity=liquidity,
-                            vacancia=vacancia
-                        )
-                    )
-                except Exception as e:
-                    logging.warning(f"Erro ao processar linha do Fundamentus para {row.get('Papel')}: {e}")
-                    continue
-                    
-            return fiis
+            fiis = self._parse_dataframe(df)
+            self._last_fiis = fiis
+            return list(fiis)
 
         except Exception as e:
             logging.error(f"Erro ao acessar Fundamentus: {e}")
             return []
 
+    def _parse_dataframe(self, df: pd.DataFrame) -> list[FII]:
+        # Colunas esperadas no Fundamentus:
+        # Papel, Segmento, Cotação, FFO Yield, Dividend Yield, P/VP, Valor de Mercado, Liquidez, Qtd de imóveis, Preço do m2, Aluguel do m2, Cap Rate, Vacância Média
+        #
+        # A limpeza é feita por coluna (operações vetorizadas do pandas) e os
+        # objetos FII só são criados no final.
+        tickers = self._text_column(df, 'Papel')
+        sectors = self._text_column(df, 'Segmento')
+        prices = self._numeric_column(df, 'Cotação')
+        dys = self._numeric_column(df, 'Dividend Yield')
+        pvps = self._numeric_column(df, 'P/VP')
+        liquidities = self._numeric_column(df, 'Liquidez')
+        vacancias = self._numeric_column(df, 'Vacância Média')
+
+        fiis = []
+        for ticker, sector, price, dy, pvp, liquidity, vacancia in zip(
+            tickers, sectors, prices, dys, pvps, liquidities, vacancias
+        ):
+            try:
+                fiis.append(
+                    FII(
+                        ticker=ticker,
+                        price=price,
+                        dividend_yield=dy,
+                        pvp=pvp,
+                        sector=sector,
+                        liquidity=liquidity,
+                        vacancia=vacancia
+                    )
+                )
+            except Exception as e:
+                logging.warning(f"Erro ao processar linha do Fundamentus para {ticker}: {e}")
+                continue
+
+        return fiis
+
+    def _text_column(self, df: pd.DataFrame, column: str) -> list:
+        if column not in df:
+            return [''] * len(df)
+        return df[column].map(str).str.strip().tolist()
+
+    def _numeric_column(self, df: pd.DataFrame, column: str) -> list:
+        """
+        Versão vetorizada de _clean_float para uma coluna inteira.
+        Strings como "1.234,56", "R$ 10,00" ou "12,00%" são convertidas (0.0 se inválidas);
+        valores já numéricos são mantidos.
+        """
+        if column not in df:
+            return [0.0] * len(df)
+
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series):
+            return series.astype(float).tolist()
+
+        # O accessor .str devolve NaN para células que não são string
+        cleaned = (
+            series.str.replace('.', '', regex=False)
+            .str.replace(',', '.', regex=False)
+            .str.replace('R$', '', regex=False)
+            .str.replace('%', '', regex=False)
+            .str.strip()
+        )
+        is_text = cleaned.notna().to_numpy()
+        parsed = pd.to_numeric(cleaned, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        numeric = pd.to_numeric(series.where(~is_text), errors='coerce').to_numpy(dtype=float)
+        return np.where(is_text, parsed, numeric).tolist()
+
     def _clean_float(self, value) -> float:
         if isinstance(value, (int, float)):
             return float(value)
@@ -1,72 +1,212 @@
+import glob
 import json
+import logging
 import os
+import re
 import sys
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import asdict
 
+from core.utils.file_store import FileLock, atomic_write_json
 from core.interfaces.portfolio_repository import PortfolioRepositoryInterface
 from core.entities.portfolio import PortfolioItem, Transaction
+from core.use_cases.portfolio import TRADE_TYPES, group_by_ticker, rebuild_positions
+
+# portfolio[_<user>].json, transactions[_<user>].jsonl e o formato antigo transactions[_<user>].json
+FILE_PATTERN = re.compile(r"^(?:portfolio|transactions)(?:_(.+?))?\.jsonl?$")
 
 class JsonPortfolioRepository(PortfolioRepositoryInterface):
+    """
+    Persistência em arquivos por usuário:
+    - transactions_<user>.jsonl: journal append-only (JSON Lines + fsync), fonte da verdade.
+    - portfolio_<user>.json: visão materializada das posições, com o offset do journal já aplicado.
+      Se o journal estiver à frente (falha entre as duas gravações), os eventos restantes são reaplicados.
+    Escritas são atômicas (arquivo temporário + rename) e serializadas por usuário com portfolio_<user>.json.lock.
+    As operações agrupadas por ticker ficam em um índice por usuário, refeito só quando o journal muda.
+    """
+
     def __init__(self):
         if getattr(sys, 'frozen', False):
             self.base_path = os.path.dirname(sys.executable)
         else:
             self.base_path = os.getcwd()
+        # user_id -> (versão do journal, operações agrupadas por ticker)
+        self._transaction_index: Dict[str, Tuple[Tuple[int, int], Dict[str, List[Transaction]]]] = {}
 
     def _get_paths(self, user_id: str) -> Tuple[str, str]:
         if user_id and user_id != 'default':
             portfolio_path = os.path.join(self.base_path, f"portfolio_{user_id}.json")
-            transactions_path = os.path.join(self.base_path, f"transactions_{user_id}.json")
+            transactions_path = os.path.join(self.base_path, f"transactions_{user_id}.jsonl")
         else:
             portfolio_path = os.path.join(self.base_path, "portfolio.json")
-            transactions_path = os.path.join(self.base_path, "transactions.json")
+            transactions_path = os.path.join(self.base_path, "transactions.jsonl")
         return portfolio_path, transactions_path
 
-    def _ensure_file_exists(self, file_path: str):
-        if not os.path.exists(file_path):
-            with open(file_path, 'w') as f:
-                json.dump([], f)
+    def list_users(self) -> List[str]:
+        users = set()
+        for path in glob.glob(os.path.join(self.base_path, "*.json*")):
+            match = FILE_PATTERN.match(os.path.basename(path))
+            if match:
+                users.add(match.group(1) or 'default')
+        return sorted(users)
 
-    def load_portfolio(self, user_id: str) -> List[PortfolioItem]:
+    def lock(self, user_id: str) -> FileLock:
         portfolio_path, _ = self._get_paths(user_id)
-        self._ensure_file_exists(portfolio_path)
+        return FileLock(portfolio_path + ".lock")
+
+    def _get_journal_path(self, user_id: str) -> str:
+        _, transactions_path = self._get_paths(user_id)
+        legacy_path = transactions_path[:-len(".jsonl")] + ".json"
+        if not os.path.exists(transactions_path) and os.path.exists(legacy_path):
+            with self.lock(user_id):
+                if not os.path.exists(transactions_path):
+                    self._migrate_legacy_transactions(legacy_path, transactions_path)
+        return transactions_path
+
+    def _migrate_legacy_transactions(self, legacy_path: str, journal_path: str):
+        # Formato antigo: um único array JSON reescrito a cada transação
+        try:
+            with open(legacy_path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            data = []
+        tmp_path = journal_path + ".migrating"
+        with open(tmp_path, 'w') as f:
+            for item in data:
+                f.write(json.dumps(item) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, journal_path)
+
+    def _journal_size(self, journal_path: str) -> int:
+        try:
+            return os.path.getsize(journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def _read_journal(self, journal_path: str, offset: int = 0) -> Iterator[Transaction]:
+        try:
+            with open(journal_path, 'r') as f:
+                f.seek(offset)
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield Transaction(**json.loads(line))
+                    except (json.JSONDecodeError, TypeError):
+                        # Linha truncada por falha durante a escrita
+                        logging.warning(f"Linha inválida ignorada no journal {journal_path}")
+        except FileNotFoundError:
+            return
+
+    def _read_view(self, portfolio_path: str) -> Tuple[Optional[List[PortfolioItem]], Optional[int]]:
         try:
             with open(portfolio_path, 'r') as f:
                 data = json.load(f)
-                return [PortfolioItem(**item) for item in data]
         except (json.JSONDecodeError, FileNotFoundError):
-            return []
+            return None, None
+        if isinstance(data, list):
+            # Formato antigo (apenas a lista de posições): considerado em dia com o journal
+            return [PortfolioItem(**item) for item in data], None
+        return [PortfolioItem(**item) for item in data["items"]], data["journal_offset"]
+
+    def _write_view(self, portfolio_path: str, items: List[PortfolioItem], journal_offset: int):
+        atomic_write_json(portfolio_path, {
+            "journal_offset": journal_offset,
+            "items": [asdict(item) for item in items],
+        }, indent=4)
+
+    def load_portfolio(self, user_id: str) -> List[PortfolioItem]:
+        portfolio_path, _ = self._get_paths(user_id)
+        journal_path = self._get_journal_path(user_id)
+        items, offset = self._read_view(portfolio_path)
+        journal_size = self._journal_size(journal_path)
+
+        if items is not None and (offset is None or offset == journal_size):
+            return items
+
+        with self.lock(user_id):
+            # Relê sob o lock: outro processo pode ter acabado de atualizar a visão
+            items, offset = self._read_view(portfolio_path)
+            journal_size = self._journal_size(journal_path)
+            if items is not None and (offset is None or offset == journal_size):
+                return items
+
+            # Recuperação: visão ausente/corrompida (reconstrói tudo) ou atrasada (reaplica só o final)
+            if items is None or offset > journal_size:
+                items, offset = [], 0
+            items = rebuild_positions(self._read_journal(journal_path, offset), items)
+            self._write_view(portfolio_path, items, journal_size)
+            return items
 
     def save_portfolio(self, user_id: str, items: List[PortfolioItem]):
         portfolio_path, _ = self._get_paths(user_id)
-        with open(portfolio_path, 'w') as f:
-            json.dump([asdict(item) for item in items], f, indent=4)
+        journal_path = self._get_journal_path(user_id)
+        with self.lock(user_id):
+            self._write_view(portfolio_path, items, self._journal_size(journal_path))
+
+    def iter_journal(self, user_id: str) -> Iterator[Transaction]:
+        """Todos os eventos do journal do usuário, na ordem de gravação (inclui REMOVE/CLEAR)."""
+        return self._read_journal(self._get_journal_path(user_id))
 
     def get_transactions(self, user_id: str, ticker: str = None) -> List[Transaction]:
-        _, transactions_path = self._get_paths(user_id)
-        self._ensure_file_exists(transactions_path)
+        journal_path = self._get_journal_path(user_id)
+        transactions = [t for t in self._read_journal(journal_path) if t.type in TRADE_TYPES]
+        if ticker:
+            transactions = [t for t in transactions if t.ticker == ticker]
+        # Sort by date descending
+        return sorted(transactions, key=lambda x: x.date, reverse=True)
+
+    def _journal_version(self, journal_path: str) -> Tuple[int, int]:
+        # Journal append-only: tamanho e mtime mudam a cada gravação, sem precisar reler o arquivo
         try:
-            with open(transactions_path, 'r') as f:
-                data = json.load(f)
-                transactions = [Transaction(**item) for item in data]
-                if ticker:
-                    transactions = [t for t in transactions if t.ticker == ticker]
-                # Sort by date descending
-                return sorted(transactions, key=lambda x: x.date, reverse=True)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+            stat = os.stat(journal_path)
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_size, stat.st_mtime_ns
 
-    def add_transaction(self, user_id: str, transaction: Transaction):
-        _, transactions_path = self._get_paths(user_id)
-        self._ensure_file_exists(transactions_path)
+    def portfolio_version(self, user_id: str) -> Tuple[int, int, int]:
+        portfolio_path, _ = self._get_paths(user_id)
         try:
-            with open(transactions_path, 'r') as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            data = []
-        
-        data.append(asdict(transaction))
-        
-        with open(transactions_path, 'w') as f:
-            json.dump(data, f, indent=4)
+            view_mtime = os.stat(portfolio_path).st_mtime_ns
+        except FileNotFoundError:
+            view_mtime = 0
+        return (*self._journal_version(self._get_journal_path(user_id)), view_mtime)
+
+    def get_transactions_by_ticker(self, user_id: str) -> Dict[str, List[Transaction]]:
+        journal_path = self._get_journal_path(user_id)
+        version = self._journal_version(journal_path)
+        cached = self._transaction_index.get(user_id)
+        if cached is None or cached[0] != version:
+            transactions = sorted(
+                (t for t in self._read_journal(journal_path) if t.type in TRADE_TYPES),
+                key=lambda x: x.date, reverse=True,
+            )
+            cached = (version, group_by_ticker(transactions))
+            self._transaction_index[user_id] = cached
+        return {ticker: list(transactions) for ticker, transactions in cached[1].items()}
+
+    def add_transaction(self, user_id: str, transaction: Transaction):
+        # Append O(1): não relê nem reescreve o histórico
+        self.add_transactions(user_id, [transaction])
+
+    def add_transactions(self, user_id: str, transactions: Iterable[Transaction]):
+        # Lote inteiro em um único append + fsync
+        with self.lock(user_id):
+            self._append_journal(self._get_journal_path(user_id), transactions)
+
+    def _append_journal(self, journal_path: str, transactions: Iterable[Transaction]):
+        line = "".join(json.dumps(asdict(transaction)) + "\n" for transaction in transactions)
+        if not line:
+            return
+        if self._journal_size(journal_path) > 0:
+            with open(journal_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Última linha truncada: começa em uma linha nova para não corromper este evento
+                    line = "\n" + line
+        with open(journal_path, 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
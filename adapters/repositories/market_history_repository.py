@@ -0,0 +1,102 @@
+import logging
+import os
+import sys
+from dataclasses import fields
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
+
+FII_COLUMNS = [field.name for field in fields(FII)]
+
+
+class MarketHistoryRepository:
+    """
+    Série histórica dos indicadores de mercado: uma partição Parquet (colunar) por dia.
+
+    market_history_<name>/<YYYY-MM-DD>.parquet guarda o último snapshot daquele dia.
+    Consultas por intervalo leem apenas as partições das datas pedidas e, dentro delas,
+    apenas as colunas e tickers solicitados.
+    """
+
+    def __init__(self, name: str, base_path: str = None):
+        if base_path is None:
+            if getattr(sys, 'frozen', False):
+                base_path = os.path.dirname(sys.executable)
+            else:
+                base_path = os.getcwd()
+        self.history_path = os.path.join(base_path, f"market_history_{name}")
+        os.makedirs(self.history_path, exist_ok=True)
+
+    def _partition_path(self, day: date) -> str:
+        return os.path.join(self.history_path, f"{day.isoformat()}.parquet")
+
+    def append(self, fiis: Union[Sequence[FII], FIIUniverse], fetched_at: Optional[datetime] = None):
+        """Grava o snapshot como partição do dia (substitui um snapshot anterior do mesmo dia)."""
+        fetched_at = fetched_at or datetime.now()
+        universe = fiis if isinstance(fiis, FIIUniverse) else FIIUniverse.from_fiis(fiis)
+        if not len(universe):
+            return
+
+        table = pa.table({
+            "date": pa.array([fetched_at.date()] * len(universe), type=pa.date32()),
+            **{column: pa.array(universe[column].tolist()) for column in FII_COLUMNS},
+        })
+        path = self._partition_path(fetched_at.date())
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def dates(self) -> List[date]:
+        """Datas com snapshot disponível, em ordem crescente."""
+        days = []
+        for file_name in os.listdir(self.history_path):
+            if not file_name.endswith(".parquet"):
+                continue
+            try:
+                days.append(date.fromisoformat(file_name[:-len(".parquet")]))
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def load_range(self, start: Optional[date] = None, end: Optional[date] = None,
+                   tickers: Optional[Iterable[str]] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Snapshots entre start e end (inclusive), opcionalmente restritos a alguns tickers/colunas.
+        Retorna um DataFrame longo (date, ticker, ...) ordenado por data e ticker.
+        """
+        selected = ["date", "ticker"] + [c for c in (columns or FII_COLUMNS) if c not in ("date", "ticker")]
+        filters = None
+        if tickers is not None:
+            tickers = list(tickers)
+            if not tickers:
+                return pd.DataFrame(columns=selected)
+            filters = [("ticker", "in", tickers)]
+
+        tables = []
+        for day in self.dates():
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            try:
+                tables.append(pq.read_table(self._partition_path(day), columns=selected, filters=filters))
+            except (OSError, pa.ArrowInvalid) as e:
+                logging.warning(f"Partição de histórico inválida ignorada ({day}): {e}")
+
+        if not tables:
+            return pd.DataFrame(columns=selected)
+        df = pa.concat_tables(tables).to_pandas()
+        df["date"] = pd.to_datetime(df["date"])
+        return df.sort_values(["date", "ticker"], kind="stable").reset_index(drop=True)
+
+    def ticker_history(self, ticker: str, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Série de um ticker indexada por data."""
+        return self.load_range(start, end, tickers=[ticker]).set_index("date")
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from core.utils.file_store import atomic_write_json, try_acquire_lock_file, release_lock_file
+from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
+
+
+class SnapshotFIIRepository:
+    """
+    Camada de snapshot em disco sobre um repositório de mercado (Fundamentus/FundsExplorer).
+
+    O último resultado de get_all() é gravado com timestamp em um arquivo JSON
+    compartilhado por todas as sessões e processos. Dados vencidos são servidos
+    imediatamente (stale-while-revalidate) enquanto um único refresher em
+    background busca uma nova versão. Se um history for informado (ex: MarketHistoryRepository),
+    cada versão nova também é anexada à série histórica diária.
+    Com auto_refresh=False (atualização feita por um agendador), leituras nunca disparam scrape,
+    exceto na partida a frio sem nenhum snapshot.
+    Antes de cada scrape o arquivo é relido sob o lock: se outro processo acabou de gravar um
+    snapshot recente (mais novo que min_age), ele é reaproveitado e a fonte não é consultada.
+    """
+
+    def __init__(self, source_repository, name: str, max_age: timedelta = timedelta(hours=1), base_path: str = None, history=None,
+                 auto_refresh: bool = True):
+        if base_path is None:
+            if getattr(sys, 'frozen', False):
+                base_path = os.path.dirname(sys.executable)
+            else:
+                base_path = os.getcwd()
+        self.source_repository = source_repository
+        self.max_age = max_age
+        self.history = history
+        self.auto_refresh = auto_refresh
+        self.snapshot_path = os.path.join(base_path, f"market_snapshot_{name}.json")
+        self.lock_path = self.snapshot_path + ".lock"
+
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._fiis: List[FII] = []
+        self._universe: Optional[FIIUniverse] = None
+        # Incrementado a cada troca de snapshot (refresh ou arquivo mais novo gravado por outro processo)
+        self._version = 0
+        self._fetched_at: Optional[datetime] = None
+        self._loaded_mtime: Optional[float] = None
+
+    @property
+    def fetched_at(self) -> Optional[datetime]:
+        return self._fetched_at
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get_all(self) -> List[FII]:
+        self._ensure_snapshot()
+        return list(self._fiis)
+
+    def get_universe(self) -> FIIUniverse:
+        """
+        Mesmos dados de get_all() em formato colunar, construído uma vez por versão do snapshot.
+        O universo é somente leitura e devolvido por referência: todas as sessões compartilham o mesmo objeto.
+        """
+        self._ensure_snapshot()
+        with self._lock:
+            if self._universe is None:
+                self._universe = FIIUniverse.from_fiis(self._fiis, self._version)
+            return self._universe
+
+    def _ensure_snapshot(self):
+        self._load_from_disk()
+
+        if self._fetched_at is None:
+            # Partida a frio sem snapshot: única situação em que bloqueamos no scrape
+            if not self.refresh(min_age=self.max_age):
+                self._wait_for_snapshot()
+        elif self.auto_refresh and self.is_stale():
+            self.refresh_in_background()
+
+    def is_stale(self) -> bool:
+        return self._fetched_at is None or datetime.now() - self._fetched_at > self.max_age
+
+    def refresh(self, min_age: Optional[timedelta] = None) -> bool:
+        """
+        Busca dados na fonte e grava o snapshot. Retorna False se outro processo já está atualizando.
+        Com min_age, o scrape é pulado se o snapshot em disco tiver sido obtido há menos de min_age.
+        """
+        if not try_acquire_lock_file(self.lock_path):
+            return False
+        try:
+            if min_age is not None:
+                # Outro processo/réplica pode ter gravado um snapshot enquanto esperávamos o lock
+                self._load_from_disk()
+                if self._fetched_at is not None and datetime.now() - self._fetched_at < min_age:
+                    return True
+            fiis = self.source_repository.get_all()
+            if not fiis:
+                # Mantém o snapshot anterior se a fonte falhar ou vier vazia
+                logging.warning(f"Fonte retornou lista vazia; mantendo snapshot {self.snapshot_path}")
+                return True
+            fetched_at = datetime.now()
+            atomic_write_json(self.snapshot_path, {
+                "fetched_at": fetched_at.isoformat(),
+                "fiis": [asdict(fii) for fii in fiis],
+            })
+            with self._lock:
+                self._fiis = fiis
+                self._universe = None
+                self._version += 1
+                self._fetched_at = fetched_at
+                self._loaded_mtime = os.path.getmtime(self.snapshot_path)
+            if self.history is not None:
+                try:
+                    self.history.append(fiis, fetched_at)
+                except Exception as e:
+                    logging.warning(f"Falha ao gravar histórico de mercado: {e}")
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao atualizar snapshot de mercado: {e}")
+            return True
+        finally:
+            release_lock_file(self.lock_path)
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self.refresh, kwargs={"min_age": self.max_age}, name="market-snapshot-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _wait_for_snapshot(self, timeout: float = 60.0):
+        # Outro processo está fazendo o scrape inicial; aguardamos o arquivo dele
+        deadline = time.monotonic() + timeout
+        while self._fetched_at is None and os.path.exists(self.lock_path) and time.monotonic() < deadline:
+            time.sleep(0.5)
+            self._load_from_disk()
+
+    def _load_from_disk(self):
+        try:
+            mtime = os.path.getmtime(self.snapshot_path)
+        except FileNotFoundError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+            fiis = [FII(**item) for item in data["fiis"]]
+            fetched_at = datetime.fromisoformat(data["fetched_at"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logging.warning(f"Snapshot de mercado inválido ({self.snapshot_path}): {e}")
+            return
+
+        with self._lock:
+            self._fiis = fiis
+            self._universe = None
+            self._version += 1
+            self._fetched_at = fetched_at
+            self._loaded_mtime = mtime
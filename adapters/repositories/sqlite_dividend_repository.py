@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+
+
+class SqliteDividendRepository:
+    """
+    Armazena eventos de dividendos por ticker em um arquivo SQLite,
+    permitindo atualização incremental a partir da última data gravada.
+    """
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            if getattr(sys, 'frozen', False):
+                base_path = os.path.dirname(sys.executable)
+            else:
+                base_path = os.getcwd()
+            db_path = os.path.join(base_path, "dividends.db")
+        self.db_path = db_path
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por operação: seguro para uso a partir do pool de threads.
+        # Usar com closing(): o contexto de sqlite3.Connection só faz commit/rollback, não fecha
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _create_tables(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dividends (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (ticker, date)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dividend_refresh (
+                    ticker TEXT PRIMARY KEY,
+                    refreshed_at TEXT NOT NULL
+                )
+            """)
+
+    def get_last_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT MAX(date) FROM dividends WHERE ticker = ?", (ticker,)).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def is_stale(self, ticker: str, max_age: timedelta) -> bool:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT refreshed_at FROM dividend_refresh WHERE ticker = ?", (ticker,)).fetchone()
+        if not row:
+            return True
+        return datetime.now() - datetime.fromisoformat(row[0]) > max_age
+
+    def load(self, ticker: str) -> pd.Series:
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT date, value FROM dividends WHERE ticker = ? ORDER BY date", (ticker,)
+            ).fetchall()
+        index = pd.to_datetime([date for date, _ in rows])
+        return pd.Series([value for _, value in rows], index=index, dtype=float, name="Dividends")
+
+    def save(self, ticker: str, dividends: pd.Series):
+        """Grava (ou sobrescreve) os eventos recebidos e marca o ticker como atualizado."""
+        rows = [(ticker, pd.Timestamp(date).strftime('%Y-%m-%d'), float(value)) for date, value in dividends.items()]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO dividends (ticker, date, value) VALUES (?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO dividend_refresh (ticker, refreshed_at) VALUES (?, ?)",
+                (ticker, datetime.now().isoformat()),
+            )
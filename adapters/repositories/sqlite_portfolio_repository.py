@@ -0,0 +1,209 @@
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from core.utils.file_store import FileLock
+from core.interfaces.portfolio_repository import PortfolioRepositoryInterface
+from core.entities.portfolio import PortfolioItem, Transaction
+from core.use_cases.portfolio import TRADE_TYPES, group_by_ticker, rebuild_positions
+
+class SqlitePortfolioRepository(PortfolioRepositoryInterface):
+    """
+    Carteiras e transações de todos os usuários em um único banco SQLite (modo WAL).
+
+    A tabela transactions funciona como journal; positions é a visão materializada,
+    com o último id de transação aplicado em portfolio_state para recuperação.
+    Uma única conexão é reaproveitada (ex: via st.cache_resource) e protegida por lock.
+    """
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            if getattr(sys, 'frozen', False):
+                base_path = os.path.dirname(sys.executable)
+            else:
+                base_path = os.getcwd()
+            db_path = os.path.join(base_path, "portfolio.db")
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        # user_id -> (último id de transação, operações agrupadas por ticker)
+        self._transaction_index: Dict[str, Tuple[int, Dict[str, List[Transaction]]]] = {}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    price REAL NOT NULL,
+                    type TEXT NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_transactions_user_ticker_date ON transactions (user_id, ticker, date)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS positions (
+                    user_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    ticker TEXT NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    average_price REAL NOT NULL,
+                    PRIMARY KEY (user_id, ticker)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS portfolio_state (
+                    user_id TEXT PRIMARY KEY,
+                    last_transaction_id INTEGER NOT NULL
+                )
+            """)
+
+    def lock(self, user_id: str) -> FileLock:
+        # Cada comando SQL já é atômico; o lock cobre o ciclo leitura-modificação-escrita do serviço
+        return FileLock(f"{self.db_path}.{self._user(user_id)}.lock")
+
+    def list_users(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id FROM positions UNION SELECT user_id FROM transactions ORDER BY user_id"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _user(self, user_id: str) -> str:
+        return user_id or 'default'
+
+    def _last_transaction_id(self, user_id: str) -> int:
+        row = self._conn.execute(
+            "SELECT MAX(id) FROM transactions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] or 0
+
+    def _write_positions(self, user_id: str, items: List[PortfolioItem]):
+        self._conn.execute("DELETE FROM positions WHERE user_id = ?", (user_id,))
+        self._conn.executemany(
+            "INSERT INTO positions (user_id, seq, ticker, quantity, average_price) VALUES (?, ?, ?, ?, ?)",
+            [(user_id, seq, item.ticker, item.quantity, item.average_price) for seq, item in enumerate(items)],
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO portfolio_state (user_id, last_transaction_id) VALUES (?, ?)",
+            (user_id, self._last_transaction_id(user_id)),
+        )
+
+    def _to_transaction(self, row) -> Transaction:
+        return Transaction(date=row[0], ticker=row[1], quantity=row[2], price=row[3], type=row[4])
+
+    def _read_positions(self, user_id: str) -> List[PortfolioItem]:
+        return [
+            PortfolioItem(ticker, quantity, average_price)
+            for ticker, quantity, average_price in self._conn.execute(
+                "SELECT ticker, quantity, average_price FROM positions WHERE user_id = ? ORDER BY seq", (user_id,)
+            )
+        ]
+
+    def _applied_transaction_id(self, user_id: str) -> int:
+        state = self._conn.execute(
+            "SELECT last_transaction_id FROM portfolio_state WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return state[0] if state else 0
+
+    def load_portfolio(self, user_id: str) -> List[PortfolioItem]:
+        user_id = self._user(user_id)
+        with self._lock:
+            items = self._read_positions(user_id)
+            if self._applied_transaction_id(user_id) == self._last_transaction_id(user_id):
+                return items
+
+        with self.lock(user_id), self._lock:
+            # Relê sob o lock do usuário: outro processo pode ter acabado de atualizar as posições
+            items = self._read_positions(user_id)
+            applied_id = self._applied_transaction_id(user_id)
+            if applied_id == self._last_transaction_id(user_id):
+                return items
+
+            # Recuperação: reaplica as transações gravadas depois da última atualização das posições
+            pending = self._conn.execute(
+                "SELECT date, ticker, quantity, price, type FROM transactions WHERE user_id = ? AND id > ? ORDER BY id",
+                (user_id, applied_id),
+            ).fetchall()
+            items = rebuild_positions((self._to_transaction(row) for row in pending), items)
+            with self._conn:
+                self._write_positions(user_id, items)
+            return items
+
+    def save_portfolio(self, user_id: str, items: List[PortfolioItem]):
+        with self._lock, self._conn:
+            self._write_positions(self._user(user_id), items)
+
+    def get_transactions(self, user_id: str, ticker: str = None) -> List[Transaction]:
+        # Consultas cobertas pelos índices (user_id, ticker, date) e (user_id, date)
+        placeholders = ", ".join("?" for _ in TRADE_TYPES)
+        query = f"SELECT date, ticker, quantity, price, type FROM transactions WHERE user_id = ? AND type IN ({placeholders})"
+        params = [self._user(user_id), *TRADE_TYPES]
+        if ticker:
+            query += " AND ticker = ?"
+            params.append(ticker)
+        query += " ORDER BY date DESC"
+        with self._lock:
+            return [self._to_transaction(row) for row in self._conn.execute(query, params)]
+
+    def portfolio_version(self, user_id: str) -> Tuple[int, int]:
+        user_id = self._user(user_id)
+        with self._lock:
+            return self._last_transaction_id(user_id), self._applied_transaction_id(user_id)
+
+    def iter_journal(self, user_id: str) -> Iterator[Transaction]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, ticker, quantity, price, type FROM transactions WHERE user_id = ? ORDER BY id",
+                (self._user(user_id),),
+            ).fetchall()
+        return (self._to_transaction(row) for row in rows)
+
+    def get_transactions_by_ticker(self, user_id: str) -> Dict[str, List[Transaction]]:
+        user_id = self._user(user_id)
+        with self._lock:
+            # MAX(id) pelo índice (user_id, date) é a versão: só relê as transações quando houver novas
+            version = self._last_transaction_id(user_id)
+            cached = self._transaction_index.get(user_id)
+            if cached is None or cached[0] != version:
+                cached = (version, group_by_ticker(self.get_transactions(user_id)))
+                self._transaction_index[user_id] = cached
+        return {ticker: list(transactions) for ticker, transactions in cached[1].items()}
+
+    def add_transaction(self, user_id: str, transaction: Transaction):
+        self.add_transactions(user_id, [transaction])
+
+    def add_transactions(self, user_id: str, transactions: Iterable[Transaction]):
+        user_id = self._user(user_id)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO transactions (user_id, date, ticker, quantity, price, type) VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, t.date, t.ticker, t.quantity, t.price, t.type) for t in transactions],
+            )
+
+    def import_user(self, user_id: str, items: List[PortfolioItem], transactions: Iterable[Transaction]):
+        """Substitui todos os dados do usuário (usado na migração dos arquivos JSON) em uma única transação."""
+        user_id = self._user(user_id)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM transactions WHERE user_id = ?", (user_id,))
+            self._conn.executemany(
+                "INSERT INTO transactions (user_id, date, ticker, quantity, price, type) VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, t.date, t.ticker, t.quantity, t.price, t.type) for t in transactions],
+            )
+            self._write_positions(user_id, items)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
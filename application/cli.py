@@ -1,15 +1,53 @@
 # fii_analyzer/application/cli.py
 
+# Uso: python -m application.cli                                   (análise interativa de compra/venda)
+#      python -m application.cli importar EXTRATO --usuario NOME   (importa extrato CSV/XLSX da B3/corretora)
+
+import argparse
 import logging
+import time
+from adapters.inputs.broker_statement_reader import BrokerStatementReader
 from adapters.repositories.fii_repository import FIIRepository
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
 from adapters.outputs.fii_console_outputs import FIIConsoleOutputs
+from application.config import PORTFOLIO_BACKEND
+from core.services.statement_import_service import StatementImportService
 from core.use_cases.analyze_buy import AnalyzeBuy
 from core.use_cases.analyze_sell import AnalyzeSell
 
 
+def import_statement(path: str, user_id: str, encoding: str):
+    repository = SqlitePortfolioRepository() if PORTFOLIO_BACKEND == "sqlite" else JsonPortfolioRepository()
+    reader = BrokerStatementReader(encoding=encoding)
+    start = time.perf_counter()
+    summary = StatementImportService(repository, user_id).import_transactions(reader.read(path))
+    elapsed = time.perf_counter() - start
+    print(f"{reader.rows_read} linhas lidas em {elapsed:.1f}s: {summary.imported} operações importadas, "
+          f"{summary.duplicates} já existentes, {reader.skipped} linhas ignoradas.")
+    for transaction in summary.rejected:
+        print(f"Rejeitada (inconsistente com a carteira): {transaction.date[:10]} {transaction.type} "
+              f"{transaction.quantity} {transaction.ticker} @ {transaction.price:.2f}")
+
+
 def main():
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-    
+
+    parser = argparse.ArgumentParser(description="Calculadora de FIIs (linha de comando).")
+    subparsers = parser.add_subparsers(dest="command")
+    importar = subparsers.add_parser("importar", help="Importa um extrato de negociação (CSV ou XLSX)")
+    importar.add_argument("arquivo", help="Caminho do extrato")
+    importar.add_argument("--usuario", default=None, help="Usuário da carteira (padrão: carteira sem login)")
+    importar.add_argument("--encoding", default="utf-8-sig", help="Codificação do CSV (ex: latin-1)")
+    args = parser.parse_args()
+
+    if args.command == "importar":
+        try:
+            import_statement(args.arquivo, args.usuario, args.encoding)
+        except (ValueError, ImportError, OSError) as e:
+            logging.error(f"Falha ao importar o extrato: {e}")
+        return
+
     try:
         print("Iniciando análise de FIIs...")
         repository = FIIRepository()
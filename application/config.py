@@ -0,0 +1,11 @@
+import os
+
+# Backend de persistência das carteiras: "json" (arquivos por usuário) ou "sqlite" (portfolio.db)
+PORTFOLIO_BACKEND = os.environ.get("PORTFOLIO_BACKEND", "json").lower()
+
+# Atualização dos dados de mercado/dividendos:
+# "thread" (agendador dentro do processo web), "sidecar" (python -m application.scheduler em outro processo)
+# ou "off" (atualização sob demanda nas próprias requisições)
+MARKET_SCHEDULER = os.environ.get("MARKET_SCHEDULER", "thread").lower()
+# Fontes pré-carregadas pelo agendador (nomes do seletor "Fonte de Dados")
+PREWARM_SOURCES = [s.strip() for s in os.environ.get("PREWARM_SOURCES", "Fundamentus").split(",") if s.strip()]
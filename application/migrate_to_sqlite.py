@@ -0,0 +1,37 @@
+# Importa carteiras e transações em JSON (portfolio_*.json / transactions_*.json[l]) para o SQLite.
+#
+# Uso: python -m application.migrate_to_sqlite [--source-dir DIR] [--db ARQUIVO]
+
+import argparse
+import os
+
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra carteiras JSON para SQLite.")
+    parser.add_argument("--source-dir", default=os.getcwd(), help="Diretório com os arquivos JSON (padrão: atual)")
+    parser.add_argument("--db", default=None, help="Arquivo SQLite de destino (padrão: portfolio.db no diretório de origem)")
+    args = parser.parse_args()
+
+    json_repository = JsonPortfolioRepository()
+    json_repository.base_path = args.source_dir
+    sqlite_repository = SqlitePortfolioRepository(args.db or os.path.join(args.source_dir, "portfolio.db"))
+
+    users = json_repository.list_users()
+    if not users:
+        print("Nenhum arquivo de carteira encontrado.")
+        return
+
+    for user_id in users:
+        items = json_repository.load_portfolio(user_id)
+        transactions = list(json_repository.iter_journal(user_id))
+        sqlite_repository.import_user(user_id, items, transactions)
+        print(f"{user_id}: {len(items)} posições, {len(transactions)} transações importadas.")
+
+    sqlite_repository.close()
+
+
+if __name__ == "__main__":
+    main()
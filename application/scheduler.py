@@ -0,0 +1,56 @@
+# Agendador de pré-aquecimento dos dados de mercado e dividendos (modo sidecar).
+#
+# Uso: MARKET_SCHEDULER=sidecar python -m application.scheduler
+# O processo web lê os snapshots gravados por este processo (troca atômica dos arquivos).
+
+import logging
+import time
+from typing import Set
+
+from adapters.repositories.fii_repository import FIIRepository
+from adapters.repositories.fundamentus_repository import FundamentusRepository
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.market_history_repository import MarketHistoryRepository
+from adapters.repositories.snapshot_fii_repository import SnapshotFIIRepository
+from adapters.repositories.sqlite_dividend_repository import SqliteDividendRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from application.config import PORTFOLIO_BACKEND, PREWARM_SOURCES
+from core.interfaces.portfolio_repository import PortfolioRepositoryInterface
+from core.services.dividend_service import DividendService
+from core.services.refresh_scheduler import RefreshScheduler
+
+
+def portfolio_tickers(repository: PortfolioRepositoryInterface) -> Set[str]:
+    """União dos tickers de todas as carteiras (cada ticker é buscado uma única vez)."""
+    tickers = set()
+    for user_id in repository.list_users():
+        tickers.update(item.ticker for item in repository.load_portfolio(user_id))
+    return tickers
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    sources = {"Fundamentus": FundamentusRepository, "FundsExplorer": FIIRepository}
+    market_repositories = [
+        SnapshotFIIRepository(
+            sources[name](), name=name.lower(), history=MarketHistoryRepository(name=name.lower()), auto_refresh=False
+        )
+        for name in PREWARM_SOURCES if name in sources
+    ]
+    portfolio_repository = SqlitePortfolioRepository() if PORTFOLIO_BACKEND == "sqlite" else JsonPortfolioRepository()
+    scheduler = RefreshScheduler(
+        market_repositories,
+        DividendService(store=SqliteDividendRepository()),
+        lambda: portfolio_tickers(portfolio_repository),
+    )
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,28 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import altair as alt
 from dataclasses import asdict
+from datetime import date, timedelta
+from adapters.inputs.broker_statement_reader import BrokerStatementReader
+from adapters.repositories.composite_fii_repository import CompositeFIIRepository
 from adapters.repositories.fii_repository import FIIRepository
 from adapters.repositories.fundamentus_repository import FundamentusRepository
 from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.market_history_repository import MarketHistoryRepository
+from adapters.repositories.snapshot_fii_repository import SnapshotFIIRepository
+from adapters.repositories.sqlite_dividend_repository import SqliteDividendRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from application.config import MARKET_SCHEDULER, PORTFOLIO_BACKEND, PREWARM_SOURCES
+from application.scheduler import portfolio_tickers
 from core.services.portfolio_service import PortfolioService
 from core.services.ai_analysis_service import SmartAnalysisService
 from core.services.dividend_service import DividendService
+from core.services.projection_service import ProjectionService
+from core.services.refresh_scheduler import RefreshScheduler
+from core.services.statement_import_service import StatementImportService
 from core.use_cases.analyze_buy import AnalyzeBuy
 from core.use_cases.analyze_sell import AnalyzeSell
 from core.entities.fii import FII
@@ -78,11 +91,25 @@ if not st.session_state.authenticated:
     login_page()
     st.stop()
 
+# Repositório de carteiras compartilhado entre reruns e sessões (mantém a conexão SQLite aberta)
+@st.cache_resource
+def get_portfolio_repository(backend=PORTFOLIO_BACKEND):
+    if backend == "sqlite":
+        return SqlitePortfolioRepository()
+    return JsonPortfolioRepository()
+
+# Dividendos cacheados por ticker e compartilhados entre sessões: cada ticker é baixado uma vez, não uma vez por usuário
+@st.cache_resource
+def get_dividend_service():
+    return DividendService(store=SqliteDividendRepository())
+
 # Serviços (Instanciados com contexto do usuário)
-portfolio_repository = JsonPortfolioRepository()
+portfolio_repository = get_portfolio_repository()
+# Um serviço por rerun: a carteira é lida do disco no máximo uma vez, mesmo consultada por várias seções
 portfolio_service = PortfolioService(repository=portfolio_repository, user_id=st.session_state.username)
-ai_service = SmartAnalysisService()
-dividend_service = DividendService()
+projection_service = ProjectionService()
+ai_service = SmartAnalysisService(projection_service)
+dividend_service = get_dividend_service()
 
 # Inicialização de Estado da Sessão
 if 'show_add_modal' not in st.session_state:
@@ -95,17 +122,51 @@ if 'is_deleting' not in st.session_state:
     st.session_state.is_deleting = False
 if 'fiis_to_delete' not in st.session_state:
     st.session_state.fiis_to_delete = []
+if 'recommendation_limit' not in st.session_state:
+    st.session_state.recommendation_limit = 0
+
+RECOMMENDATION_PAGE_SIZE = 10
+VIABILITY_HISTORY_DAYS = 90
 
-# Função para carregar dados com cache
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def load_data(source="Fundamentus"):
+# Série histórica diária dos indicadores (uma partição Parquet por dia)
+@st.cache_resource
+def get_market_history(source="Fundamentus"):
+    return MarketHistoryRepository(name=source.lower())
+
+# Repositório de mercado compartilhado entre sessões (snapshot em disco + refresh em background)
+@st.cache_resource
+def get_market_repository(source="Fundamentus"):
     if source == "Fundamentus":
         repository = FundamentusRepository()
-    else:
+    elif source == "FundsExplorer":
         repository = FIIRepository()
-    return repository.get_all()
+    else:
+        # Ambas as fontes em paralelo: união por ticker, Fundamentus com precedência nos indicadores
+        repository = CompositeFIIRepository({"Fundamentus": FundamentusRepository(), "FundsExplorer": FIIRepository()})
+    # Fontes atualizadas pelo agendador não disparam scrape nas requisições
+    auto_refresh = MARKET_SCHEDULER == "off" or source not in PREWARM_SOURCES
+    return SnapshotFIIRepository(repository, name=source.lower(), history=get_market_history(source), auto_refresh=auto_refresh)
 
-def render_portfolio_view(fiis):
+def load_universe(source="Fundamentus"):
+    # Snapshot indexado (ticker e setor), somente leitura e versionado: construído uma vez por carga de dados
+    # e compartilhado por referência entre views, reruns e sessões (sem st.cache_data, que copiaria a cada rerun)
+    return get_market_repository(source).get_universe()
+
+# Agendador de pré-aquecimento (um por processo): snapshots de mercado e dividendos de todas as carteiras
+@st.cache_resource
+def get_scheduler():
+    scheduler = RefreshScheduler(
+        [get_market_repository(source) for source in PREWARM_SOURCES],
+        dividend_service,
+        lambda: portfolio_tickers(portfolio_repository),
+    )
+    scheduler.start()
+    return scheduler
+
+if MARKET_SCHEDULER == "thread":
+    get_scheduler()
+
+def render_portfolio_view(universe):
     st.header("Minha Carteira")
     
     # Barra de Ações
@@ -129,8 +190,7 @@ def render_portfolio_view(fiis):
             with col_del2:
                 if st.session_state.fiis_to_delete:
                     if st.button(f"Excluir {len(st.session_state.fiis_to_delete)} Selecionados", type="secondary"):
-                        for ticker in st.session_state.fiis_to_delete:
-                            portfolio_service.remove_asset(ticker)
+                        portfolio_service.remove_assets(st.session_state.fiis_to_delete)
                         st.session_state.fiis_to_delete = []
                         st.session_state.is_deleting = False
                         st.success("Ativos removidos com sucesso!")
@@ -167,14 +227,37 @@ def render_portfolio_view(fiis):
                         st.warning("O campo Ticker é obrigatório.")
             st.markdown("---")
 
+    # Importação de extrato de negociação (B3/corretora): lido em blocos e gravado em lotes
+    with st.expander("📥 Importar Extrato de Negociação (B3/Corretora)"):
+        uploaded = st.file_uploader("Arquivo CSV ou XLSX", type=["csv", "xlsx"], key="statement_upload")
+        if uploaded is not None and st.button("Importar Operações", type="primary"):
+            reader = BrokerStatementReader()
+            try:
+                with st.spinner("Importando operações..."):
+                    summary = StatementImportService(portfolio_repository, st.session_state.username).import_transactions(
+                        reader.read(uploaded, uploaded.name)
+                    )
+            except (ValueError, ImportError) as e:
+                st.error(f"Não foi possível importar o extrato: {e}")
+            else:
+                st.success(
+                    f"{summary.imported} operações importadas, {summary.duplicates} já existentes "
+                    f"e {reader.skipped} linhas ignoradas de {reader.rows_read}."
+                )
+                if summary.rejected:
+                    st.warning(
+                        f"{len(summary.rejected)} operações rejeitadas por não baterem com a carteira "
+                        "(ex: venda sem posição suficiente):\n"
+                        + "\n".join(f"- {t.date[:10]} {t.type} {t.quantity} {t.ticker}" for t in summary.rejected[:10])
+                    )
+
     # Carregar Carteira e Dados de Mercado
     portfolio_items = portfolio_service.load_portfolio()
-    market_map = {f.ticker: f for f in fiis}
 
     # Modal de Aporte (Se acionado)
     if st.session_state.show_aporte_modal and st.session_state.editing_ticker:
         ticker = st.session_state.editing_ticker
-        market_data = market_map.get(ticker)
+        market_data = universe.get(ticker)
         current_price = market_data.price if market_data else 0.0
         
         with st.container():
@@ -225,7 +308,7 @@ def render_portfolio_view(fiis):
 
     # Métricas Globais (Segmented Button Style)
     total_investido = sum(item.quantity * item.average_price for item in portfolio_items)
-    total_atual = sum(item.quantity * (market_map[item.ticker].price if item.ticker in market_map else 0) for item in portfolio_items)
+    total_atual = sum(item.quantity * (universe.get(item.ticker).price if item.ticker in universe else 0) for item in portfolio_items)
     rentabilidade_total = ((total_atual - total_investido) / total_investido * 100) if total_investido > 0 else 0
     lucro_total = total_atual - total_investido
     
@@ -263,7 +346,7 @@ def render_portfolio_view(fiis):
         cols = st.columns(cols_per_row)
         for idx, item in enumerate(chunk):
             with cols[idx]:
-                market_data = market_map.get(item.ticker)
+                market_data = universe.get(item.ticker)
                 current_price = market_data.price if market_data else 0.0
                 dy = market_data.dividend_yield if market_data else 0.0
                 pvp = market_data.pvp if market_data else 0.0
@@ -352,7 +435,12 @@ def render_portfolio_view(fiis):
                                 st.markdown(f"**Sentimento:** {ai_analysis['sentiment']}")
                                 st.info(ai_analysis['analysis_text'])
                         with tab_hist:
-                            transactions = portfolio_service.get_transactions(item.ticker)
+                            # Abas rodam mesmo fechadas: o histórico só é carregado quando pedido,
+                            # e vem do índice por ticker (uma leitura do journal por versão dos dados)
+                            if st.toggle("Carregar histórico", key=f"hist_{item.ticker}"):
+                                transactions = portfolio_service.get_transactions_by_ticker().get(item.ticker, [])
+                            else:
+                                transactions = None
                             if transactions:
                                 df_hist = pd.DataFrame([asdict(t) for t in transactions])
                                 
@@ -412,7 +500,7 @@ def render_portfolio_view(fiis):
                                         strokeWidth=0
                                     )
                                     st.altair_chart(final_chart, use_container_width=True)
-                            else:
+                            elif transactions is not None:
                                 st.info("Nenhum histórico de transações registrado para este ativo.")
 
 # Theme Definitions
@@ -608,28 +696,34 @@ def main():
 
     st.sidebar.markdown("---")
     st.sidebar.header("Configurações")
-    data_source = st.sidebar.selectbox("Fonte de Dados", ["Fundamentus", "FundsExplorer"])
+    data_source = st.sidebar.selectbox("Fonte de Dados", ["Fundamentus", "FundsExplorer", "Combinado"],
+                                       help="Combinado: consulta as duas fontes em paralelo e une os dados por ticker.")
 
     # Carregamento de Dados
     with st.spinner(f"Carregando dados dos FIIs via {data_source}..."):
         try:
-            fiis = load_data(data_source)
-            if not fiis:
+            universe = load_universe(data_source)
+            if not len(universe):
                 st.error("Falha ao carregar dados. Verifique a conexão.")
                 return
         except Exception as e:
             st.error(f"Erro ao carregar dados: {e}")
             return
 
+    source_repository = get_market_repository(data_source).source_repository
+    if isinstance(source_repository, CompositeFIIRepository) and source_repository.stale_sources:
+        stale = ", ".join(f"{name} ({fetched_at:%d/%m %H:%M})" for name, fetched_at in source_repository.stale_sources.items())
+        st.sidebar.warning(f"Fontes sem resposta na última atualização; usando dados anteriores de: {stale}")
+
     # Roteamento de Páginas
     if page == "Minha Carteira":
-        render_portfolio_view(fiis)
+        render_portfolio_view(universe)
     
     elif page == "Visão Geral":
         st.header("📊 Visão Geral do Mercado")
-        df = pd.DataFrame([vars(f) for f in fiis])
+        df = universe.to_dataframe()
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total de FIIs", len(fiis))
+        col1.metric("Total de FIIs", len(universe))
         col2.metric("Média de DY", f"{df['dividend_yield'].mean():.2f}%")
         col3.metric("Média de P/VP", f"{df['pvp'].mean():.2f}")
         st.dataframe(df, use_container_width=True)
@@ -651,12 +745,17 @@ def main():
             st.info("A análise IA considera P/VP ideal entre 0.8 e 1.2, DY sustentável e Baixa Vacância.")
         
         if st.button("🤖 Executar Smart Analysis"):
+            st.session_state.recommendation_limit = RECOMMENDATION_PAGE_SIZE
+
+        # Apenas os melhores são pontuados em detalhe e renderizados; mais resultados sob demanda
+        if st.session_state.recommendation_limit:
             # ai_service já instanciado globalmente
             portfolio_items = portfolio_service.load_portfolio() # Carrega a carteira atual
-            recommendations = ai_service.recommend(fiis, budget, min_liq, portfolio_items)
+            limit = st.session_state.recommendation_limit
+            recommendations = ai_service.recommend_top_k(limit, universe, budget, min_liq, portfolio_items)
             
             if recommendations:
-                st.success(f"A IA encontrou {len(recommendations)} oportunidades promissoras.")
+                st.success(f"Exibindo as {len(recommendations)} melhores oportunidades encontradas pela IA.")
                 
                 for rec in recommendations:
                     fii = rec["fii"]
@@ -681,6 +780,10 @@ def main():
                         
                         st.caption(f"Setor: {fii.sector} | Liquidez: R$ {fii.liquidity:,.0f}")
 
+                if len(recommendations) == limit and st.button("⬇️ Carregar mais oportunidades"):
+                    st.session_state.recommendation_limit += RECOMMENDATION_PAGE_SIZE
+                    st.rerun()
+
             else:
                 st.warning("Nenhum FII atendeu aos critérios mínimos de segurança da IA com esse orçamento.")
 
@@ -691,8 +794,8 @@ def main():
         if not portfolio_items:
             st.warning("Você ainda não possui FIIs na carteira para monitorar.")
         else:
-            my_tickers = [item.ticker for item in portfolio_items]
-            my_fiis = [f for f in fiis if f.ticker in my_tickers]
+            my_universe = universe.select(item.ticker for item in portfolio_items)
+            my_fiis = my_universe.to_fiis()
             
             st.info(f"Monitorando {len(my_fiis)} ativos da sua carteira.")
 
@@ -711,13 +814,12 @@ def main():
                 # 2. Análise IA
                 # ai_service já instanciado globalmente
                 ai_risks = []
-                for fii in my_fiis:
-                    analysis = ai_service.analyze_fii(fii, portfolio_items)
-                    if analysis['score'] < 50: # Critério de Risco da IA
-                        ai_risks.append({
-                            "fii": fii,
-                            "analysis": analysis
-                        })
+                batch = ai_service.score_batch(my_universe, portfolio_items)
+                for row in np.flatnonzero(batch.score < 50): # Critério de Risco da IA
+                    ai_risks.append({
+                        "fii": my_universe.fii(row),
+                        "analysis": batch.analysis(row)
+                    })
                 
                 # Exibição dos Resultados
                 st.divider()
@@ -784,7 +886,6 @@ def main():
                 
                 if meta_renda > 0:
                     # Obter dados de mercado atualizados para simulação
-                    market_map = {f.ticker: f for f in fiis}
                     tickers = [item.ticker for item in portfolio_items]
                     
                     with st.spinner("Calculando projeções..."):
@@ -795,7 +896,7 @@ def main():
                         sim_data = []
                         for item in portfolio_items:
                             ticker = item.ticker
-                            market_data = market_map.get(ticker)
+                            market_data = universe.get(ticker)
                             last_div = last_divs.get(ticker, 0.0)
                             price = market_data.price if market_data else 0.0
                             
@@ -851,7 +952,7 @@ def main():
                         
                         for item in portfolio_items:
                             ticker = item.ticker
-                            market_data = market_map.get(ticker)
+                            market_data = universe.get(ticker)
                             last_div = last_divs.get(ticker, 0.0)
                             price = market_data.price if market_data else 0.0
                             
@@ -917,20 +1018,60 @@ def main():
                                 if aporte_mensal > 0:
                                     st.markdown("---")
                                     st.markdown(f"### ⏳ Tempo Estimado (Carteira Atual)")
-                                    patrimonio = valor_total_carteira
-                                    meses = 0
-                                    renda_proj = renda_mensal_atual
-                                    
-                                    # Simulação simples
-                                    while renda_proj < meta_renda and meses < 360:
-                                        patrimonio += aporte_mensal + renda_proj
-                                        renda_proj = patrimonio * yield_medio_mensal
-                                        meses += 1
+                                    meses = projection_service.months_to_goal(valor_total_carteira, aporte_mensal, meta_renda, yield_medio_mensal)
                                     
                                     anos = meses // 12
                                     meses_rest = meses % 12
                                     st.info(f"Mantendo sua carteira atual e aportando **R$ {aporte_mensal:,.2f}** mensalmente, você atingirá a meta em **{anos} anos e {meses_rest} meses**.")
 
+                                    # Sensibilidade: tempo até a meta para vários aportes e metas (grade calculada de uma vez)
+                                    with st.expander("📊 Sensibilidade (Aporte x Meta)"):
+                                        df_grid = projection_service.sensitivity_grid(
+                                            valor_total_carteira,
+                                            [aporte_mensal * f for f in (0.5, 0.75, 1.0, 1.5, 2.0, 3.0)],
+                                            [meta_renda * f for f in (0.5, 0.75, 1.0, 1.5, 2.0)],
+                                            [yield_medio_mensal],
+                                        )
+                                        df_grid['anos'] = df_grid['meses'] / 12
+                                        chart_grid = alt.Chart(df_grid).mark_rect().encode(
+                                            x=alt.X('aporte_mensal:O', title='Aporte Mensal (R$)', axis=alt.Axis(format=',.0f')),
+                                            y=alt.Y('meta_renda:O', title='Meta de Renda (R$)', axis=alt.Axis(format=',.0f'), sort='descending'),
+                                            color=alt.Color('anos:Q', title='Anos', scale=alt.Scale(scheme='redyellowgreen', reverse=True)),
+                                            tooltip=['aporte_mensal', 'meta_renda', 'meses', alt.Tooltip('anos', format='.1f')]
+                                        ).properties(height=300)
+                                        st.altair_chart(chart_grid, use_container_width=True)
+                                        st.caption("Anos até a meta mantendo o yield médio atual da carteira (limite de 30 anos).")
+
+                                    # Monte Carlo: yields mensais sorteados do histórico real de proventos da carteira
+                                    with st.expander("🎲 Simulação Estocástica (Monte Carlo)"):
+                                        df_hist = dividend_service.get_dividend_history(portfolio_items)
+                                        if not df_hist.empty:
+                                            df_hist = df_hist[df_hist['Ticker'].isin([item["ticker"] for item in valid_items])]
+                                        yield_samples = projection_service.yield_samples_from_history(df_hist, valor_total_carteira)
+
+                                        if len(yield_samples) >= 3:
+                                            mc = projection_service.simulate(valor_total_carteira, aporte_mensal, meta_renda, yield_samples, n_paths=10_000, seed=42)
+                                            faixas = mc.percentiles((5, 50, 95))
+                                            col_mc1, col_mc2, col_mc3, col_mc4 = st.columns(4)
+                                            col_mc1.metric("Cenário Otimista (P5)", f"{faixas[5] // 12} anos e {faixas[5] % 12} meses")
+                                            col_mc2.metric("Cenário Mediano (P50)", f"{faixas[50] // 12} anos e {faixas[50] % 12} meses")
+                                            col_mc3.metric("Cenário Pessimista (P95)", f"{faixas[95] // 12} anos e {faixas[95] % 12} meses")
+                                            col_mc4.metric("Chance em 30 anos", f"{mc.probability * 100:.0f}%")
+
+                                            df_bands = mc.income_bands((5, 50, 95))
+                                            base = alt.Chart(df_bands).encode(x=alt.X('mes', title='Meses'))
+                                            chart_bands = (
+                                                base.mark_area(opacity=0.3, color='#4CAF50').encode(
+                                                    y=alt.Y('p5', title='Renda Mensal (R$)'), y2='p95'
+                                                )
+                                                + base.mark_line(color='#4CAF50').encode(y='p50')
+                                                + alt.Chart(pd.DataFrame({'meta': [meta_renda]})).mark_rule(color='#FF5252', strokeDash=[4, 4]).encode(y='meta')
+                                            ).properties(height=300)
+                                            st.altair_chart(chart_bands, use_container_width=True)
+                                            st.caption(f"10.000 cenários sorteando o yield de cada mês entre os {len(yield_samples)} meses do histórico de proventos. Faixa: percentis 5-95; linha: mediana.")
+                                        else:
+                                            st.info("Histórico de proventos insuficiente para a simulação estocástica (mínimo de 3 meses).")
+
                             else:
                                 st.success("🎉 Parabéns! Com o yield atual da sua carteira, sua renda mensal estimada já supera a meta!")
 
@@ -941,8 +1082,8 @@ def main():
                         st.caption("A IA analisa todo o mercado e sugere uma carteira otimizada (Top Picks) para acelerar sua meta.")
                         
                         with st.spinner("🤖 A IA está analisando milhares de dados para montar a melhor estratégia..."):
-                            # fiis já está disponível no escopo (load_data)
-                            recommendation = ai_service.recommend_allocation(fiis, portfolio_items, aporte_mensal, meta_renda)
+                            # universe já está disponível no escopo (load_universe)
+                            recommendation = ai_service.recommend_allocation(universe, portfolio_items, aporte_mensal, meta_renda)
                         
                         if recommendation and recommendation.get('allocation_plan'):
                             # Métricas Principais
@@ -1013,11 +1154,14 @@ def main():
 
             if btn_analise and selected_ticker_viability:
                 # Recuperar dados de mercado do FII selecionado
-                selected_fii_data = next((f for f in fiis if f.ticker == selected_ticker_viability), None)
+                selected_fii_data = universe.get(selected_ticker_viability)
                 
                 if selected_fii_data:
                     with st.spinner(f"A IA está analisando os fundamentos e cenário do {selected_ticker_viability}..."):
-                        viability_result = ai_service.analyze_future_viability(selected_fii_data)
+                        history = get_market_history(data_source).ticker_history(
+                            selected_ticker_viability, start=date.today() - timedelta(days=VIABILITY_HISTORY_DAYS)
+                        )
+                        viability_result = ai_service.analyze_future_viability(selected_fii_data, history)
                     
                     # Exibição dos Resultados
                     risk_score = viability_result['risk_score']
@@ -1062,13 +1206,25 @@ def main():
                             st.markdown("#### ⚠️ Pontos de Atenção Identificados")
                             for alert in viability_result['viability_text']:
                                 st.error(alert)
+
+                        if len(history) >= 2:
+                            st.markdown(f"#### 📅 Evolução dos Indicadores ({VIABILITY_HISTORY_DAYS} dias)")
+                            df_trend = history.reset_index()[['date', 'pvp', 'vacancia']].melt('date', var_name='Indicador', value_name='Valor')
+                            chart_trend = alt.Chart(df_trend).mark_line(point=True).encode(
+                                x=alt.X('date:T', title='Data'),
+                                y=alt.Y('Valor:Q', title=None),
+                                color='Indicador:N',
+                                tooltip=['date:T', 'Indicador', alt.Tooltip('Valor', format='.2f')]
+                            ).properties(height=250).facet(row=alt.Row('Indicador:N', title=None)).resolve_scale(y='independent')
+                            st.altair_chart(chart_trend, use_container_width=True)
                 else:
                     st.error("Dados de mercado não encontrados para este ativo. Verifique se ele consta na fonte de dados.")
 
             st.markdown("---")
 
             with st.spinner("Buscando histórico de dividendos..."):
-                df_divs = dividend_service.get_dividend_history(portfolio_items)
+                # Quantidade efetivamente detida em cada data-com, reconstruída a partir das transações
+                df_divs = dividend_service.get_dividend_history(portfolio_items, portfolio_service.get_journal())
             
             if df_divs.empty:
                 st.warning("Não foi possível carregar o histórico de dividendos. Verifique sua conexão ou tente novamente mais tarde.")
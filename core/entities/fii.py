@@ -3,7 +3,8 @@
 from dataclasses import dataclass
 
 
-@dataclass
+# Imutável: o mesmo snapshot de mercado é compartilhado por referência entre todas as sessões
+@dataclass(frozen=True)
 class FII:
     ticker: str
     price: float
@@ -0,0 +1,136 @@
+from dataclasses import fields
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from core.entities.fii import FII
+
+TEXT_FIELDS = ('ticker', 'sector')
+NUMERIC_FIELDS = ('price', 'dividend_yield', 'pvp', 'liquidity', 'vacancia')
+
+
+class FIIUniverse:
+    """
+    Conjunto de FIIs em formato colunar (um array NumPy por campo), com índices ticker -> linha
+    e setor -> linhas construídos sob demanda e reaproveitados enquanto o universo existir.
+
+    Filtros, ordenações e top-k são feitos direto nos arrays; objetos FII e
+    DataFrames só são criados quando pedidos (to_fiis, get, to_dataframe).
+
+    Somente leitura: os arrays não aceitam escrita e os FII são congelados, então um mesmo universo
+    pode ser compartilhado por referência entre sessões. version identifica o snapshot de origem.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], objects: Optional[List[FII]] = None, version: int = 0):
+        for values in columns.values():
+            values.flags.writeable = False
+        self._columns = columns
+        self.version = version
+        # Objetos FII já existentes (quando criado a partir de uma lista), reaproveitados na conversão
+        self._objects = objects
+        self._index: Optional[Dict[str, int]] = None
+        self._sector_index: Optional[Dict[str, np.ndarray]] = None
+        self._dataframe: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_fiis(cls, fiis: Sequence[FII], version: int = 0) -> "FIIUniverse":
+        columns = {field: np.array([getattr(f, field) for f in fiis], dtype=object) for field in TEXT_FIELDS}
+        for field in NUMERIC_FIELDS:
+            columns[field] = np.array([getattr(f, field) for f in fiis], dtype=float)
+        return cls(columns, list(fiis), version)
+
+    def __len__(self) -> int:
+        return len(self._columns['ticker'])
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self._columns[field]
+
+    def __iter__(self) -> Iterator[FII]:
+        return iter(self.to_fiis())
+
+    @property
+    def index(self) -> Dict[str, int]:
+        if self._index is None:
+            self._index = {ticker: row for row, ticker in enumerate(self._columns['ticker'])}
+        return self._index
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.index
+
+    @property
+    def sector_index(self) -> Dict[str, np.ndarray]:
+        """Setor -> linhas (em ordem crescente) dos FIIs daquele setor."""
+        if self._sector_index is None:
+            sectors, inverse = np.unique(self._columns['sector'].astype(str), return_inverse=True)
+            order = np.argsort(inverse, kind='stable')
+            groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(sectors)))[:-1])
+            self._sector_index = dict(zip(sectors.tolist(), groups))
+        return self._sector_index
+
+    def rows(self, tickers: Iterable[str]) -> np.ndarray:
+        """Linhas (em ordem crescente) dos tickers presentes no universo; os ausentes são ignorados."""
+        index = self.index
+        return np.array(sorted({index[t] for t in tickers if t in index}), dtype=int)
+
+    def select(self, tickers: Iterable[str]) -> "FIIUniverse":
+        """Subconjunto com os tickers informados, na ordem do universo."""
+        return self.take(self.rows(tickers))
+
+    def by_sector(self, sector: str) -> "FIIUniverse":
+        return self.take(self.sector_index.get(sector, np.array([], dtype=int)))
+
+    def sectors_of(self, tickers: Iterable[str]) -> Set[str]:
+        return set(self._columns['sector'][self.rows(tickers)].tolist())
+
+    def fii(self, row: int) -> FII:
+        if self._objects is not None:
+            return self._objects[row]
+        return FII(**{field: self._scalar(field, row) for field in TEXT_FIELDS + NUMERIC_FIELDS})
+
+    def get(self, ticker: str) -> Optional[FII]:
+        row = self.index.get(ticker)
+        return self.fii(row) if row is not None else None
+
+    def take(self, rows: np.ndarray) -> "FIIUniverse":
+        columns = {field: values[rows] for field, values in self._columns.items()}
+        objects = [self._objects[row] for row in rows] if self._objects is not None else None
+        return FIIUniverse(columns, objects, self.version)
+
+    def filter(self, mask: np.ndarray) -> "FIIUniverse":
+        return self.take(np.flatnonzero(mask))
+
+    def sort_by(self, field: str, descending: bool = False) -> "FIIUniverse":
+        """Ordenação estável por um campo numérico (empates mantêm a ordem original)."""
+        values = self._columns[field]
+        return self.take(np.argsort(-values if descending else values, kind='stable'))
+
+    def top_k(self, field: str, k: int, descending: bool = True) -> "FIIUniverse":
+        """Equivale a sort_by(field, descending)[:k], sem ordenar o conjunto inteiro."""
+        values = -self._columns[field] if descending else self._columns[field]
+        if k <= 0:
+            return self.take(np.array([], dtype=int))
+        if k >= len(values):
+            return self.sort_by(field, descending)
+        # Candidatos: todos com valor até o k-ésimo (inclui empates na fronteira).
+        # NaN entra como +inf na seleção, ficando no fim como no argsort de sort_by
+        keys = np.where(np.isnan(values), np.inf, values)
+        threshold = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= threshold)
+        order = np.argsort(values[candidates], kind='stable')[:k]
+        return self.take(candidates[order])
+
+    def to_fiis(self) -> List[FII]:
+        if self._objects is None:
+            self._objects = [self.fii(row) for row in range(len(self))]
+        return list(self._objects)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        # Montado uma vez; cada chamada recebe uma cópia rasa (copy-on-write), sem copiar os dados
+        if self._dataframe is None:
+            self._dataframe = pd.DataFrame({field.name: self._columns[field.name] for field in fields(FII)})
+        return self._dataframe.copy(deep=False)
+
+    def _scalar(self, field: str, row: int):
+        value = self._columns[field][row]
+        return float(value) if field in NUMERIC_FIELDS else value
@@ -6,7 +6,7 @@ class Transaction:
     ticker: str
     quantity: int
     price: float
-    type: str  # 'BUY' or 'SELL'
+    type: str  # 'BUY' or 'SELL' ('REMOVE'/'CLEAR' only in the journal, see core.use_cases.portfolio)
 
 @dataclass
 class PortfolioItem:
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List
+from contextlib import nullcontext
+from typing import ContextManager, Dict, Hashable, Iterable, Iterator, List, Optional
 from core.entities.portfolio import PortfolioItem, Transaction
+from core.use_cases.portfolio import group_by_ticker
 
 class PortfolioRepositoryInterface(ABC):
     @abstractmethod
@@ -18,3 +20,38 @@ class PortfolioRepositoryInterface(ABC):
     @abstractmethod
     def add_transaction(self, user_id: str, transaction: Transaction):
         pass
+
+    def iter_journal(self, user_id: str) -> Iterator[Transaction]:
+        """Todos os eventos do usuário na ordem de gravação, incluindo REMOVE/CLEAR."""
+        raise NotImplementedError
+
+    def add_transactions(self, user_id: str, transactions: Iterable[Transaction]):
+        """Grava vários eventos no journal. Implementações devem fazê-lo em uma única escrita."""
+        for transaction in transactions:
+            self.add_transaction(user_id, transaction)
+
+    def get_transactions_by_ticker(self, user_id: str) -> Dict[str, List[Transaction]]:
+        """
+        Operações do usuário agrupadas por ticker (data decrescente), obtidas com uma única leitura.
+        Implementações podem manter um índice e só reconstruí-lo quando os dados mudarem.
+        """
+        return group_by_ticker(self.get_transactions(user_id))
+
+    def portfolio_version(self, user_id: str) -> Optional[Hashable]:
+        """
+        Identificador barato (sem reler os dados) que muda sempre que a carteira do usuário muda.
+        None indica que a implementação não sabe detectar mudanças externas.
+        """
+        return None
+
+    def lock(self, user_id: str) -> ContextManager:
+        """
+        Serializa leitura-modificação-escrita da carteira de um usuário (entre threads e processos).
+        Implementações sem concorrência podem manter o padrão, que não bloqueia nada.
+        """
+        return nullcontext()
+
+    @abstractmethod
+    def list_users(self) -> List[str]:
+        """Usuários com carteira ou transações gravadas (usado em tarefas que percorrem todas as carteiras)."""
+        pass
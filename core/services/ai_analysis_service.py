@@ -1,8 +1,109 @@
-from typing import List, Dict, Any, Optional
+import heapq
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
 from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
 from core.entities.portfolio import PortfolioItem
+from core.services.projection_service import ProjectionService
+
+# Regras do Smart Score em forma de tabela (pontos, motivo), na mesma ordem dos if/elif de analyze_fii
+PVP_RULES = [
+    (30, "Preço justo ou descontado (Bom P/VP)."),
+    (20, "Muito descontado, mas atenção ao risco."),
+    (15, "Leve ágio, aceitável para fundos de tijolo premium."),
+    (0, "Preço descolado do valor patrimonial (Risco)."),
+]
+DY_RULES = [
+    (30, "Yield excelente e sustentável."),
+    (20, "Yield conservador."),
+    (15, "Yield suspeitamente alto (Risco de não recorrência)."),
+    (5, "Yield baixo para a renda variável."),
+]
+LIQUIDITY_RULES = [
+    (20, "Altíssima liquidez."),
+    (15, "Liquidez adequada para investidor varejo."),
+    (5, "Baixa liquidez (dificuldade de saída)."),
+]
+VACANCIA_RULES = [
+    (20, "Vacância controlada (Ocupação alta)."),
+    (10, "Vacância moderada, exige monitoramento."),
+    (0, "Vacância alta (Imóveis vagos pressionam custos)."),
+]
+SENTIMENTS = [
+    "Altamente Recomendado (Compra Forte)",
+    "Recomendado (Compra)",
+    "Observação (Neutro)",
+    "Não Recomendado (Venda/Evitar)",
+]
+PORTFOLIO_REASON = "Já está na sua carteira (Oportunidade de aumentar posição)."
+DIVERSIFICATION_TEXT = " **Bônus de Diversificação:** Setor ainda não presente na sua carteira."
+
+# Tags como bitmask
+TAG_AUMENTAR_POSICAO = 1
+TAG_DIVERSIFICACAO = 2
+TAG_LABELS = [
+    (TAG_AUMENTAR_POSICAO, "Aumentar Posição"),
+    (TAG_DIVERSIFICACAO, "Diversificação (Novo Setor)"),
+]
+
+# Limiares de tendência em analyze_future_viability (variação no período do histórico)
+VACANCIA_TREND_ALERT = 5.0  # pontos percentuais
+PVP_TREND_ALERT = 0.10  # queda relativa do P/VP
+
+
+@dataclass
+class SmartScoreBatch:
+    """
+    Resultado do Smart Score para um FIIUniverse inteiro, em arrays alinhados às linhas do universo.
+    O texto da análise só é montado em analysis(row), para os fundos efetivamente exibidos.
+    """
+    universe: FIIUniverse
+    score: np.ndarray
+    base_score: np.ndarray  # Score usado no texto/sentimento (antes de bônus aplicados depois, ex: diversificação)
+    sentiment: np.ndarray  # Índice em SENTIMENTS
+    tags: np.ndarray  # Bitmask TAG_*
+    in_portfolio: np.ndarray
+    pvp_rule: np.ndarray
+    dy_rule: np.ndarray
+    liquidity_rule: np.ndarray
+    vacancia_rule: np.ndarray
+
+    def analysis(self, row: int) -> Dict[str, Any]:
+        """Mesmo dicionário retornado por analyze_fii (mais eventuais bônus de recommend)."""
+        reasons = [
+            PVP_RULES[self.pvp_rule[row]][1],
+            DY_RULES[self.dy_rule[row]][1],
+            LIQUIDITY_RULES[self.liquidity_rule[row]][1],
+            VACANCIA_RULES[self.vacancia_rule[row]][1],
+        ]
+        if self.tags[row] & TAG_AUMENTAR_POSICAO:
+            reasons.append(PORTFOLIO_REASON)
+
+        sentiment = SENTIMENTS[self.sentiment[row]]
+        analysis_text = f"🤖 **Análise Inteligente:** O fundo apresenta um score de **{int(self.base_score[row])}/100** ({sentiment}). "
+        analysis_text += " ".join(reasons)
+        if self.tags[row] & TAG_DIVERSIFICACAO:
+            analysis_text += DIVERSIFICATION_TEXT
+
+        return {
+            "score": int(self.score[row]),
+            "sentiment": sentiment,
+            "analysis_text": analysis_text,
+            "details": reasons,
+            "tags": [label for bit, label in TAG_LABELS if self.tags[row] & bit],
+            "in_portfolio": bool(self.in_portfolio[row])
+        }
+
 
 class SmartAnalysisService:
+    def __init__(self, projection_service: Optional[ProjectionService] = None):
+        self.projection_service = projection_service or ProjectionService()
+
     def analyze_fii(self, fii: FII, portfolio_items: Optional[List[PortfolioItem]] = None) -> Dict[str, Any]:
         """
         Calcula um 'Smart Score' (0-100) e gera uma análise em texto usando heurísticas avançadas.
@@ -106,28 +207,73 @@ class SmartAnalysisService:
             "in_portfolio": in_portfolio
         }
 
-    def recommend_allocation(self, all_fiis: List[FII], current_portfolio: List[PortfolioItem], monthly_contribution: float, target_income: float) -> Dict[str, Any]:
+    def score_batch(self, fiis: Union[List[FII], FIIUniverse], portfolio_items: Optional[List[PortfolioItem]] = None) -> SmartScoreBatch:
+        """
+        Versão vetorizada de analyze_fii: calcula score, sentimento e tags de todos os FIIs em uma passada.
+        """
+        universe = fiis if isinstance(fiis, FIIUniverse) else FIIUniverse.from_fiis(fiis)
+        pvp = universe['pvp']
+        dy = universe['dividend_yield']
+        liquidity = universe['liquidity']
+        vacancia = universe['vacancia']
+
+        # Índice da regra aplicada em cada critério (np.select respeita a ordem do if/elif)
+        pvp_rule = np.select(
+            [(pvp >= 0.8) & (pvp <= 1.05), (pvp >= 0.7) & (pvp < 0.8), (pvp > 1.05) & (pvp <= 1.2)], [0, 1, 2], default=3
+        )
+        dy_rule = np.select([(dy >= 9.0) & (dy <= 16.0), (dy >= 6.0) & (dy < 9.0), dy > 16.0], [0, 1, 2], default=3)
+        liquidity_rule = np.select([liquidity > 1_000_000, liquidity > 200_000], [0, 1], default=2)
+        vacancia_rule = np.select([vacancia <= 5.0, (vacancia > 5.0) & (vacancia <= 15.0)], [0, 1], default=2)
+
+        def points(rules, rule_index):
+            return np.array([p for p, _ in rules])[rule_index]
+
+        score = (
+            points(PVP_RULES, pvp_rule) + points(DY_RULES, dy_rule)
+            + points(LIQUIDITY_RULES, liquidity_rule) + points(VACANCIA_RULES, vacancia_rule)
+        )
+
+        portfolio_tickers = [item.ticker for item in portfolio_items] if portfolio_items else []
+        in_portfolio = np.isin(universe['ticker'], portfolio_tickers)
+
+        # Bônus de carteira: reforço de posição vencedora
+        boosted = in_portfolio & (score >= 60)
+        score = np.where(boosted, np.minimum(score + 10, 100), score)
+        tags = np.where(boosted, TAG_AUMENTAR_POSICAO, 0)
+
+        sentiment = np.select([score >= 80, score >= 60, score >= 40], [0, 1, 2], default=3)
+
+        return SmartScoreBatch(
+            universe=universe,
+            score=score,
+            base_score=score.copy(),
+            sentiment=sentiment,
+            tags=tags,
+            in_portfolio=in_portfolio,
+            pvp_rule=pvp_rule,
+            dy_rule=dy_rule,
+            liquidity_rule=liquidity_rule,
+            vacancia_rule=vacancia_rule,
+        )
+
+    def recommend_allocation(self, all_fiis: Union[List[FII], FIIUniverse], current_portfolio: List[PortfolioItem], monthly_contribution: float, target_income: float) -> Dict[str, Any]:
         """
         Gera uma recomendação de alocação de ativos baseada em score e diversificação.
         Retorna uma carteira sugerida e projeções.
         """
-        # 1. Avaliar todos os FIIs disponíveis
-        scored_fiis = []
-        for fii in all_fiis:
-            analysis = self.analyze_fii(fii, current_portfolio)
-            scored_fiis.append({
-                'fii': fii,
-                'score': analysis['score'],
-                'analysis': analysis
-            })
+        universe = all_fiis if isinstance(all_fiis, FIIUniverse) else FIIUniverse.from_fiis(all_fiis)
+
+        # 1. Avaliar todos os FIIs disponíveis (score vetorizado)
+        batch = self.score_batch(universe, current_portfolio)
         
         # 2. Filtrar apenas os "Bons" (Score >= 60) e Ordenar
         # Prioriza Score alto, depois Yield, depois Liquidez
-        best_fiis = sorted(
-            [item for item in scored_fiis if item['score'] >= 60],
-            key=lambda x: (x['score'], x['fii'].dividend_yield),
-            reverse=True
-        )
+        good_rows = np.flatnonzero(batch.score >= 60)
+        order = np.lexsort((-universe['dividend_yield'][good_rows], -batch.score[good_rows]))
+        best_fiis = [
+            {'fii': universe.fii(row), 'score': int(batch.score[row]), 'row': row}
+            for row in good_rows[order]
+        ]
 
         # 3. Seleção Inteligente (Top Picks diversificados)
         # Tenta pegar top 10, garantindo max 2 por setor se possível
@@ -141,6 +287,7 @@ class SmartAnalysisService:
             if fii.ticker in current_tickers:
                 selected_allocation.append(item)
                 sectors_count[fii.sector] = sectors_count.get(fii.sector, 0) + 1
+        selected_tickers = {item['fii'].ticker for item in selected_allocation}
         
         # Depois preenche com novas oportunidades até completar ex: 10 ativos
         target_size = max(10, len(selected_allocation) + 5)
@@ -151,12 +298,13 @@ class SmartAnalysisService:
             
             fii = item['fii']
             # Se já pegamos, pula
-            if any(s['fii'].ticker == fii.ticker for s in selected_allocation):
+            if fii.ticker in selected_tickers:
                 continue
                 
             # Controle de diversificação (max 3 por setor na sugestão)
             if sectors_count.get(fii.sector, 0) < 3:
                 selected_allocation.append(item)
+                selected_tickers.add(fii.ticker)
                 sectors_count[fii.sector] = sectors_count.get(fii.sector, 0) + 1
         
         # 4. Cálculo de Pesos (Alocação)
@@ -182,7 +330,7 @@ class SmartAnalysisService:
                 'weight': weight,
                 'score': item['score'],
                 'dy_anual': fii.dividend_yield,
-                'reason': item['analysis']['analysis_text']
+                'reason': batch.analysis(item['row'])['analysis_text']
             })
 
         # 5. Projeção Temporal (Juros Compostos)
@@ -193,32 +341,14 @@ class SmartAnalysisService:
         current_equity = 0
         for p_item in current_portfolio:
             # Tenta achar preço atual na lista de all_fiis, senão usa medio
-            fii_data = next((f for f in all_fiis if f.ticker == p_item.ticker), None)
+            fii_data = universe.get(p_item.ticker)
             price = fii_data.price if fii_data else p_item.average_price
             current_equity += p_item.quantity * price
 
-        months_to_goal = 0
-        projected_equity = current_equity
-        current_monthly_income = projected_equity * avg_yield_monthly
-        
-        projection_data = []
-        
-        # Simulação mês a mês (limite 30 anos = 360 meses para evitar loop infinito)
-        while current_monthly_income < target_income and months_to_goal < 360:
-            months_to_goal += 1
-            # Renda é reinvestida + Aporte novo
-            investment = current_monthly_income + monthly_contribution
-            projected_equity += investment
-            
-            # Atualiza renda baseada no novo patrimonio
-            current_monthly_income = projected_equity * avg_yield_monthly
-            
-            if months_to_goal % 6 == 0: # Grava a cada 6 meses para grafico
-                projection_data.append({
-                    'mes': months_to_goal,
-                    'renda': current_monthly_income,
-                    'patrimonio': projected_equity
-                })
+        # Forma fechada da simulação mês a mês (limite 30 anos = 360 meses)
+        months_to_goal = self.projection_service.months_to_goal(current_equity, monthly_contribution, target_income, avg_yield_monthly)
+        projected_equity = float(self.projection_service.equity_after(months_to_goal, current_equity, monthly_contribution, avg_yield_monthly))
+        projection_data = self.projection_service.projection(current_equity, monthly_contribution, avg_yield_monthly, months_to_goal)
 
         return {
             'allocation_plan': allocation_plan,
@@ -229,10 +359,12 @@ class SmartAnalysisService:
             'current_equity': current_equity
         }
 
-    def analyze_future_viability(self, fii: FII) -> Dict[str, Any]:
+    def analyze_future_viability(self, fii: FII, history: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Gera uma análise preditiva sobre a viabilidade futura do FII e sua gestão,
         focando em riscos de liquidação e sustentabilidade do negócio.
+        history (opcional): snapshots diários do FII (colunas pvp, vacancia, dividend_yield, ordenados por data),
+        usados para avaliar tendências em vez de um único ponto no tempo.
         """
         risk_score = 0 # 0 (Seguro) a 100 (Risco Crítico)
         viability_text = []
@@ -264,6 +396,18 @@ class SmartAnalysisService:
         else:
             management_outlook = "Gestão Estável: A vacância está dentro dos padrões aceitáveis de mercado, indicando uma administração competente."
 
+        # 2.1 Tendências (quando há histórico de snapshots)
+        trend = self._indicator_trend(history)
+        if trend:
+            if trend['vacancia'] >= VACANCIA_TREND_ALERT:
+                risk_score += 10
+                viability_text.append(f"📈 **Vacância em Alta:** A vacância subiu {trend['vacancia']:.1f} p.p. em {trend['days']} dias. Se a tendência persistir, a renda distribuída tende a cair.")
+            elif trend['vacancia'] <= -VACANCIA_TREND_ALERT:
+                management_outlook += f" A vacância caiu {-trend['vacancia']:.1f} p.p. em {trend['days']} dias, sinal de boa execução comercial."
+            if trend['pvp'] <= -PVP_TREND_ALERT:
+                risk_score += 10
+                viability_text.append(f"🔻 **Desconto Crescente:** O P/VP caiu {-trend['pvp'] * 100:.0f}% em {trend['days']} dias. O mercado está perdendo confiança no ativo.")
+
         # 3. Perspectivas Setoriais (Cenários de Curto/Médio Prazo)
         # Baseado em conhecimento de mercado embutido
         sector = fii.sector.lower() if fii.sector else ""
@@ -297,38 +441,54 @@ class SmartAnalysisService:
             "conclusion": conclusion
         }
 
-    def recommend(self, fiis: List[FII], budget: float, min_liquidity: float = 0, portfolio_items: List[PortfolioItem] = []) -> List[Dict[str, Any]]:
-        recommendations = []
-        
+    def _indicator_trend(self, history: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+        """Variação entre o primeiro e o último snapshot: vacância em p.p., P/VP em % (None sem histórico suficiente)."""
+        if history is None or len(history) < 2:
+            return None
+        first, last = history.iloc[0], history.iloc[-1]
+        dates = pd.to_datetime(history.index if 'date' not in history else history['date'])
+        return {
+            'days': int((dates.max() - dates.min()).days),
+            'vacancia': float(last['vacancia'] - first['vacancia']),
+            'pvp': float(last['pvp'] / first['pvp'] - 1) if first['pvp'] > 0 else 0.0,
+        }
+
+    def _score_candidates(self, fiis: Union[List[FII], FIIUniverse], budget: float, min_liquidity: float, portfolio_items: List[PortfolioItem]) -> Tuple[FIIUniverse, SmartScoreBatch]:
+        """Filtros hard + Smart Score vetorizado + bônus de diversificação, sem materializar nenhum FII."""
         # Mapear setores já existentes na carteira para sugerir diversificação
         portfolio_tickers = {item.ticker for item in portfolio_items}
-        portfolio_sectors = set()
         
-        # Criar mapa rápido de FIIs do mercado para descobrir setores da carteira
-        market_map = {f.ticker: f for f in fiis}
+        # Índice ticker -> linha do universo para descobrir setores da carteira
+        universe = fiis if isinstance(fiis, FIIUniverse) else FIIUniverse.from_fiis(fiis)
+        portfolio_sectors = universe.sectors_of(portfolio_tickers)
         
-        for ticker in portfolio_tickers:
-            if ticker in market_map:
-                portfolio_sectors.add(market_map[ticker].sector)
+        # Filtros Hard (vetorizados, antes de materializar qualquer FII)
+        candidates = universe.filter((universe['price'] <= budget) & (universe['liquidity'] >= min_liquidity))
+        batch = self.score_batch(candidates, portfolio_items)
         
-        for fii in fiis:
-            # Filtros Hard
-            if fii.price <= budget and fii.liquidity >= min_liquidity:
-                # Passamos items da carteira para análise individual
-                analysis = self.analyze_fii(fii, portfolio_items)
-                
-                # Lógica de Diversificação (Se o setor não está na carteira, dá um boost pequeno)
-                if fii.sector and fii.sector not in portfolio_sectors and analysis["score"] >= 60:
-                     analysis["score"] += 5
-                     analysis["score"] = min(analysis["score"], 100)
-                     analysis["tags"].append("Diversificação (Novo Setor)")
-                     analysis["analysis_text"] += " **Bônus de Diversificação:** Setor ainda não presente na sua carteira."
-
-                if analysis["score"] >= 60:
-                    recommendations.append({
-                        "fii": fii,
-                        **analysis
-                    })
+        # Lógica de Diversificação (Se o setor não está na carteira, dá um boost pequeno)
+        sectors = candidates['sector']
+        new_sector = (sectors != "") & ~np.isin(sectors, list(portfolio_sectors)) & (batch.score >= 60)
+        batch.score = np.where(new_sector, np.minimum(batch.score + 5, 100), batch.score)
+        batch.tags = batch.tags | np.where(new_sector, TAG_DIVERSIFICACAO, 0)
+        return candidates, batch
+
+    def _ranked_rows(self, candidates: FIIUniverse, batch: SmartScoreBatch) -> Iterator[Tuple[Tuple[int, bool, float], int]]:
+        """Gera (chave de ordenação, linha) de cada recomendado (score >= 60), sob demanda."""
+        dividend_yield = candidates['dividend_yield']
+        for row in np.flatnonzero(batch.score >= 60):
+            yield (int(batch.score[row]), bool(batch.in_portfolio[row]), float(dividend_yield[row])), row
+
+    def recommend(self, fiis: Union[List[FII], FIIUniverse], budget: float, min_liquidity: float = 0, portfolio_items: List[PortfolioItem] = []) -> List[Dict[str, Any]]:
+        recommendations = []
+        candidates, batch = self._score_candidates(fiis, budget, min_liquidity, portfolio_items)
+        
+        # Texto da análise só para os recomendados
+        for row in np.flatnonzero(batch.score >= 60):
+            recommendations.append({
+                "fii": candidates.fii(row),
+                **batch.analysis(row)
+            })
         
         # Ordenar:
         # 1. Score total (decrescente)
@@ -343,3 +503,15 @@ class SmartAnalysisService:
         ), reverse=True)
         
         return recommendations
+
+    def recommend_top_k(self, k: int, fiis: Union[List[FII], FIIUniverse], budget: float, min_liquidity: float = 0, portfolio_items: List[PortfolioItem] = []) -> List[Dict[str, Any]]:
+        """
+        Mesmo resultado de recommend(...)[:k], mantendo apenas os k melhores em um heap
+        e gerando o texto da análise só para eles.
+        """
+        if k <= 0:
+            return []
+        candidates, batch = self._score_candidates(fiis, budget, min_liquidity, portfolio_items)
+        # nlargest é estável: empates completos mantêm a ordem original, como o sort de recommend
+        best = heapq.nlargest(k, self._ranked_rows(candidates, batch), key=itemgetter(0))
+        return [{"fii": candidates.fii(row), **batch.analysis(row)} for _, row in best]
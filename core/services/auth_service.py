@@ -3,6 +3,8 @@ import os
 import hashlib
 import sys
 
+from core.utils.file_store import FileLock, atomic_write_json
+
 class AuthService:
     def __init__(self):
         # Determina o diretório base para salvar os arquivos
@@ -12,14 +14,18 @@ class AuthService:
             self.base_path = os.getcwd()
             
         self.USERS_FILE = os.path.join(self.base_path, "users.json")
+        # Serializa alterações em users.json entre sessões e processos
+        self._lock = FileLock(self.USERS_FILE + ".lock")
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
-        if not os.path.exists(self.USERS_FILE):
-            with open(self.USERS_FILE, 'w') as f:
+        if os.path.exists(self.USERS_FILE):
+            return
+        with self._lock:
+            if not os.path.exists(self.USERS_FILE):
                 # Cria usuário padrão admin/admin
                 default_users = {"admin": self._hash_password("admin")}
-                json.dump(default_users, f)
+                atomic_write_json(self.USERS_FILE, default_users)
 
     def _hash_password(self, password):
         return hashlib.sha256(password.encode()).hexdigest()
@@ -36,17 +42,18 @@ class AuthService:
             return False
 
     def register(self, username, password):
-        try:
-            with open(self.USERS_FILE, 'r') as f:
-                users = json.load(f)
-        except:
-            users = {}
-        
-        if username in users:
-            return False
+        with self._lock:
+            try:
+                with open(self.USERS_FILE, 'r') as f:
+                    users = json.load(f)
+            except:
+                users = {}
+            
+            if username in users:
+                return False
+                
+            users[username] = self._hash_password(password)
             
-        users[username] = self._hash_password(password)
-        
-        with open(self.USERS_FILE, 'w') as f:
-            json.dump(users, f)
+            # Escrita atômica: uma falha no meio não deixa users.json truncado
+            atomic_write_json(self.USERS_FILE, users)
         return True
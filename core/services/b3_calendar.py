@@ -0,0 +1,78 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Optional
+from zoneinfo import ZoneInfo
+
+B3_TIMEZONE = ZoneInfo("America/Sao_Paulo")
+# Pregão regular (sem pré-abertura/after-market), horário de Brasília
+SESSION_OPEN = time(10, 0)
+SESSION_CLOSE = time(18, 0)
+
+# Feriados nacionais de data fixa em que a B3 não abre (mês, dia); 24/12 e 31/12 também sem pregão
+FIXED_HOLIDAYS = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 24), (12, 25), (12, 31)]
+
+
+def easter(year: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=None)
+def b3_holidays(year: int) -> FrozenSet[date]:
+    holidays = {date(year, month, day) for month, day in FIXED_HOLIDAYS}
+    if year < 2024:
+        # Consciência Negra passou a ser feriado nacional em 2024
+        holidays.discard(date(year, 11, 20))
+    sunday = easter(year)
+    # Carnaval (segunda e terça), Sexta-feira Santa e Corpus Christi
+    holidays.update(sunday + timedelta(days=offset) for offset in (-48, -47, -2, 60))
+    return frozenset(holidays)
+
+
+class B3Calendar:
+    """Dias e horários de pregão da B3 (fuso de Brasília)."""
+
+    def __init__(self, session_open: time = SESSION_OPEN, session_close: time = SESSION_CLOSE):
+        self.session_open = session_open
+        self.session_close = session_close
+
+    def now(self) -> datetime:
+        return datetime.now(B3_TIMEZONE)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in b3_holidays(day.year)
+
+    def is_open(self, moment: Optional[datetime] = None) -> bool:
+        moment = self._local(moment)
+        return self.is_trading_day(moment.date()) and self.session_open <= moment.time() < self.session_close
+
+    def session_close_at(self, moment: Optional[datetime] = None) -> datetime:
+        moment = self._local(moment)
+        return datetime.combine(moment.date(), self.session_close, tzinfo=B3_TIMEZONE)
+
+    def next_open(self, moment: Optional[datetime] = None) -> datetime:
+        """Próxima abertura de pregão estritamente depois de moment."""
+        moment = self._local(moment)
+        day = moment.date()
+        if moment.time() >= self.session_open:
+            day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return datetime.combine(day, self.session_open, tzinfo=B3_TIMEZONE)
+
+    def _local(self, moment: Optional[datetime]) -> datetime:
+        if moment is None:
+            return self.now()
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=B3_TIMEZONE)
+        return moment.astimezone(B3_TIMEZONE)
@@ -1,73 +1,247 @@
+import logging
+import threading
+import time
 import yfinance as yf
 import pandas as pd
-import streamlit as st
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
+
+def transactions_frame(transactions: List[Any]) -> pd.DataFrame:
+    """
+    Converts the transaction journal into a frame of position changes sorted by date.
+    Delta is +quantity for BUY and -quantity for SELL; REMOVE/CLEAR rows reset the position.
+    """
+    df = pd.DataFrame({
+        'Date': pd.to_datetime([t.date for t in transactions], format='ISO8601'),
+        'Ticker': [t.ticker for t in transactions],
+        'Quantity': [t.quantity for t in transactions],
+        'Type': [t.type for t in transactions],
+    })
+    if df['Date'].dt.tz is not None:
+        df['Date'] = df['Date'].dt.tz_convert(None)
+    df['Delta'] = df['Quantity'].where(df['Type'] == 'BUY', 0) - df['Quantity'].where(df['Type'] == 'SELL', 0)
+    # Estável: eventos com a mesma data mantêm a ordem de gravação do journal
+    return df.sort_values('Date', kind='stable', ignore_index=True)
+
+
+def held_quantities(dividends: pd.DataFrame, events: pd.DataFrame) -> pd.Series:
+    """
+    Quantity of each ticker held when each dividend in `dividends` (Date, Ticker) was earned.
+    Only trades strictly before the ex-date count. Positions are cumulative sums of Delta per
+    ticker, restarted after each REMOVE of that ticker or CLEAR of the whole portfolio, and
+    matched to the ex-dates with merge_asof, so there is no Python loop over events.
+    Returns a Series aligned with `dividends.index`.
+    """
+    if dividends.empty or events.empty:
+        return pd.Series(0, index=dividends.index, dtype='int64')
+
+    clears = events.loc[events['Type'] == 'CLEAR', ['Date']]
+    trades = events[events['Type'] != 'CLEAR'].copy()
+    trades['Segment'] = (trades['Type'] == 'REMOVE').astype(int).groupby(trades['Ticker']).cumsum()
+    trades['Generation'] = (events['Type'] == 'CLEAR').cumsum()[trades.index]
+    # Vendas inconsistentes são ignoradas na reconstrução; aqui a posição apenas não fica negativa
+    trades['Held'] = trades.groupby(['Ticker', 'Generation', 'Segment'])['Delta'].cumsum().clip(lower=0)
+
+    left = dividends[['Date', 'Ticker']].assign(Row=range(len(dividends))).sort_values('Date', kind='stable')
+    right = trades[['Date', 'Ticker', 'Held']].rename(columns={'Date': 'TradeDate'})
+    matched = pd.merge_asof(
+        left, right, left_on='Date', right_on='TradeDate', by='Ticker',
+        direction='backward', allow_exact_matches=False,
+    )
+    if not clears.empty:
+        last_clear = pd.merge_asof(
+            left[['Date']], clears.rename(columns={'Date': 'ClearDate'}), left_on='Date', right_on='ClearDate',
+            direction='backward', allow_exact_matches=False,
+        )['ClearDate']
+        # Uma limpeza da carteira posterior à última operação do ticker zera a posição
+        matched.loc[last_clear.to_numpy() > matched['TradeDate'].to_numpy(), 'Held'] = 0
+
+    held = matched.sort_values('Row')['Held'].fillna(0).astype('int64')
+    return pd.Series(held.to_numpy(), index=dividends.index)
+
 
 class DividendService:
-    def __init__(self):
-        pass
+    def __init__(self, max_workers: int = 8, timeout: float = 15.0, store=None, refresh_interval: timedelta = timedelta(hours=12),
+                 cache_ttl: timedelta = timedelta(hours=1)):
+        # Tamanho máximo do pool de threads e tempo limite (s) de cada chamada a fetch_dividends
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # Armazenamento persistente opcional (ex: SqliteDividendRepository)
+        self.store = store
+        self.refresh_interval = refresh_interval
+        # Cache em memória por ticker, compartilhado entre usuários; nunca mais velho que o próprio store
+        self.cache_ttl = min(cache_ttl, refresh_interval)
+        self._cache: Dict[str, Tuple[float, pd.Series]] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _download_dividends(self, ticker: str, since: Optional[pd.Timestamp] = None) -> pd.Series:
+        stock = yf.Ticker(f"{ticker}.SA")
+        if since is None:
+            divs = stock.dividends
+        else:
+            # Busca incremental: apenas eventos a partir da data informada
+            history = stock.history(start=since.strftime('%Y-%m-%d'), actions=True, auto_adjust=False)
+            divs = history['Dividends'] if 'Dividends' in history else pd.Series(dtype=float)
+            divs = divs[divs > 0]
+        if divs.index.tz is not None:
+            # Convert to naive to simplify comparison
+            divs.index = divs.index.tz_localize(None)
+        return divs
+
+    def _fetch_ticker_dividends(self, ticker: str) -> pd.Series:
+        if self.store is None:
+            return self._download_dividends(ticker)
+
+        if not self.store.is_stale(ticker, self.refresh_interval):
+            return self.store.load(ticker)
+
+        last_date = self.store.get_last_date(ticker)
+        since = last_date + timedelta(days=1) if last_date is not None else None
+        self.store.save(ticker, self._download_dividends(ticker, since))
+        return self.store.load(ticker)
+
+    def _cached(self, ticker: str) -> Optional[pd.Series]:
+        entry = self._cache.get(ticker)
+        if entry is not None and time.monotonic() - entry[0] < self.cache_ttl.total_seconds():
+            return entry[1]
+        return None
+
+    def _run_fetch(self, ticker: str, future: Future):
+        """
+        Leader of a single-flight fetch: downloads one ticker and publishes the result (or error)
+        to every caller waiting on the shared future.
+        """
+        try:
+            divs = self._fetch_ticker_dividends(ticker)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(ticker, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._cache[ticker] = (time.monotonic(), divs)
+            self._in_flight.pop(ticker, None)
+        future.set_result(divs)
+
+    def _abandon(self, ticker: str, future: Future):
+        # O download nunca começou: libera o single-flight para que a próxima chamada tente de novo
+        with self._lock:
+            if self._in_flight.get(ticker) is future:
+                del self._in_flight[ticker]
+        future.set_exception(TimeoutError(f"Timeout após {self.timeout:.0f}s"))
+
+    def fetch_dividends(self, tickers: List[str]) -> Tuple[Dict[str, pd.Series], Dict[str, str]]:
+        """
+        Fetches the dividend series of several tickers concurrently with a bounded thread pool.
+        The whole call is bounded by `timeout`, counted from submission: tickers still running or
+        still queued behind slow ones at the deadline are reported as timeouts.
+        Cached tickers are answered without touching the pool. Single-flight: a ticker already being
+        fetched by another call is awaited on its shared future, without taking a pool thread.
+        Returns ({ticker: dividends}, {ticker: error_message}).
+        """
+        results: Dict[str, pd.Series] = {}
+        errors: Dict[str, str] = {}
+        shared: Dict[str, Future] = {}
+        leaders: List[str] = []
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                divs = self._cached(ticker)
+                if divs is not None:
+                    results[ticker] = divs
+                    continue
+                future = self._in_flight.get(ticker)
+                if future is None:
+                    future = Future()
+                    self._in_flight[ticker] = future
+                    leaders.append(ticker)
+                shared[ticker] = future
+        if not shared:
+            return results, errors
+
+        deadline = time.monotonic() + self.timeout
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(leaders))) if leaders else None
+        try:
+            tasks = {ticker: executor.submit(self._run_fetch, ticker, shared[ticker]) for ticker in leaders}
+            pending = {future: ticker for ticker, future in shared.items()}
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker = pending.pop(future)
+                    try:
+                        results[ticker] = future.result()
+                    except Exception as e:
+                        errors[ticker] = str(e) or e.__class__.__name__
+
+            for future, ticker in pending.items():
+                # Threads em execução não podem ser interrompidas: o resultado chega ao cache depois
+                errors[ticker] = f"Timeout após {self.timeout:.0f}s"
+                task = tasks.get(ticker)
+                if task is not None and task.cancel():
+                    self._abandon(ticker, future)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        for ticker, message in errors.items():
+            logging.warning(f"Erro ao buscar dividendos de {ticker}: {message}")
+
+        return results, errors
 
-    @st.cache_data(ttl=3600)
-    def get_dividend_history(_self, portfolio_items: List[Any]) -> pd.DataFrame:
+    def get_dividend_history(self, portfolio_items: List[Any], transactions: Optional[List[Any]] = None) -> pd.DataFrame:
         """
         Fetches dividend history for the portfolio items using yfinance.
+        The per-ticker series are shared across users; this is only a join with the user's quantities.
+        When the transaction journal is given, each payment uses the quantity held on the day before
+        the ex-date (see held_quantities) and tickers already sold are included; otherwise the current
+        quantity is used as a proxy.
         Returns a DataFrame with: Date, Ticker, DividendPerShare, Quantity, TotalReceived
         """
-        if not portfolio_items:
+        tickers_map = {item.ticker: item.quantity for item in portfolio_items}
+        events = transactions_frame(transactions or [])
+        tickers = list(dict.fromkeys([*tickers_map, *events.loc[events['Ticker'] != '', 'Ticker']]))
+        if not tickers:
             return pd.DataFrame()
 
-        data = []
-        
         # Calculate start date (e.g., 2 years ago to have good history)
-        start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
-        
-        tickers_map = {item.ticker: item.quantity for item in portfolio_items}
-        
-        # Optimize: fetch all at once if possible, but yfinance handles single tickers better for dividends
-        for item in portfolio_items:
-            ticker_sa = f"{item.ticker}.SA"
-            try:
-                # Use Ticker object to get dividends
-                stock = yf.Ticker(ticker_sa)
-                # history(period="max") or specific start
-                divs = stock.dividends
-                
-                # Filter by date
-                # Ensure start_date is timezone-aware if divs index is, or naive if divs index is
-                if divs.index.tz is not None:
-                     # Convert to naive to simplify comparison or localize start_date
-                     # Easier: Convert divs index to naive
-                     divs.index = divs.index.tz_localize(None)
-                
-                divs = divs[divs.index >= pd.to_datetime(start_date)]
-                
-                for date, value in divs.items():
-                    data.append({
-                        "Date": date,
-                        "Ticker": item.ticker,
-                        "DividendPerShare": value,
-                        "Quantity": item.quantity, # Using current quantity as proxy
-                        "TotalReceived": value * item.quantity,
-                        "Type": "Dividendo" # FIIs usually pay dividends (rendimentos)
-                    })
-            except Exception as e:
-                print(f"Error fetching dividends for {item.ticker}: {e}")
-                continue
-                
-        if not data:
+        start_date = pd.Timestamp.now().normalize() - pd.Timedelta(days=730)
+
+        dividends, _ = self.fetch_dividends(tickers)
+        frames = [
+            pd.DataFrame({"Date": divs.index, "Ticker": ticker, "DividendPerShare": divs.to_numpy()})
+            for ticker, divs in dividends.items() if not divs.empty
+        ]
+        if not frames:
             return pd.DataFrame()
-            
-        df = pd.DataFrame(data)
+
+        df = pd.concat(frames, ignore_index=True)
         df['Date'] = pd.to_datetime(df['Date'])
         # Ensure Date is timezone-naive for consistency
         if df['Date'].dt.tz is not None:
-             df['Date'] = df['Date'].dt.tz_localize(None)
-             
+            df['Date'] = df['Date'].dt.tz_localize(None)
+        df = df[df['Date'] >= start_date]
+
+        if transactions is None:
+            df['Quantity'] = df['Ticker'].map(tickers_map)  # Using current quantity as proxy
+        else:
+            df['Quantity'] = held_quantities(df, events)
+            # Tickers without any journal event (legacy portfolios) keep the current quantity
+            untracked = ~df['Ticker'].isin(events['Ticker'])
+            df.loc[untracked, 'Quantity'] = df.loc[untracked, 'Ticker'].map(tickers_map)
+            df = df[df['Quantity'] > 0]
+        if df.empty:
+            return pd.DataFrame()
+
+        df['TotalReceived'] = df['DividendPerShare'] * df['Quantity']
+        df['Type'] = "Dividendo"  # FIIs usually pay dividends (rendimentos)
         df['MonthYear'] = df['Date'].dt.strftime('%m/%Y')
         df['Year'] = df['Date'].dt.year
         df['Month'] = df['Date'].dt.month
-        
+
         return df.sort_values(by='Date', ascending=False)
 
     def get_monthly_summary(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -96,18 +270,10 @@ class DividendService:
         Fetches the last paid dividend for a list of tickers.
         Returns a dictionary {ticker: last_dividend_value}
         """
+        dividends, _ = self.fetch_dividends(tickers)
         result = {}
         for ticker in tickers:
-            ticker_sa = f"{ticker}.SA"
-            try:
-                stock = yf.Ticker(ticker_sa)
-                divs = stock.dividends
-                if not divs.empty:
-                    # Get last dividend
-                    last_div = divs.iloc[-1]
-                    result[ticker] = float(last_div)
-                else:
-                    result[ticker] = 0.0
-            except Exception:
-                result[ticker] = 0.0
+            divs = dividends.get(ticker)
+            # Tickers com erro ou sem histórico ficam com 0.0
+            result[ticker] = float(divs.iloc[-1]) if divs is not None and not divs.empty else 0.0
         return result
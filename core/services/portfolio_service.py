@@ -1,84 +1,104 @@
+from dataclasses import replace
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from core.entities.portfolio import PortfolioItem, Transaction
 from core.interfaces.portfolio_repository import PortfolioRepositoryInterface
+from core.use_cases.portfolio import apply_transactions
 
 class PortfolioService:
+    """
+    Operações da carteira de um usuário. Também funciona como unidade de trabalho: a carteira
+    lida fica em memória e só é relida após uma escrita deste serviço (estado sujo) ou quando
+    a versão informada pelo repositório muda (escrita de outra sessão ou processo).
+    """
+
     def __init__(self, repository: PortfolioRepositoryInterface, user_id: str = None):
         self.repository = repository
         self.user_id = user_id
+        self._items: Optional[List[PortfolioItem]] = None
+        self._version = None
+        self._dirty = True
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
 
     def load_portfolio(self) -> List[PortfolioItem]:
-        return self.repository.load_portfolio(self.user_id)
+        # A versão é lida antes dos dados: uma escrita concorrente no meio só causa uma releitura extra
+        version = self.repository.portfolio_version(self.user_id)
+        if self._dirty or self._items is None or version != self._version:
+            self._items = self.repository.load_portfolio(self.user_id)
+            self._version = version
+            self._dirty = False
+        # Cópias: quem altera a lista devolvida não corrompe o estado em memória
+        return [replace(item) for item in self._items]
 
     def save_portfolio(self, items: List[PortfolioItem]):
+        self._dirty = True
         self.repository.save_portfolio(self.user_id, items)
 
     def get_transactions(self, ticker: str = None) -> List[Transaction]:
         return self.repository.get_transactions(self.user_id, ticker)
 
-    def _record_transaction(self, ticker: str, quantity: int, price: float, transaction_type: str):
-        new_transaction = Transaction(
+    def get_transactions_by_ticker(self) -> Dict[str, List[Transaction]]:
+        return self.repository.get_transactions_by_ticker(self.user_id)
+
+    def get_journal(self) -> List[Transaction]:
+        # Todos os eventos na ordem de gravação, inclusive REMOVE/CLEAR (get_transactions só traz operações)
+        return list(self.repository.iter_journal(self.user_id))
+
+    def _new_transaction(self, ticker: str, quantity: int, price: float, transaction_type: str) -> Transaction:
+        return Transaction(
             date=datetime.now().isoformat(),
             ticker=ticker,
             quantity=quantity,
             price=price,
             type=transaction_type
         )
-        self.repository.add_transaction(self.user_id, new_transaction)
+
+    def apply_batch(self, transactions: Iterable[Transaction]) -> List[PortfolioItem]:
+        """
+        Valida e aplica vários eventos (BUY, SELL, REMOVE, CLEAR) de uma vez. Os eventos são
+        reaplicados em memória sobre uma única leitura da carteira e gravados com uma escrita
+        no journal e uma nas posições: custo O(lote + carteira).
+        Tudo ou nada: se algum evento for inválido (ValueError), nada é gravado.
+        O journal é gravado antes das posições: em caso de falha no meio, as posições são recuperadas a partir dele.
+        Todo o ciclo roda sob o lock do usuário para não perder atualizações concorrentes.
+        """
+        transactions = [replace(t, ticker=t.ticker.upper().strip()) for t in transactions]
+        with self.repository.lock(self.user_id):
+            # Sempre relê sob o lock: a cópia em memória pode estar atrasada em relação a outro processo
+            items = apply_transactions(self.repository.load_portfolio(self.user_id), transactions)
+            if not transactions:
+                return items
+            self._dirty = True
+            self.repository.add_transactions(self.user_id, transactions)
+            self.save_portfolio(items)
+        return items
+
+    def _apply(self, ticker: str, quantity: int, price: float, transaction_type: str):
+        self.apply_batch([self._new_transaction(ticker, quantity, price, transaction_type)])
 
     def add_asset(self, ticker: str, quantity: int, average_price: float):
         ticker = ticker.upper().strip()
-        items = self.load_portfolio()
-        
-        # Verifica se já existe para atualizar
-        existing_item = next((item for item in items if item.ticker == ticker), None)
-        
-        if existing_item:
-            # Atualiza preço médio ponderado e quantidade
-            total_value = (existing_item.quantity * existing_item.average_price) + (quantity * average_price)
-            new_quantity = existing_item.quantity + quantity
-            existing_item.average_price = total_value / new_quantity if new_quantity > 0 else 0
-            existing_item.quantity = new_quantity
-        else:
-            items.append(PortfolioItem(ticker, quantity, average_price))
-            
-        self.save_portfolio(items)
-        self._record_transaction(ticker, quantity, average_price, 'BUY')
+        # Se já existe, atualiza preço médio ponderado e quantidade
+        self._apply(ticker, quantity, average_price, 'BUY')
 
     def sell_asset(self, ticker: str, quantity: int, price: float):
         ticker = ticker.upper().strip()
-        items = self.load_portfolio()
-        
-        existing_item = next((item for item in items if item.ticker == ticker), None)
-        
-        if existing_item:
-            if existing_item.quantity < quantity:
-                raise ValueError("Quantidade insuficiente para venda.")
-            
-            existing_item.quantity -= quantity
-            
-            # Se quantidade zerar, remove o item?
-            # Por enquanto, se zerar, vamos remover da lista de portfolio visível,
-            # mas manter o histórico.
-            if existing_item.quantity <= 0:
-                items = [item for item in items if item.ticker != ticker]
-            
-            self.save_portfolio(items)
-            self._record_transaction(ticker, quantity, price, 'SELL')
-        else:
-            raise ValueError("Ativo não encontrado na carteira.")
+        # Levanta ValueError se o ativo não existir ou a quantidade for insuficiente.
+        # Se a quantidade zerar, o item sai da carteira, mas o histórico é mantido.
+        self._apply(ticker, quantity, price, 'SELL')
 
     def remove_asset(self, ticker: str):
         ticker = ticker.upper().strip()
-        items = self.load_portfolio()
-        
-        # Optional: Record SELL transaction if we knew the sell price, 
-        # but remove_asset currently just deletes. 
-        # For now, we just update the portfolio state.
-        
-        items = [item for item in items if item.ticker != ticker]
-        self.save_portfolio(items)
-        
+        # Exclusão manual: não é uma venda (preço desconhecido), mas fica registrada
+        # no journal para que a reconstrução das posições não traga o ativo de volta.
+        self._apply(ticker, 0, 0.0, 'REMOVE')
+
+    def remove_assets(self, tickers: Iterable[str]):
+        # Exclusão em lote: uma única gravação para todos os ativos
+        self.apply_batch([self._new_transaction(ticker, 0, 0.0, 'REMOVE') for ticker in tickers])
+
     def clear_portfolio(self):
-        self.save_portfolio([])
+        self._apply('', 0, 0.0, 'CLEAR')
@@ -0,0 +1,177 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _simulate_paths(seed, n_paths: int, initial_equity: float, monthly_contribution: float, target_income: float,
+                    yield_samples: np.ndarray, return_samples: np.ndarray, max_months: int, step: int):
+    """
+    Simula n_paths trajetórias em paralelo (vetorizado por trajetória, iterando os meses).
+    Em nível de módulo para poder ser executada em um ProcessPoolExecutor.
+    """
+    rng = np.random.default_rng(seed)
+    equity = np.full(n_paths, float(initial_equity))
+    income = equity * rng.choice(yield_samples, size=n_paths)
+    months = np.full(n_paths, max_months, dtype=int)
+    reached = income >= target_income
+    months[reached] = 0
+    income_bands = []
+
+    for month in range(1, max_months + 1):
+        # Choque de preço sobre o patrimônio + reinvestimento da renda + aporte
+        equity = equity * (1 + rng.choice(return_samples, size=n_paths)) + income + monthly_contribution
+        income = equity * rng.choice(yield_samples, size=n_paths)
+        newly = ~reached & (income >= target_income)
+        months[newly] = month
+        reached |= newly
+        if month % step == 0:
+            income_bands.append(income.copy())
+
+    return months, np.array(income_bands).reshape(-1, n_paths)
+
+
+@dataclass
+class MonteCarloResult:
+    """Meses até a meta por trajetória (max_months = não atingiu) e renda a cada `step` meses."""
+    months: np.ndarray
+    income: np.ndarray
+    max_months: int
+    step: int
+
+    @property
+    def probability(self) -> float:
+        """Fração das trajetórias que atingem a meta dentro do horizonte."""
+        return float(np.mean(self.months < self.max_months)) if len(self.months) else 0.0
+
+    def percentiles(self, q: Sequence[float] = PERCENTILES) -> Dict[float, int]:
+        """Percentis de meses até a meta (valores iguais a max_months indicam que a meta não foi atingida)."""
+        values = np.percentile(self.months, q, method='higher')
+        return {p: int(v) for p, v in zip(q, values)}
+
+    def income_bands(self, q: Sequence[float] = PERCENTILES) -> pd.DataFrame:
+        """Faixas de renda mensal por percentil ao longo do tempo (uma linha por ponto), para gráficos."""
+        bands = np.percentile(self.income, q, axis=1)
+        df = pd.DataFrame({f'p{p}': band for p, band in zip(q, bands)})
+        df.insert(0, 'mes', np.arange(1, len(df) + 1) * self.step)
+        return df
+
+class ProjectionService:
+    """
+    Projeção de renda passiva com reinvestimento dos rendimentos e aportes mensais.
+
+    A cada mês: patrimônio += renda do mês + aporte, e renda = patrimônio * yield mensal.
+    Em forma fechada: E(n) = E0 * (1 + y)^n + C * ((1 + y)^n - 1) / y.
+    Todos os métodos aceitam escalares ou arrays NumPy (broadcasting), o que permite
+    avaliar grades inteiras de cenários em uma chamada.
+    """
+
+    def __init__(self, max_months: int = 360):
+        # Limite de 30 anos, como nas simulações mês a mês
+        self.max_months = max_months
+
+    def equity_after(self, months, initial_equity, monthly_contribution, monthly_yield):
+        """Patrimônio após n meses (forma fechada da recorrência mensal)."""
+        n = np.asarray(months, dtype=float)
+        y = np.asarray(monthly_yield, dtype=float)
+        growth = np.expm1(n * np.log1p(y))
+        safe_y = np.where(y != 0, y, 1.0)
+        contributions = np.where(y != 0, growth / safe_y, n)
+        return np.asarray(initial_equity, dtype=float) * (1 + growth) + np.asarray(monthly_contribution, dtype=float) * contributions
+
+    def months_to_goal(self, initial_equity, monthly_contribution, target_income, monthly_yield):
+        """
+        Meses até a renda mensal atingir target_income (máximo max_months).
+        Retorna int para entradas escalares ou um array de ints para entradas em array.
+        """
+        e0, c, t, y = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (initial_equity, monthly_contribution, target_income, monthly_yield))
+        )
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            safe_y = np.where(y > 0, y, 1.0)
+            # (1 + y)^n >= (T/y + C/y) / (E0 + C/y)
+            ratio = (t / safe_y + c / safe_y) / (e0 + c / safe_y)
+            estimate = np.ceil(np.log(ratio) / np.log1p(safe_y))
+        reachable = (y > 0) & (e0 + c > 0) & np.isfinite(estimate)
+        months = np.where(reachable, np.clip(estimate, 1, self.max_months), self.max_months)
+
+        # Correção de arredondamento de ponto flutuante em volta da fronteira
+        def reached(n):
+            return self.equity_after(n, e0, c, y) * y >= t
+
+        months = np.where((months > 1) & reached(months - 1), months - 1, months)
+        months = np.where((months < self.max_months) & ~reached(months), months + 1, months)
+
+        # Meta já atingida com o patrimônio inicial
+        months = np.where(e0 * y >= t, 0, months).astype(int)
+        return int(months) if months.ndim == 0 else months
+
+    def projection(self, initial_equity: float, monthly_contribution: float, monthly_yield: float, months: int, step: int = 6) -> List[Dict[str, Any]]:
+        """Pontos (mes, renda, patrimonio) a cada `step` meses até `months`, para gráficos."""
+        points = np.arange(step, months + 1, step)
+        equity = self.equity_after(points, initial_equity, monthly_contribution, monthly_yield)
+        return [
+            {'mes': int(mes), 'renda': float(patrimonio * monthly_yield), 'patrimonio': float(patrimonio)}
+            for mes, patrimonio in zip(points, equity)
+        ]
+
+    def sensitivity_grid(self, initial_equity: float, monthly_contributions, target_incomes, monthly_yields) -> pd.DataFrame:
+        """
+        Meses até a meta para todas as combinações (aporte x meta de renda x yield), em formato longo
+        (uma linha por combinação), pronto para heatmaps.
+        """
+        c, t, y = np.meshgrid(
+            np.asarray(monthly_contributions, dtype=float),
+            np.asarray(target_incomes, dtype=float),
+            np.asarray(monthly_yields, dtype=float),
+            indexing='ij',
+        )
+        months = self.months_to_goal(initial_equity, c, t, y)
+        return pd.DataFrame({
+            'aporte_mensal': c.ravel(),
+            'meta_renda': t.ravel(),
+            'yield_mensal': y.ravel(),
+            'meses': np.asarray(months).ravel(),
+        })
+
+    def yield_samples_from_history(self, history: pd.DataFrame, equity: float) -> np.ndarray:
+        """
+        Yields mensais observados da carteira: total recebido em cada mês do histórico
+        (DividendService.get_dividend_history) dividido pelo patrimônio atual.
+        """
+        if history is None or history.empty or equity <= 0:
+            return np.array([])
+        monthly = history.groupby(['Year', 'Month'])['TotalReceived'].sum()
+        return monthly.to_numpy(dtype=float) / equity
+
+    def simulate(self, initial_equity: float, monthly_contribution: float, target_income: float,
+                 yield_samples, return_samples=None, n_paths: int = 10_000, seed: Optional[int] = None,
+                 step: int = 6, n_jobs: int = 1) -> MonteCarloResult:
+        """
+        Projeção estocástica (Monte Carlo): a cada mês de cada trajetória o yield é sorteado de
+        yield_samples e o choque de preço de return_samples (padrão: sem variação de preço).
+        Com n_jobs > 1 as trajetórias são divididas entre processos (útil para execuções grandes).
+        """
+        yield_samples = np.asarray(yield_samples, dtype=float)
+        if yield_samples.size == 0:
+            raise ValueError("É necessário ao menos um yield mensal observado para a simulação.")
+        return_samples = np.zeros(1) if return_samples is None else np.asarray(return_samples, dtype=float)
+
+        args = (initial_equity, monthly_contribution, target_income, yield_samples, return_samples, self.max_months, step)
+        if n_jobs <= 1:
+            months, income = _simulate_paths(seed, n_paths, *args)
+        else:
+            # Sementes independentes por bloco, reprodutíveis a partir da semente principal
+            seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+            sizes = [len(chunk) for chunk in np.array_split(np.arange(n_paths), n_jobs)]
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                chunks = list(executor.map(_simulate_paths, seeds, sizes, *([arg] * n_jobs for arg in args)))
+            months = np.concatenate([chunk[0] for chunk in chunks])
+            income = np.concatenate([chunk[1] for chunk in chunks], axis=1)
+
+        return MonteCarloResult(months=months, income=income, max_months=self.max_months, step=step)
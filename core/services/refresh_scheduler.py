@@ -0,0 +1,90 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+
+from core.services.b3_calendar import B3Calendar
+
+
+class RefreshScheduler:
+    """
+    Pré-aquecimento dos dados de mercado fora do caminho das requisições interativas.
+
+    A cada execução: atualiza os snapshots de mercado (gravação atômica + troca sob lock no
+    repositório, então leitores nunca veem dados parciais) e pré-carrega os dividendos dos
+    tickers de todas as carteiras (união entre usuários). Durante o pregão da B3 roda a cada
+    `interval`; fora dele, uma última vez após o fechamento e depois só na próxima abertura.
+    Com várias réplicas compartilhando o diretório de dados, um snapshot gravado por outra réplica
+    há menos de meio intervalo é reaproveitado em vez de gerar um novo scrape.
+    """
+
+    def __init__(self, market_repositories: List, dividend_service=None,
+                 tickers_provider: Optional[Callable[[], Iterable[str]]] = None,
+                 interval: timedelta = timedelta(minutes=15), after_close_delay: timedelta = timedelta(minutes=10),
+                 calendar: Optional[B3Calendar] = None):
+        self.market_repositories = market_repositories
+        self.dividend_service = dividend_service
+        self.tickers_provider = tickers_provider
+        self.interval = interval
+        self.after_close_delay = after_close_delay
+        self.calendar = calendar or B3Calendar()
+
+        self.last_run: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def next_run(self, moment: datetime) -> datetime:
+        """Horário da próxima execução a partir de moment."""
+        if self.calendar.is_open(moment):
+            # Não pula a captura de fechamento mesmo com intervalos longos
+            return min(moment + self.interval, self.calendar.session_close_at(moment) + self.after_close_delay)
+        close_at = self.calendar.session_close_at(moment)
+        if self.calendar.is_trading_day(close_at.date()) and close_at <= moment < close_at + self.after_close_delay:
+            # Captura dos preços de fechamento
+            return close_at + self.after_close_delay
+        return self.calendar.next_open(moment)
+
+    def run_once(self):
+        for repository in self.market_repositories:
+            try:
+                repository.refresh(min_age=self.interval / 2)
+            except Exception as e:
+                logging.error(f"Erro ao pré-carregar snapshot de mercado: {e}")
+
+        if self.dividend_service is not None and self.tickers_provider is not None:
+            try:
+                tickers = sorted(set(self.tickers_provider()))
+                if tickers:
+                    _, errors = self.dividend_service.fetch_dividends(tickers)
+                    logging.info(f"Dividendos pré-carregados: {len(tickers) - len(errors)}/{len(tickers)} tickers")
+            except Exception as e:
+                logging.error(f"Erro ao pré-carregar dividendos: {e}")
+
+        self.last_run = self.calendar.now()
+
+    def start(self, run_immediately: bool = True):
+        """Inicia a thread de agendamento (idempotente)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, args=(run_immediately,), name="refresh-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self, run_immediately: bool):
+        if run_immediately:
+            self.run_once()
+        while True:
+            now = self.calendar.now()
+            delay = max((self.next_run(now) - now).total_seconds(), 0.0)
+            if self._stop.wait(delay):
+                return
+            self.run_once()
@@ -0,0 +1,72 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Hashable, Iterable, List
+
+from core.entities.portfolio import Transaction
+from core.interfaces.portfolio_repository import PortfolioRepositoryInterface
+from core.use_cases.portfolio import rebuild_positions
+
+
+@dataclass
+class ImportSummary:
+    imported: int = 0
+    duplicates: int = 0
+    # Operações inconsistentes com a carteira (ex: venda sem posição): não são gravadas
+    rejected: List[Transaction] = field(default_factory=list)
+
+
+def transaction_key(transaction: Transaction) -> Hashable:
+    # Identidade de uma operação no extrato: a mesma linha importada duas vezes gera a mesma chave
+    return (transaction.date, transaction.ticker, transaction.type, transaction.quantity, round(transaction.price, 6))
+
+
+class StatementImportService:
+    """
+    Importa operações em massa (ex: extrato de negociação da B3 lido em blocos) para a carteira de um usuário.
+
+    - Deduplicação: índice (multiconjunto) com as chaves das operações já gravadas. Uma linha só é
+      descartada se consumir uma ocorrência existente, então operações idênticas legítimas no mesmo
+      extrato são mantidas e reimportar o mesmo arquivo não duplica nada.
+    - Ordem: extratos da B3 listam a operação mais recente primeiro; as operações novas são ordenadas
+      por data (ordenação estável) antes de serem aplicadas e gravadas, então o journal fica em ordem
+      cronológica e a recuperação do repositório as reaplica na mesma ordem.
+    - Posições: as operações são aplicadas sobre as posições atuais com as mesmas regras de
+      PortfolioService.add_asset/sell_asset. Posições sem histórico no journal (carteiras legadas) são
+      preservadas. Operações inconsistentes (ex: venda sem posição) não são gravadas e vão para rejected.
+    - Escrita: as operações aceitas vão para o journal com uma única chamada a add_transactions e as
+      posições são gravadas uma única vez, ao final. A leitura do extrato continua em blocos; só as
+      operações novas ficam em memória até a ordenação.
+    Todo o processo roda sob o lock do usuário.
+    """
+
+    def __init__(self, repository: PortfolioRepositoryInterface, user_id: str = None):
+        self.repository = repository
+        self.user_id = user_id
+
+    def import_transactions(self, chunks: Iterable[List[Transaction]]) -> ImportSummary:
+        summary = ImportSummary()
+        with self.repository.lock(self.user_id):
+            existing = Counter(transaction_key(t) for t in self.repository.get_transactions(self.user_id))
+            pending = []
+            for chunk in chunks:
+                for transaction in chunk:
+                    key = transaction_key(transaction)
+                    if existing[key] > 0:
+                        existing[key] -= 1
+                        summary.duplicates += 1
+                    else:
+                        pending.append(transaction)
+            if not pending:
+                return summary
+
+            pending.sort(key=lambda t: t.date)
+            items = rebuild_positions(pending, self.repository.load_portfolio(self.user_id), summary.rejected)
+            if summary.rejected:
+                rejected = {id(t) for t in summary.rejected}
+                pending = [t for t in pending if id(t) not in rejected]
+
+            if pending:
+                self.repository.add_transactions(self.user_id, pending)
+                self.repository.save_portfolio(self.user_id, items)
+                summary.imported = len(pending)
+        return summary
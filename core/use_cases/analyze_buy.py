@@ -1,17 +1,23 @@
-from typing import List
+from typing import List, Union
 from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
 
 
 class AnalyzeBuy:
-    def execute(self, fiis: List[FII], budget: float, max_pvp: float = 1.10, min_liquidity: float = 0) -> List[FII]:
+    def execute(self, fiis: Union[List[FII], FIIUniverse], budget: float, max_pvp: float = 1.10, min_liquidity: float = 0) -> Union[List[FII], FIIUniverse]:
         """
         Filtra FIIs para compra.
-        :param fiis: Lista de FIIs
+        :param fiis: Lista de FIIs ou FIIUniverse (neste caso o filtro é vetorizado e o retorno também é um FIIUniverse)
         :param budget: Orçamento disponível
         :param max_pvp: Máximo P/VP aceitável (default 1.10)
         :param min_liquidity: Liquidez mínima diária (default 0)
         :return: Lista de FIIs recomendados ordenados por DY
         """
+        if isinstance(fiis, FIIUniverse):
+            price = fiis['price']
+            mask = (price > 0) & (price <= budget) & (fiis['pvp'] <= max_pvp) & (fiis['liquidity'] >= min_liquidity)
+            return fiis.filter(mask).sort_by('dividend_yield', descending=True)
+
         filtered_fiis = [
             fii for fii in fiis
             if fii.price > 0 and fii.price <= budget and fii.pvp <= max_pvp and fii.liquidity >= min_liquidity
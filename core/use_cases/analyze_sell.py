@@ -1,16 +1,23 @@
-from typing import List
+from typing import List, Union
 from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
 
 
 class AnalyzeSell:
-    def execute(self, fiis: List[FII], min_dy: float = 6.0, max_pvp: float = 1.5, max_vacancia: float = 10.0) -> List[FII]:
+    def execute(self, fiis: Union[List[FII], FIIUniverse], min_dy: float = 6.0, max_pvp: float = 1.5, max_vacancia: float = 10.0) -> Union[List[FII], FIIUniverse]:
         """
         Identifica FIIs potenciais para venda.
         Critérios (OU):
         - Dividend Yield abaixo do mínimo (anualizado)
         - P/VP muito alto (sobrevalorizado)
         - Vacância alta
+        Aceita também um FIIUniverse (filtro vetorizado, retorna FIIUniverse).
         """
+        if isinstance(fiis, FIIUniverse):
+            dy = fiis['dividend_yield']
+            mask = ((dy < min_dy) & (dy > 0)) | (fiis['pvp'] > max_pvp) | (fiis['vacancia'] > max_vacancia)
+            return fiis.filter(mask)
+
         filtered_fiis = [
             fii for fii in fiis
             if (fii.dividend_yield < min_dy and fii.dividend_yield > 0) # DY muito baixo (mas existente)
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List
+from core.entities.portfolio import PortfolioItem, Transaction
+
+# Tipos de evento do journal de transações.
+# BUY/SELL são operações reais; REMOVE/CLEAR só alteram as posições (exclusão manual da carteira).
+TRADE_TYPES = ('BUY', 'SELL')
+
+
+def _apply_to_positions(positions: Dict[str, PortfolioItem], transaction: Transaction):
+    """
+    Aplica um evento às posições indexadas por ticker (in place, O(1) por evento).
+    Validações acontecem antes de qualquer alteração: um evento rejeitado não deixa estado parcial.
+    """
+    ticker = transaction.ticker
+    existing_item = positions.get(ticker)
+
+    if transaction.type == 'BUY':
+        if existing_item:
+            # Atualiza preço médio ponderado e quantidade
+            total_value = (existing_item.quantity * existing_item.average_price) + (transaction.quantity * transaction.price)
+            new_quantity = existing_item.quantity + transaction.quantity
+            existing_item.average_price = total_value / new_quantity if new_quantity > 0 else 0
+            existing_item.quantity = new_quantity
+        else:
+            positions[ticker] = PortfolioItem(ticker, transaction.quantity, transaction.price)
+        return
+
+    if transaction.type == 'SELL':
+        if not existing_item:
+            raise ValueError("Ativo não encontrado na carteira.")
+        if existing_item.quantity < transaction.quantity:
+            raise ValueError("Quantidade insuficiente para venda.")
+
+        existing_item.quantity -= transaction.quantity
+
+        # Se quantidade zerar, remove da lista de portfolio visível,
+        # mas mantém o histórico.
+        if existing_item.quantity <= 0:
+            del positions[ticker]
+        return
+
+    if transaction.type == 'REMOVE':
+        positions.pop(ticker, None)
+        return
+
+    if transaction.type == 'CLEAR':
+        positions.clear()
+        return
+
+    raise ValueError(f"Tipo de transação desconhecido: {transaction.type}")
+
+
+def apply_transactions(items: List[PortfolioItem], transactions: Iterable[Transaction]) -> List[PortfolioItem]:
+    """
+    Aplica os eventos em ordem e retorna a lista resultante (os itens existentes são alterados in place).
+    Regras de preço médio e quantidade usadas tanto nas operações quanto na reconstrução pelo journal.
+    Custo O(itens + eventos): as posições ficam indexadas por ticker, mantendo a ordem da carteira.
+    """
+    positions = {item.ticker: item for item in items}
+    for transaction in transactions:
+        _apply_to_positions(positions, transaction)
+    return list(positions.values())
+
+
+def group_by_ticker(transactions: Iterable[Transaction]) -> Dict[str, List[Transaction]]:
+    """Agrupa as transações por ticker, preservando a ordem de entrada dentro de cada grupo."""
+    groups: Dict[str, List[Transaction]] = {}
+    for transaction in transactions:
+        groups.setdefault(transaction.ticker, []).append(transaction)
+    return groups
+
+
+def rebuild_positions(transactions: Iterable[Transaction], items: List[PortfolioItem] = None,
+                      rejected: List[Transaction] = None) -> List[PortfolioItem]:
+    """
+    Reconstrói as posições reaplicando os eventos do journal em ordem cronológica de gravação.
+    Eventos inconsistentes são ignorados; se rejected for informada, eles são anexados a ela.
+    """
+    positions = {item.ticker: item for item in items or []}
+    for transaction in transactions:
+        try:
+            _apply_to_positions(positions, transaction)
+        except ValueError:
+            # Evento inconsistente (ex: venda sem posição) é ignorado na reconstrução
+            if rejected is not None:
+                rejected.append(transaction)
+    return list(positions.values())
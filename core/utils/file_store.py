@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def atomic_write_json(path: str, data, **json_kwargs):
+    """Grava JSON em um arquivo temporário no mesmo diretório e faz rename atômico."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **json_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def try_acquire_lock_file(lock_path: str, stale_after: float = 300.0) -> bool:
+    """
+    Tenta criar o arquivo de lock de forma exclusiva (entre processos).
+    Locks mais antigos que stale_after segundos são considerados abandonados.
+    """
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_path) > stale_after:
+                os.remove(lock_path)
+                return try_acquire_lock_file(lock_path, stale_after)
+        except FileNotFoundError:
+            return try_acquire_lock_file(lock_path, stale_after)
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def release_lock_file(lock_path: str):
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+class _LockState:
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.file = None
+
+
+_lock_states = {}
+_lock_states_guard = threading.Lock()
+
+
+class FileLock:
+    """
+    Lock exclusivo entre threads e processos baseado em um arquivo (flock no Linux, msvcrt no Windows).
+    É reentrante dentro da mesma thread: apenas o primeiro nível bloqueia o arquivo.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = os.path.abspath(lock_path)
+        with _lock_states_guard:
+            self._state = _lock_states.setdefault(self.lock_path, _LockState())
+
+    def __enter__(self):
+        state = self._state
+        state.thread_lock.acquire()
+        if state.depth == 0:
+            try:
+                state.file = open(self.lock_path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(state.file.fileno(), fcntl.LOCK_EX)
+                else:
+                    state.file.seek(0)
+                    msvcrt.locking(state.file.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                if state.file is not None:
+                    state.file.close()
+                    state.file = None
+                state.thread_lock.release()
+                raise
+        state.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        state = self._state
+        state.depth -= 1
+        if state.depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(state.file.fileno(), fcntl.LOCK_UN)
+                else:
+                    state.file.seek(0)
+                    msvcrt.locking(state.file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                state.file.close()
+                state.file = None
+        state.thread_lock.release()
+        return False
@@ -0,0 +1,51 @@
+"""
+Benchmark da busca de dividendos: laço sequencial vs. pool concorrente.
+
+Usa um stub local de yf.Ticker com latência simulada, sem acesso à rede.
+Execute com: python -m tests.bench_dividends
+"""
+import random
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+from core.services.dividend_service import DividendService
+
+N_TICKERS = 40
+
+
+class LatencyTicker:
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def dividends(self):
+        time.sleep(random.uniform(0.05, 0.25))
+        index = pd.date_range("2020-01-15", periods=60, freq="MS")
+        return pd.Series([0.8] * 60, index=index)
+
+
+def run_sequential(tickers):
+    service = DividendService(max_workers=1)
+    return service.fetch_dividends(tickers)
+
+
+def run_concurrent(tickers):
+    service = DividendService(max_workers=N_TICKERS)
+    return service.fetch_dividends(tickers)
+
+
+def main():
+    tickers = [f"FII{i:02d}11" for i in range(N_TICKERS)]
+    with patch('core.services.dividend_service.yf.Ticker', LatencyTicker):
+        for label, fn in [("Sequencial", run_sequential), ("Concorrente", run_concurrent)]:
+            random.seed(42)
+            start = time.perf_counter()
+            results, errors = fn(tickers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<12} {len(results):>3} tickers, {len(errors)} erros em {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
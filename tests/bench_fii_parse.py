@@ -0,0 +1,38 @@
+"""
+Benchmark do parse do FundsExplorer: BeautifulSoup (html.parser) vs. lxml.
+
+Usa a cópia salva da página de ranking em tests/fixtures.
+Execute com: python -m tests.bench_fii_parse
+"""
+import os
+import time
+
+from adapters.repositories.fii_repository import FIIRepository
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "fundsexplorer_ranking.html")
+ROUNDS = 10
+
+
+def timed(fn, html):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(html)
+    return result, (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        html = f.read()
+    repo = FIIRepository()
+
+    legacy, legacy_ms = timed(repo.parse_soup, html)
+    fast, fast_ms = timed(repo.parse_lxml, html)
+
+    assert legacy == fast, "Resultados divergentes entre os parsers"
+    print(f"{len(fast)} FIIs, {len(html) / 1024:.0f} KB de HTML")
+    print(f"html.parser {legacy_ms:8.2f} ms")
+    print(f"lxml        {fast_ms:8.2f} ms  ({legacy_ms / fast_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark do parse do Fundamentus: laço com iterrows vs. limpeza por coluna.
+
+Usa a cópia salva de fii_resultado.php em tests/fixtures.
+Execute com: python -m tests.bench_fundamentus_parse
+"""
+import os
+import time
+from io import StringIO
+
+import pandas as pd
+
+from adapters.repositories.fundamentus_repository import FundamentusRepository
+from core.entities.fii import FII
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "fundamentus_fii_resultado.html")
+ROUNDS = 50
+
+
+def legacy_parse(repo, df):
+    # Implementação anterior (linha a linha), mantida como referência
+    fiis = []
+    for _, row in df.iterrows():
+        dy = repo._clean_float(row.get('Dividend Yield', 0))
+        vacancia = repo._clean_float(row.get('Vacância Média', 0))
+        if isinstance(row.get('Dividend Yield'), str) and '%' in row.get('Dividend Yield'):
+            dy = repo._parse_pct(row.get('Dividend Yield'))
+        if isinstance(row.get('Vacância Média'), str) and '%' in row.get('Vacância Média'):
+            vacancia = repo._parse_pct(row.get('Vacância Média'))
+        fiis.append(FII(
+            ticker=str(row.get('Papel', '')).strip(),
+            price=repo._clean_float(row.get('Cotação', 0)),
+            dividend_yield=dy,
+            pvp=repo._clean_float(row.get('P/VP', 0)),
+            sector=str(row.get('Segmento', '')).strip(),
+            liquidity=repo._clean_float(row.get('Liquidez', 0)),
+            vacancia=vacancia,
+        ))
+    return fiis
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        html = f.read()
+    df = pd.read_html(StringIO(html), decimal=",", thousands=".")[0]
+    repo = FundamentusRepository()
+
+    legacy, legacy_ms = timed(legacy_parse, repo, df)
+    columnar, columnar_ms = timed(repo._parse_dataframe, df)
+
+    assert legacy == columnar, "Resultados divergentes entre os parsers"
+    print(f"{len(df)} linhas")
+    print(f"iterrows   {legacy_ms:8.2f} ms")
+    print(f"colunar    {columnar_ms:8.2f} ms  ({legacy_ms / columnar_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
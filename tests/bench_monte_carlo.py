@@ -0,0 +1,28 @@
+"""
+Benchmark da projeção Monte Carlo: 10.000 trajetórias x 360 meses em um núcleo
+e a mesma simulação ampliada com pool de processos.
+
+Execute com: python -m tests.bench_monte_carlo
+"""
+import time
+
+import numpy as np
+
+from core.services.projection_service import ProjectionService
+
+
+def main():
+    service = ProjectionService()
+    rng = np.random.default_rng(0)
+    yield_samples = rng.uniform(0.006, 0.011, 24)
+    return_samples = rng.normal(0, 0.04, 60)
+
+    for label, n_paths, n_jobs in [("1 núcleo", 10_000, 1), ("1 núcleo", 100_000, 1), ("4 processos", 100_000, 4)]:
+        start = time.perf_counter()
+        result = service.simulate(50_000, 1_000, 5_000, yield_samples, return_samples, n_paths=n_paths, seed=42, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {n_paths:>7} trajetórias em {elapsed:.3f}s  percentis={result.percentiles((5, 50, 95))}")
+
+
+if __name__ == "__main__":
+    main()
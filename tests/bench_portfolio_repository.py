@@ -0,0 +1,85 @@
+"""
+Benchmark dos repositórios de carteira com 100k transações de um usuário.
+
+Compara JsonPortfolioRepository (journal JSON Lines) e SqlitePortfolioRepository
+em gravação em lote, consulta por ticker e consulta completa ordenada por data,
+e operações uma a uma (add_asset) vs. PortfolioService.apply_batch.
+Execute com: python -m tests.bench_portfolio_repository
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from core.entities.portfolio import Transaction
+from core.services.portfolio_service import PortfolioService
+
+N_TRANSACTIONS = 100_000
+N_OPERATIONS = 1_000
+TICKERS = [f"FII{i:02d}11" for i in range(50)]
+USER = "bench"
+
+
+def make_transactions():
+    random.seed(1)
+    start = datetime(2015, 1, 1)
+    return [
+        Transaction(
+            date=(start + timedelta(minutes=i * 7)).isoformat(),
+            ticker=random.choice(TICKERS),
+            quantity=random.randint(1, 100),
+            price=round(random.uniform(5, 150), 2),
+            type='BUY',
+        )
+        for i in range(N_TRANSACTIONS)
+    ]
+
+
+def timed(label, fn, rounds=1):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    print(f"  {label:<32} {elapsed:10.2f} ms")
+    return result
+
+
+def main():
+    transactions = make_transactions()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_repo = JsonPortfolioRepository()
+        json_repo.base_path = tmp_dir
+        sqlite_repo = SqlitePortfolioRepository(os.path.join(tmp_dir, "portfolio.db"))
+
+        _, journal_path = json_repo._get_paths(USER)
+        with open(journal_path, 'w') as f:
+            for t in transactions:
+                f.write(json.dumps(asdict(t)) + "\n")
+        sqlite_repo.import_user(USER, [], transactions)
+
+        extra = Transaction(datetime.now().isoformat(), TICKERS[0], 1, 10.0, 'BUY')
+        for name, repo in [("JSON Lines", json_repo), ("SQLite", sqlite_repo)]:
+            print(f"{name} ({N_TRANSACTIONS} transações)")
+            timed("add_transaction", lambda: repo.add_transaction(USER, extra), rounds=20)
+            result = timed("get_transactions(ticker)", lambda: repo.get_transactions(USER, TICKERS[0]), rounds=5)
+            timed("get_transactions() completo", lambda: repo.get_transactions(USER), rounds=2)
+            print(f"  {len(result)} transações do ticker")
+
+        operations = transactions[:N_OPERATIONS]
+        for name, repo in [("JSON Lines", json_repo), ("SQLite", sqlite_repo)]:
+            print(f"{name} ({N_OPERATIONS} operações)")
+            sequential = PortfolioService(repo, user_id="sequencial")
+            timed("add_asset um a um", lambda: [sequential.add_asset(t.ticker, t.quantity, t.price) for t in operations])
+            batch = PortfolioService(repo, user_id="lote")
+            timed("apply_batch", lambda: batch.apply_batch(operations))
+
+        sqlite_repo.close()
+
+
+if __name__ == "__main__":
+    main()
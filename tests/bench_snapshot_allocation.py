@@ -0,0 +1,76 @@
+"""
+Benchmark de alocação por rerun do Streamlit: snapshot de mercado copiado vs. compartilhado.
+
+Antes: st.cache_data devolvia uma cópia desserializada (pickle) da List[FII] a cada rerun,
+e o universo colunar e o DataFrame eram montados de novo sobre ela.
+Depois: o universo somente leitura é compartilhado por referência (st.cache_resource)
+e o DataFrame é montado uma vez por versão do snapshot.
+Execute com: python -m tests.bench_snapshot_allocation
+"""
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+
+from adapters.repositories.snapshot_fii_repository import SnapshotFIIRepository
+from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
+
+RERUNS = 50
+SECTORS = ["Logística", "Shoppings", "Lajes Corporativas", "Papel", "Híbrido", "Agro"]
+
+
+def make_fiis(n):
+    random.seed(5)
+    return [
+        FII(f"F{i:04d}11", random.uniform(5, 150), random.uniform(0, 15), random.uniform(0.5, 1.5),
+            random.choice(SECTORS), random.uniform(1e3, 1e7), random.uniform(0, 30))
+        for i in range(n)
+    ]
+
+
+def rerun_copied(cached_bytes):
+    # Comportamento de st.cache_data: cada chamada recebe um objeto novo desserializado
+    universe = FIIUniverse.from_fiis(pickle.loads(cached_bytes))
+    return universe, universe.to_dataframe(), universe.get("F0001")
+
+
+def rerun_shared(repository):
+    universe = repository.get_universe()
+    return universe, universe.to_dataframe(), universe.get("F0001")
+
+
+def measure(label, fn):
+    fn()  # aquecimento (constrói o snapshot compartilhado)
+    tracemalloc.start()
+    peaks = []
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        del result
+    elapsed = (time.perf_counter() - start) / RERUNS * 1000
+    tracemalloc.stop()
+    print(f"  {label:<14} {sum(peaks) / len(peaks) / 1024:10.1f} KiB/rerun  {elapsed:8.3f} ms/rerun (com tracemalloc)")
+
+
+def main():
+    for n in (400, 5000):
+        fiis = make_fiis(n)
+        source = MagicMock()
+        source.get_all.return_value = fiis
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repository = SnapshotFIIRepository(source, name="bench", base_path=tmp_dir)
+            cached_bytes = pickle.dumps(fiis)
+            print(f"{n} FIIs")
+            measure("Cópia (antes)", lambda: rerun_copied(cached_bytes))
+            measure("Compartilhado", lambda: rerun_shared(repository))
+
+
+if __name__ == "__main__":
+    main()
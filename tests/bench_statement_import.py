@@ -0,0 +1,71 @@
+"""
+Benchmark da importação de extratos: 100 mil linhas no formato de negociação da B3.
+
+Mede o tempo da leitura em blocos + gravação em lotes nos dois backends de carteira,
+a reimportação do mesmo arquivo (tudo duplicado) e o pico de memória (tracemalloc).
+Execute com: python -m tests.bench_statement_import
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from adapters.inputs.broker_statement_reader import BrokerStatementReader
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from core.services.statement_import_service import StatementImportService
+
+N_LINES = 100_000
+TICKERS = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}FI11" for i in range(200)]
+HEADER = "Data do Negócio;Tipo de Movimentação;Mercado;Prazo/Vencimento;Instituição;Código de Negociação;Quantidade;Preço;Valor\n"
+
+
+def write_statement(path):
+    random.seed(7)
+    start = date(2015, 1, 2)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+        for i in range(N_LINES):
+            day = (start + timedelta(days=i // 30)).strftime("%d/%m/%Y")
+            price = f"{random.uniform(5, 150):.2f}".replace(".", ",")
+            f.write(f"{day};Compra;Mercado à Vista;-;CORRETORA;{random.choice(TICKERS)};{random.randint(1, 100)};{price};0,00\n")
+
+
+def run_import(repository, path, user_id, label):
+    reader = BrokerStatementReader()
+    start = time.perf_counter()
+    summary = StatementImportService(repository, user_id).import_transactions(reader.read(path))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<14} {elapsed:6.2f}s  {summary.imported} importadas, {summary.duplicates} duplicadas")
+
+
+def peak_memory(repository, path, user_id):
+    # Medição separada: tracemalloc deixa a execução bem mais lenta
+    tracemalloc.start()
+    StatementImportService(repository, user_id).import_transactions(BrokerStatementReader().read(path))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {'pico memória':<14} {peak / 2**20:6.1f} MiB")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "negociacao.csv")
+        write_statement(path)
+        print(f"Extrato com {N_LINES} linhas ({os.path.getsize(path) / 2**20:.1f} MiB)")
+
+        json_repo = JsonPortfolioRepository()
+        json_repo.base_path = tmp_dir
+        sqlite_repo = SqlitePortfolioRepository(os.path.join(tmp_dir, "portfolio.db"))
+        for name, repo in [("JSON Lines", json_repo), ("SQLite", sqlite_repo)]:
+            print(name)
+            run_import(repo, path, "bench", "importação")
+            run_import(repo, path, "bench", "reimportação")
+            peak_memory(repo, path, "memoria")
+        sqlite_repo.close()
+
+
+if __name__ == "__main__":
+    main()
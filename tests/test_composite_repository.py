@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from adapters.repositories.composite_fii_repository import FASTEST, MERGE, CompositeFIIRepository
+from adapters.repositories.fundamentus_repository import FundamentusRepository
+from core.entities.fii import FII
+
+
+def make_fii(ticker, price=100.0, sector="Logística", vacancia=5.0):
+    return FII(ticker=ticker, price=price, dividend_yield=10.0, pvp=1.0, sector=sector, liquidity=100000, vacancia=vacancia)
+
+
+class StubSource:
+    def __init__(self, fiis=None, delay=0.0, error=None, release=None):
+        self.fiis = fiis or []
+        self.delay = delay
+        self.error = error
+        self.release = release
+        self.calls = 0
+
+    def get_all(self):
+        self.calls += 1
+        if self.release is not None:
+            # Fonte "travada" até o teste liberar
+            self.release.wait()
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return list(self.fiis)
+
+
+class TestCompositeFIIRepository(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_merge_unions_with_field_precedence(self):
+        primary = StubSource([make_fii("HGLG11", price=160.0, sector=""), make_fii("KNRI11", vacancia=float('nan'))])
+        secondary = StubSource([make_fii("KNRI11", price=999.0, vacancia=3.0), make_fii("XPML11", sector="Shoppings")])
+        repo = CompositeFIIRepository(
+            {"a": primary, "b": secondary}, policy=MERGE, field_precedence={"sector": ["b", "a"]}
+        )
+        merged = {fii.ticker: fii for fii in repo.get_all()}
+
+        self.assertEqual(set(merged), {"HGLG11", "KNRI11", "XPML11"})
+        # price: precedência padrão (a); vacância inválida em a cai para b
+        self.assertEqual(merged["KNRI11"].price, 100.0)
+        self.assertEqual(merged["KNRI11"].vacancia, 3.0)
+        # sector: b primeiro; sem valor em nenhuma fonte válida, fica o da única fonte
+        self.assertEqual(merged["XPML11"].sector, "Shoppings")
+        self.assertEqual(merged["HGLG11"].sector, "")
+        self.assertEqual(repo.status, {"a": "ok", "b": "ok"})
+
+    def test_merge_ignores_zero_price_and_pvp_from_parser(self):
+        # Célula ilegível no Fundamentus: o parser devolve 0.0 em cotação e P/VP
+        parsed = FundamentusRepository()._parse_dataframe(pd.DataFrame({
+            'Papel': ['HGLG11'], 'Segmento': ['Logística'], 'Cotação': ['-'], 'Dividend Yield': ['8,50%'],
+            'P/VP': ['-'], 'Liquidez': ['1.234.567'], 'Vacância Média': ['0,00%'],
+        }))
+        self.assertEqual((parsed[0].price, parsed[0].pvp), (0.0, 0.0))
+
+        repo = CompositeFIIRepository(
+            {"fundamentus": StubSource(parsed), "fundsexplorer": StubSource([make_fii("HGLG11", price=160.0, vacancia=2.0)])}
+        )
+        merged = repo.get_all()[0]
+
+        self.assertEqual((merged.price, merged.pvp), (160.0, 1.0))
+        # Demais campos continuam vindo da fonte preferida, inclusive zeros legítimos
+        self.assertEqual((merged.dividend_yield, merged.vacancia), (8.5, 0.0))
+
+    def test_fastest_returns_first_non_empty(self):
+        repo = CompositeFIIRepository({
+            "empty": StubSource([]),
+            "slow": StubSource([make_fii("SLOW11")], delay=0.5),
+            "fast": StubSource([make_fii("FAST11")], delay=0.05),
+        }, policy=FASTEST, timeout=5)
+        start = time.monotonic()
+        fiis = repo.get_all()
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual([f.ticker for f in fiis], ["FAST11"])
+        self.assertEqual(repo.status["empty"], "empty")
+        self.assertEqual(repo.status["slow"], "pending")
+
+    def test_hung_source_does_not_block_and_is_not_resubmitted(self):
+        hung = StubSource([make_fii("HUNG11")], release=self.release)
+        ok = StubSource([make_fii("HGLG11")])
+        repo = CompositeFIIRepository({"hung": hung, "ok": ok}, policy=MERGE, timeout=0.2)
+
+        start = time.monotonic()
+        fiis = repo.get_all()
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual([f.ticker for f in fiis], ["HGLG11"])
+        self.assertEqual(repo.status["hung"], "timeout")
+
+        repo.get_all()
+        self.assertEqual(hung.calls, 1)
+
+    def test_failed_source_falls_back_to_last_good_result(self):
+        flaky = StubSource([make_fii("HGLG11", price=150.0)])
+        other = StubSource([make_fii("KNRI11")])
+        repo = CompositeFIIRepository({"flaky": flaky, "other": other}, policy=MERGE)
+        repo.get_all()
+        self.assertEqual(repo.stale_sources, {})
+
+        # Mudança de layout: a fonte passa a falhar
+        flaky.error = ValueError("tabela não encontrada")
+        fiis = {fii.ticker: fii for fii in repo.get_all()}
+        self.assertEqual(fiis["HGLG11"].price, 150.0)
+        self.assertEqual(repo.status["flaky"], "error")
+        self.assertIn("flaky", repo.stale_sources)
+
+    def test_all_sources_failing_returns_empty(self):
+        repo = CompositeFIIRepository({"a": StubSource(error=ValueError("x")), "b": StubSource([])})
+        self.assertEqual(repo.get_all(), [])
+        self.assertEqual(repo.status, {"a": "error", "b": "empty"})
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            CompositeFIIRepository({"a": StubSource()}, policy="random")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from core.services.auth_service import AuthService
+from core.services.portfolio_service import PortfolioService
+
+TRADES_PER_WORKER = 25
+
+
+def make_json_service(base_path):
+    repository = JsonPortfolioRepository()
+    repository.base_path = base_path
+    return PortfolioService(repository, user_id="ana")
+
+
+def buy_in_process(base_path):
+    # Executado em outro processo: simula outra réplica do app no mesmo volume
+    service = make_json_service(base_path)
+    for _ in range(TRADES_PER_WORKER):
+        service.add_asset("HGLG11", 1, 100.0)
+
+
+class TestConcurrentWrites(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_no_lost_updates(self, service, expected_quantity):
+        items = service.load_portfolio()
+        self.assertEqual(items[0].quantity, expected_quantity)
+        self.assertEqual(len(service.get_transactions("HGLG11")), expected_quantity)
+
+    def run_threads(self, service, workers=8):
+        def buy():
+            for _ in range(TRADES_PER_WORKER):
+                service.add_asset("HGLG11", 1, 100.0)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(buy) for _ in range(workers)]:
+                future.result()
+
+    def test_concurrent_add_asset_threads_json(self):
+        service = make_json_service(self.tmp_dir.name)
+        self.run_threads(service)
+        self.assert_no_lost_updates(service, 8 * TRADES_PER_WORKER)
+
+    def test_concurrent_add_asset_threads_sqlite(self):
+        repository = SqlitePortfolioRepository(os.path.join(self.tmp_dir.name, "portfolio.db"))
+        service = PortfolioService(repository, user_id="ana")
+        self.run_threads(service)
+        self.assert_no_lost_updates(service, 8 * TRADES_PER_WORKER)
+        repository.close()
+
+    def test_concurrent_add_asset_processes_json(self):
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=buy_in_process, args=(self.tmp_dir.name,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        self.assert_no_lost_updates(make_json_service(self.tmp_dir.name), 4 * TRADES_PER_WORKER)
+
+    def test_concurrent_register(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        try:
+            auth = AuthService()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda i: auth.register(f"user{i}", "senha"), range(40)))
+            self.assertTrue(all(results))
+            self.assertTrue(all(auth.login(f"user{i}", "senha") for i in range(40)))
+            self.assertTrue(auth.login("admin", "admin"))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,281 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pandas as pd
+
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_dividend_repository import SqliteDividendRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from core.entities.portfolio import PortfolioItem, Transaction
+from core.services.dividend_service import DividendService, held_quantities, transactions_frame
+from core.services.portfolio_service import PortfolioService
+
+
+class StubTicker:
+    """Simula yf.Ticker com latência fixa por ticker."""
+    latency = 0.2
+    failing = set()
+    hanging = set()
+    downloads = []
+
+    def __init__(self, symbol):
+        self.ticker = symbol.replace(".SA", "")
+
+    @property
+    def dividends(self):
+        self.downloads.append(self.ticker)
+        if self.ticker in self.hanging:
+            time.sleep(2)
+        time.sleep(self.latency)
+        if self.ticker in self.failing:
+            raise RuntimeError("HTTP 404")
+        index = pd.to_datetime(["2024-01-15", "2024-02-15"]).tz_localize("America/Sao_Paulo")
+        return pd.Series([0.8, 0.9], index=index)
+
+
+class TestDividendService(unittest.TestCase):
+    def setUp(self):
+        StubTicker.failing = set()
+        StubTicker.hanging = set()
+        StubTicker.downloads = []
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_fetch_is_concurrent(self):
+        service = DividendService(max_workers=10)
+        tickers = [f"FII{i:02d}11" for i in range(10)]
+
+        start = time.perf_counter()
+        results, errors = service.fetch_dividends(tickers)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(errors, {})
+        # Sequencial levaria ~2s; concorrente deve levar próximo do mais lento (~0.2s)
+        self.assertLess(elapsed, 1.0)
+        self.assertIsNone(results["FII0011"].index.tz)
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_fetch_reports_errors_and_timeouts(self):
+        StubTicker.failing = {"ERRO11"}
+        StubTicker.hanging = {"LENT11"}
+        service = DividendService(max_workers=4, timeout=0.5)
+
+        results, errors = service.fetch_dividends(["HGLG11", "ERRO11", "LENT11"])
+
+        self.assertEqual(set(results), {"HGLG11"})
+        self.assertIn("404", errors["ERRO11"])
+        self.assertIn("Timeout", errors["LENT11"])
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_timeout_bounds_the_whole_call(self):
+        # Tickers lentos ocupam todas as threads; o que ficou na fila também respeita o prazo
+        StubTicker.hanging = {"LENT11", "LENT12"}
+        service = DividendService(max_workers=2, timeout=0.5)
+
+        start = time.perf_counter()
+        results, errors = service.fetch_dividends(["LENT11", "LENT12", "HGLG11"])
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(results, {})
+        self.assertEqual(set(errors), {"LENT11", "LENT12", "HGLG11"})
+        # O ticker que nunca saiu da fila não fica preso no single-flight
+        StubTicker.hanging = set()
+        self.assertIn("HGLG11", service.fetch_dividends(["HGLG11"])[0])
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_followers_of_a_hung_fetch_do_not_hold_pool_threads(self):
+        StubTicker.hanging = {"LENT11"}
+        service = DividendService(max_workers=1, timeout=0.5)
+        leader = threading.Thread(target=service.fetch_dividends, args=(["LENT11"],))
+        leader.start()
+        time.sleep(0.1)
+
+        # Com uma única thread no pool, HGLG11 só é buscado se LENT11 esperar fora do pool
+        results, errors = service.fetch_dividends(["LENT11", "HGLG11"])
+        leader.join()
+
+        self.assertEqual(set(results), {"HGLG11"})
+        self.assertIn("Timeout", errors["LENT11"])
+        self.assertEqual(StubTicker.downloads.count("LENT11"), 1)
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_last_dividends_defaults_to_zero_on_error(self):
+        StubTicker.failing = {"ERRO11"}
+        service = DividendService()
+
+        result = service.get_last_dividends(["HGLG11", "ERRO11"])
+
+        self.assertEqual(result, {"HGLG11": 0.9, "ERRO11": 0.0})
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_concurrent_users_share_one_fetch_per_ticker(self):
+        service = DividendService(max_workers=4)
+        # Carteiras sobrepostas: HGLG11 e KNRI11 estão em todas
+        portfolios = [["HGLG11", "KNRI11", f"FII{i:02d}11"] for i in range(6)]
+        barrier = threading.Barrier(len(portfolios))
+
+        def view(tickers):
+            barrier.wait()
+            service.get_last_dividends(tickers)
+
+        threads = [threading.Thread(target=view, args=(tickers,)) for tickers in portfolios]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(StubTicker.downloads), sorted({t for tickers in portfolios for t in tickers}))
+
+        # Novas visões são servidas do cache, sem downloads
+        service.get_last_dividends(["HGLG11", "FII0311"])
+        self.assertEqual(len(StubTicker.downloads), 8)
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_cache_expires_and_errors_are_not_cached(self):
+        StubTicker.latency = 0
+        StubTicker.failing = {"ERRO11"}
+        try:
+            service = DividendService(cache_ttl=timedelta(0))
+            service.fetch_dividends(["HGLG11", "ERRO11"])
+            service.fetch_dividends(["HGLG11", "ERRO11"])
+        finally:
+            StubTicker.latency = 0.2
+        self.assertEqual(sorted(StubTicker.downloads), ["ERRO11", "ERRO11", "HGLG11", "HGLG11"])
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_history_joins_cached_series_with_quantities(self):
+        service = DividendService()
+        today = pd.Timestamp.now().normalize()
+        recent = pd.Series([0.8, 0.9], index=[today - timedelta(days=40), today - timedelta(days=10)])
+        old = pd.Series([5.0], index=[today - timedelta(days=1000)])
+        service._cache = {"HGLG11": (time.monotonic(), recent), "KNRI11": (time.monotonic(), recent), "VELH11": (time.monotonic(), old)}
+
+        ana = service.get_dividend_history([SimpleNamespace(ticker="HGLG11", quantity=10), SimpleNamespace(ticker="VELH11", quantity=1)])
+        bia = service.get_dividend_history([SimpleNamespace(ticker="HGLG11", quantity=3), SimpleNamespace(ticker="KNRI11", quantity=2)])
+
+        self.assertEqual(StubTicker.downloads, [])
+        self.assertEqual(list(ana['TotalReceived']), [9.0, 8.0])
+        self.assertEqual(list(ana.columns), ["Date", "Ticker", "DividendPerShare", "Quantity", "TotalReceived", "Type", "MonthYear", "Year", "Month"])
+        self.assertAlmostEqual(bia['TotalReceived'].sum(), 1.7 * 3 + 1.7 * 2)
+        self.assertTrue(bia['Date'].is_monotonic_decreasing)
+
+
+class TestPositionWeightedHistory(unittest.TestCase):
+    def setUp(self):
+        self.today = pd.Timestamp.now().normalize()
+
+    def day(self, offset):
+        return self.today - timedelta(days=offset)
+
+    def test_quantity_held_before_each_ex_date(self):
+        journal = [
+            Transaction(self.day(100).isoformat(), "HGLG11", 10, 100.0, "BUY"),
+            Transaction((self.day(60) + timedelta(hours=10)).isoformat(), "HGLG11", 5, 100.0, "BUY"),
+            Transaction(self.day(30).isoformat(), "HGLG11", 12, 100.0, "SELL"),
+            Transaction(self.day(90).isoformat(), "KNRI11", 7, 100.0, "BUY"),
+            Transaction(self.day(20).isoformat(), "", 0, 0.0, "CLEAR"),
+            Transaction(self.day(10).isoformat(), "KNRI11", 2, 100.0, "BUY"),
+            Transaction(self.day(5).isoformat(), "KNRI11", 0, 0.0, "REMOVE"),
+        ]
+        dividends = pd.DataFrame({
+            "Date": [self.day(d) for d in (100, 99, 60, 59, 29, 25, 15, 8, 1)],
+            "Ticker": ["HGLG11", "HGLG11", "HGLG11", "HGLG11", "HGLG11", "KNRI11", "KNRI11", "KNRI11", "KNRI11"],
+        })
+
+        held = held_quantities(dividends, transactions_frame(journal))
+
+        # Compra na própria data-com não recebe; compras no meio do dia contam só a partir do dia seguinte
+        self.assertEqual(list(held), [0, 10, 10, 15, 3, 7, 0, 2, 0])
+
+    @patch('core.services.dividend_service.yf.Ticker', StubTicker)
+    def test_history_uses_transactions_and_includes_sold_tickers(self):
+        service = DividendService()
+        series = pd.Series([1.0, 1.0], index=[self.day(50), self.day(10)])
+        service._cache = {ticker: (time.monotonic(), series) for ticker in ("HGLG11", "KNRI11", "XPML11")}
+        journal = [
+            Transaction(self.day(60).isoformat(), "HGLG11", 10, 100.0, "BUY"),
+            Transaction(self.day(30).isoformat(), "HGLG11", 4, 100.0, "BUY"),
+            Transaction(self.day(60).isoformat(), "KNRI11", 5, 100.0, "BUY"),
+            Transaction(self.day(30).isoformat(), "KNRI11", 5, 100.0, "SELL"),
+        ]
+        # XPML11 não tem transações (carteira anterior ao journal): mantém a quantidade atual
+        items = [PortfolioItem("HGLG11", 14, 100.0), PortfolioItem("XPML11", 3, 100.0)]
+
+        df = service.get_dividend_history(items, journal)
+
+        received = df.groupby("Ticker")["TotalReceived"].sum().to_dict()
+        self.assertEqual(received, {"HGLG11": 24.0, "KNRI11": 5.0, "XPML11": 6.0})
+        self.assertEqual(service.get_dividend_history(items, [])["TotalReceived"].sum(), 34.0)
+
+    def test_history_from_repository_journal_honours_removals(self):
+        service = DividendService()
+        # Um pagamento com o ativo em carteira e outro depois da exclusão manual
+        series = pd.Series([1.0, 1.0], index=[self.day(50), self.day(-1)])
+        service._cache = {ticker: (time.monotonic(), series) for ticker in ("HGLG11", "KNRI11")}
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_repository = JsonPortfolioRepository()
+            json_repository.base_path = tmp_dir
+            sqlite_repository = SqlitePortfolioRepository(os.path.join(tmp_dir, "portfolio.db"))
+            try:
+                for repository in (json_repository, sqlite_repository):
+                    portfolio = PortfolioService(repository, user_id="ana")
+                    portfolio.apply_batch([
+                        Transaction(self.day(60).isoformat(), "HGLG11", 10, 100.0, "BUY"),
+                        Transaction(self.day(60).isoformat(), "KNRI11", 4, 100.0, "BUY"),
+                    ])
+                    portfolio.remove_asset("HGLG11")
+
+                    df = service.get_dividend_history(portfolio.load_portfolio(), portfolio.get_journal())
+
+                    received = df.groupby("Ticker")["TotalReceived"].sum().to_dict()
+                    self.assertEqual(received, {"HGLG11": 10.0, "KNRI11": 8.0})
+            finally:
+                sqlite_repository.close()
+
+
+class TestDividendStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SqliteDividendRepository(os.path.join(self.tmp_dir.name, "dividends.db"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @patch('core.services.dividend_service.yf.Ticker')
+    def test_refresh_fetches_only_new_events(self, mock_ticker):
+        stock = mock_ticker.return_value
+        stock.dividends = pd.Series([0.8, 0.9], index=pd.to_datetime(["2024-01-15", "2024-02-15"]))
+        stock.history.return_value = pd.DataFrame(
+            {"Dividends": [0.0, 1.0]}, index=pd.to_datetime(["2024-03-14", "2024-03-15"])
+        )
+        service = DividendService(store=self.store, refresh_interval=timedelta(0))
+
+        first, _ = service.fetch_dividends(["HGLG11"])
+        self.assertEqual(list(first["HGLG11"]), [0.8, 0.9])
+        stock.history.assert_not_called()
+
+        second, _ = service.fetch_dividends(["HGLG11"])
+        self.assertEqual(list(second["HGLG11"]), [0.8, 0.9, 1.0])
+        self.assertEqual(stock.history.call_args.kwargs["start"], "2024-02-16")
+
+    @patch('core.services.dividend_service.yf.Ticker')
+    def test_fresh_ticker_is_served_from_store(self, mock_ticker):
+        self.store.save("HGLG11", pd.Series([1.1], index=pd.to_datetime(["2024-01-15"])))
+        service = DividendService(store=self.store)
+
+        results, _ = service.fetch_dividends(["HGLG11"])
+
+        mock_ticker.assert_not_called()
+        self.assertEqual(list(results["HGLG11"]), [1.1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from dataclasses import FrozenInstanceError
+
+import numpy as np
+
+from core.entities.fii import FII
+from core.entities.fii_universe import FIIUniverse
+from core.use_cases.analyze_buy import AnalyzeBuy
+from core.use_cases.analyze_sell import AnalyzeSell
+
+
+class TestFIIUniverse(unittest.TestCase):
+    def setUp(self):
+        self.fiis = [
+            FII(ticker="FIIA11", price=100.0, dividend_yield=10.0, pvp=1.0, sector="Lajes", liquidity=100000, vacancia=5.0),
+            FII(ticker="FIIB11", price=150.0, dividend_yield=4.0, pvp=1.6, sector="Shoppings", liquidity=50000, vacancia=15.0),
+            FII(ticker="FIIC11", price=80.0, dividend_yield=12.0, pvp=0.9, sector="Papel", liquidity=200000, vacancia=0.0),
+            FII(ticker="FIID11", price=90.0, dividend_yield=10.0, pvp=1.05, sector="Papel", liquidity=300000, vacancia=1.0),
+        ]
+        self.universe = FIIUniverse.from_fiis(self.fiis)
+
+    def test_index_and_lazy_objects(self):
+        self.assertEqual(len(self.universe), 4)
+        self.assertIs(self.universe.get("FIIC11"), self.fiis[2])
+        self.assertIsNone(self.universe.get("XXXX11"))
+
+        # Sem objetos de origem, os FIIs são reconstruídos a partir das colunas
+        rebuilt = FIIUniverse({name: self.universe[name] for name in self.universe._columns})
+        self.assertEqual(rebuilt.to_fiis(), self.fiis)
+
+    def test_sector_index_and_selection(self):
+        self.assertEqual(list(self.universe.sector_index["Papel"]), [2, 3])
+        self.assertEqual([f.ticker for f in self.universe.by_sector("Papel")], ["FIIC11", "FIID11"])
+        self.assertEqual(len(self.universe.by_sector("Agro")), 0)
+        # select mantém a ordem do universo e ignora tickers ausentes
+        self.assertEqual([f.ticker for f in self.universe.select(["FIID11", "XXXX11", "FIIA11"])], ["FIIA11", "FIID11"])
+        self.assertEqual(self.universe.sectors_of(["FIIB11", "FIIC11", "XXXX11"]), {"Shoppings", "Papel"})
+        self.assertEqual(self.universe.sectors_of([]), set())
+
+    def test_top_k_matches_full_sort(self):
+        rng = np.random.default_rng(3)
+        fiis = [
+            FII(ticker=f"F{i:03d}11", price=100.0, dividend_yield=float(rng.integers(0, 15)), pvp=1.0,
+                sector="Papel", liquidity=1.0, vacancia=0.0)
+            for i in range(200)
+        ]
+        universe = FIIUniverse.from_fiis(fiis)
+        expected = sorted(fiis, key=lambda f: f.dividend_yield, reverse=True)
+
+        for k in (1, 7, 50, 200, 300):
+            self.assertEqual(universe.top_k('dividend_yield', k).to_fiis(), expected[:k])
+
+    def test_top_k_places_nan_like_sort_by(self):
+        def make(ticker, dy):
+            return FII(ticker=ticker, price=100.0, dividend_yield=dy, pvp=1.0, sector="Papel", liquidity=1.0, vacancia=0.0)
+
+        # NaN na k-ésima posição (célula numérica em branco no Fundamentus)
+        universe = FIIUniverse.from_fiis([make("A", float('nan')), make("B", 5.0), make("C", float('nan'))])
+        self.assertEqual([f.ticker for f in universe.top_k('dividend_yield', 2)], ["B", "A"])
+
+        rng = np.random.default_rng(7)
+        values = rng.integers(0, 10, 300).astype(float)
+        values[rng.choice(300, 60, replace=False)] = np.nan
+        values[:3] = [np.inf, -np.inf, np.inf]
+        universe = FIIUniverse.from_fiis([make(f"F{i:03d}11", float(v)) for i, v in enumerate(values)])
+        for descending in (True, False):
+            expected = [f.ticker for f in universe.sort_by('dividend_yield', descending)]
+            for k in (1, 2, 50, 239, 240, 241, 299):
+                self.assertEqual([f.ticker for f in universe.top_k('dividend_yield', k, descending)], expected[:k])
+
+    def test_use_cases_match_list_results(self):
+        buy = AnalyzeBuy()
+        sell = AnalyzeSell()
+
+        self.assertEqual(buy.execute(self.universe, budget=120.0).to_fiis(), buy.execute(self.fiis, budget=120.0))
+        self.assertEqual(sell.execute(self.universe).to_fiis(), sell.execute(self.fiis))
+
+    def test_to_dataframe_columns(self):
+        df = self.universe.to_dataframe()
+
+        self.assertEqual(list(df.columns), ['ticker', 'price', 'dividend_yield', 'pvp', 'sector', 'liquidity', 'vacancia'])
+        self.assertEqual(df['ticker'].tolist(), ["FIIA11", "FIIB11", "FIIC11", "FIID11"])
+
+
+    def test_universe_is_read_only(self):
+        with self.assertRaises(FrozenInstanceError):
+            self.universe.get("FIIA11").price = 1.0
+        with self.assertRaises(ValueError):
+            self.universe['price'][0] = 1.0
+        with self.assertRaises(ValueError):
+            self.universe.select(["FIIA11"])['price'][0] = 1.0
+
+        # DataFrame montado uma vez; alterar a cópia devolvida não afeta o universo
+        df = self.universe.to_dataframe()
+        df.loc[0, 'price'] = 1.0
+        df['extra'] = 0
+        fresh = self.universe.to_dataframe()
+        self.assertEqual(fresh.loc[0, 'price'], 100.0)
+        self.assertNotIn('extra', fresh.columns)
+        self.assertEqual(self.universe['price'][0], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import math
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from adapters.repositories.fundamentus_repository import FundamentusRepository
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "fundamentus_fii_resultado.html")
+
+
+class TestFundamentusRepository(unittest.TestCase):
+    @patch('adapters.http.http_client.requests.Session.get')
+    def test_parses_saved_page(self, mock_get):
+        with open(FIXTURE_PATH, encoding="utf-8") as f:
+            mock_response = MagicMock()
+            mock_response.text = f.read()
+            mock_response.headers = {}
+        mock_get.return_value = mock_response
+
+        fiis = FundamentusRepository().get_all()
+
+        self.assertEqual(len(fiis), 400)
+        for fii in fiis:
+            self.assertTrue(fii.ticker.endswith("11"))
+            self.assertIsInstance(fii.dividend_yield, float)
+            self.assertGreaterEqual(fii.vacancia, 0.0)
+            self.assertLess(fii.vacancia, 100.0)
+
+    def test_columnar_parse_matches_scalar_cleaning(self):
+        repo = FundamentusRepository()
+        df = pd.DataFrame({
+            'Papel': ['AAAA11', ' BBBB11 ', np.nan],
+            'Segmento': ['Logística', 'Shoppings', 'Papel'],
+            'Cotação': [100.5, np.nan, 9.8],
+            'Dividend Yield': ['12,34%', np.nan, 'abc%'],
+            'P/VP': [0.95, 1.1, 0.7],
+            'Liquidez': ['1.234.567', 'R$ 10,50', 5.0],
+            'Vacância Média': ['0,00%', '35,10%', '1.234,5%'],
+        })
+
+        fiis = repo._parse_dataframe(df)
+
+        self.assertEqual([f.ticker for f in fiis], ['AAAA11', 'BBBB11', 'nan'])
+        for fii, (_, row) in zip(fiis, df.iterrows()):
+            expected = [
+                repo._clean_float(row['Cotação']),
+                repo._clean_float(row['Dividend Yield']),
+                repo._clean_float(row['P/VP']),
+                repo._clean_float(row['Liquidez']),
+                repo._clean_float(row['Vacância Média']),
+            ]
+            actual = [fii.price, fii.dividend_yield, fii.pvp, fii.liquidity, fii.vacancia]
+            for a, e in zip(actual, expected):
+                if math.isnan(e):
+                    self.assertTrue(math.isnan(a))
+                else:
+                    self.assertEqual(a, e)
+
+    def test_missing_columns_default_to_zero(self):
+        fiis = FundamentusRepository()._parse_dataframe(pd.DataFrame({'Papel': ['AAAA11']}))
+
+        self.assertEqual(fiis[0].sector, '')
+        self.assertEqual(fiis[0].price, 0.0)
+        self.assertEqual(fiis[0].vacancia, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
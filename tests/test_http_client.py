@@ -0,0 +1,151 @@
+import gzip
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from adapters.http.http_client import HttpClient
+from adapters.repositories.fii_repository import FIIRepository
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "fundsexplorer_ranking.html")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Servidor HTTP local: ETag, Last-Modified, falhas temporárias, lentidão e gzip."""
+    protocol_version = "HTTP/1.1"
+    hits = {}
+    ports = []
+    flaky_failures = 2
+    body = b"<html>conteudo</html>"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+        cls.ports.append(self.client_address[1])
+
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._send(304, headers={"ETag": '"v1"'})
+            return self._send(200, cls.body, {"ETag": '"v1"'})
+        if self.path == "/lastmod":
+            last_modified = "Mon, 02 Mar 2026 10:00:00 GMT"
+            if self.headers.get("If-Modified-Since") == last_modified:
+                return self._send(304)
+            return self._send(200, cls.body, {"Last-Modified": last_modified})
+        if self.path == "/flaky":
+            if cls.hits[self.path] <= cls.flaky_failures:
+                return self._send(503, b"indisponivel")
+            return self._send(200, b"ok")
+        if self.path == "/slow":
+            time.sleep(0.5)
+            return self._send(200, b"lento")
+        if self.path == "/gzip":
+            if "gzip" not in self.headers.get("Accept-Encoding", ""):
+                return self._send(406)
+            return self._send(200, gzip.compress(cls.body), {"Content-Encoding": "gzip"})
+        if self.path == "/ranking":
+            with open(FIXTURE_PATH, "rb") as f:
+                page = f.read()
+            if self.headers.get("If-None-Match") == '"r1"':
+                return self._send(304, headers={"ETag": '"r1"'})
+            return self._send(200, page, {"ETag": '"r1"', "Content-Type": "text/html; charset=utf-8"})
+        self._send(404)
+
+
+class TestHttpClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.hits = {}
+        StubHandler.ports = []
+        self.client = HttpClient(timeout=(1.0, 0.2), retries=3, backoff=0.01)
+
+    def test_etag_conditional_get(self):
+        first = self.client.get(self.base_url + "/etag")
+        second = self.client.get(self.base_url + "/etag")
+        self.assertFalse(first.not_modified)
+        self.assertTrue(second.not_modified)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.text, first.text)
+
+    def test_last_modified_conditional_get(self):
+        self.client.get(self.base_url + "/lastmod")
+        self.assertTrue(self.client.get(self.base_url + "/lastmod").not_modified)
+        # Sem validadores, sempre baixa a página completa
+        self.assertFalse(self.client.get(self.base_url + "/lastmod", conditional=False).not_modified)
+
+    def test_retries_transient_errors_with_backoff(self):
+        with patch.object(self.client, "_delay", wraps=self.client._delay) as delay:
+            result = self.client.get(self.base_url + "/flaky")
+        self.assertEqual(result.text, "ok")
+        self.assertEqual(StubHandler.hits["/flaky"], 3)
+        self.assertEqual([c.args[0] for c in delay.call_args_list], [0, 1])
+
+    def test_gives_up_after_retries(self):
+        client = HttpClient(timeout=(1.0, 0.2), retries=1, backoff=0.01)
+        StubHandler.flaky_failures = 10
+        try:
+            with self.assertRaises(requests.HTTPError):
+                client.get(self.base_url + "/flaky")
+        finally:
+            StubHandler.flaky_failures = 2
+        self.assertEqual(StubHandler.hits["/flaky"], 2)
+
+    def test_read_timeout(self):
+        client = HttpClient(timeout=(1.0, 0.1), retries=0)
+        with self.assertRaises(requests.Timeout):
+            client.get(self.base_url + "/slow")
+
+    def test_backoff_is_bounded_and_jittered(self):
+        client = HttpClient(backoff=1.0, max_backoff=4.0)
+        delays = [client._delay(10) for _ in range(200)]
+        self.assertTrue(all(0 <= d <= 4.0 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_gzip_and_connection_reuse(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.base_url + "/gzip").text, StubHandler.body.decode())
+        # Keep-alive: as três requisições usam a mesma conexão do pool
+        self.assertEqual(len(set(StubHandler.ports)), 1)
+
+    def test_repository_skips_parse_on_not_modified(self):
+        repo = FIIRepository(http_client=self.client)
+        repo.URL = self.base_url + "/ranking"
+        fiis = repo.get_all()
+        self.assertEqual(len(fiis), 400)
+
+        with patch.object(repo, "parse_lxml") as parse:
+            again = repo.get_all()
+        parse.assert_not_called()
+        self.assertEqual(again, fiis)
+        self.assertEqual(StubHandler.hits["/ranking"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
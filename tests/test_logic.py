@@ -1,4 +1,5 @@
 
+import os
 import unittest
 from unittest.mock import MagicMock, patch
 from core.entities.fii import FII
@@ -33,7 +34,7 @@ class TestFIIAnalysis(unittest.TestCase):
         self.assertEqual(result[0].ticker, "FIIB11") 
         # FIIB11: DY 4.0 (<6), PVP 1.6 (>1.5), Vacancia 15 (>10) -> Sell candidate
 
-    @patch('adapters.repositories.fii_repository.requests.get')
+    @patch('adapters.http.http_client.requests.Session.get')
     def test_repository_parsing(self, mock_get):
         html_content = """
         <html>
@@ -54,6 +55,7 @@ class TestFIIAnalysis(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.text = html_content
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_get.return_value = mock_response
 
         repo = FIIRepository()
@@ -69,5 +71,16 @@ class TestFIIAnalysis(unittest.TestCase):
         self.assertEqual(fii.vacancia, 2.5)
         self.assertEqual(fii.price, 100.50)
 
+    def test_lxml_parser_matches_html_parser(self):
+        fixture_path = os.path.join(os.path.dirname(__file__), "fixtures", "fundsexplorer_ranking.html")
+        with open(fixture_path, encoding="utf-8") as f:
+            html = f.read()
+
+        fast = FIIRepository(parser="lxml").parse_lxml(html)
+        legacy = FIIRepository(parser="html.parser").parse_soup(html)
+
+        self.assertEqual(len(fast), 400)
+        self.assertEqual(fast, legacy)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+
+from adapters.repositories.market_history_repository import MarketHistoryRepository
+from adapters.repositories.snapshot_fii_repository import SnapshotFIIRepository
+from core.entities.fii import FII
+from core.services.ai_analysis_service import SmartAnalysisService
+
+
+def make_fii(ticker, pvp=1.0, vacancia=5.0):
+    return FII(ticker=ticker, price=100.0, dividend_yield=10.0, pvp=pvp, sector="Logística", liquidity=100000, vacancia=vacancia)
+
+
+class TestMarketHistoryRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repo = MarketHistoryRepository("teste", base_path=self.tmp_dir.name)
+        self.start = datetime(2026, 3, 2, 18, 0)
+        # Uma semana de snapshots: a vacância do HGLG11 sobe 1 p.p. por dia
+        for day in range(7):
+            self.repo.append(
+                [make_fii("HGLG11", vacancia=5.0 + day), make_fii("KNRI11", pvp=0.9)],
+                self.start + timedelta(days=day),
+            )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_one_partition_per_day(self):
+        self.assertEqual(len(self.repo.dates()), 7)
+        # Novo snapshot no mesmo dia substitui o anterior
+        self.repo.append([make_fii("HGLG11", vacancia=50.0)], self.start + timedelta(hours=2))
+        self.assertEqual(len(self.repo.dates()), 7)
+        first_day = self.repo.load_range(end=self.start.date())
+        self.assertEqual(list(first_day['ticker']), ["HGLG11"])
+        self.assertEqual(first_day['vacancia'].iloc[0], 50.0)
+
+    def test_range_queries(self):
+        df = self.repo.load_range(self.start.date() + timedelta(days=1), self.start.date() + timedelta(days=3))
+        self.assertEqual(len(df), 6)
+        self.assertEqual(df['date'].dt.date.min(), self.start.date() + timedelta(days=1))
+
+        only_pvp = self.repo.load_range(tickers=["KNRI11"], columns=["pvp"])
+        self.assertEqual(list(only_pvp.columns), ["date", "ticker", "pvp"])
+        self.assertEqual(len(only_pvp), 7)
+
+        self.assertTrue(self.repo.load_range(tickers=[]).empty)
+        self.assertTrue(self.repo.load_range(start=date(2030, 1, 1)).empty)
+
+    def test_ticker_history(self):
+        history = self.repo.ticker_history("HGLG11")
+        self.assertEqual(len(history), 7)
+        self.assertTrue(history.index.is_monotonic_increasing)
+        self.assertEqual(list(history['vacancia']), [5.0 + day for day in range(7)])
+
+    def test_viability_uses_trend(self):
+        service = SmartAnalysisService()
+        fii = make_fii("HGLG11", vacancia=11.0)
+        without_history = service.analyze_future_viability(fii)
+        with_history = service.analyze_future_viability(fii, self.repo.ticker_history("HGLG11"))
+        self.assertEqual(with_history['risk_score'], without_history['risk_score'] + 10)
+        self.assertTrue(any("Vacância em Alta" in text for text in with_history['viability_text']))
+
+    def test_snapshot_refresh_appends_history(self):
+        source = MagicMock()
+        source.get_all.return_value = [make_fii("XPML11")]
+        history = MarketHistoryRepository("snap", base_path=self.tmp_dir.name)
+        SnapshotFIIRepository(source, name="snap", base_path=self.tmp_dir.name, history=history).get_all()
+        self.assertEqual(history.dates(), [date.today()])
+        self.assertEqual(list(history.load_range()['ticker']), ["XPML11"])
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp_dir.name, "market_history_snap")))
+
+
+if __name__ == '__main__':
+    unittest.main()
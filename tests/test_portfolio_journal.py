@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from core.entities.portfolio import Transaction
+from core.services.portfolio_service import PortfolioService
+
+
+class TestPortfolioJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repository = JsonPortfolioRepository()
+        self.repository.base_path = self.tmp_dir.name
+        self.service = PortfolioService(self.repository, user_id="ana")
+        self.portfolio_path, self.journal_path = self.repository._get_paths("ana")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_trades_append_to_journal_and_update_positions(self):
+        self.service.add_asset("hglg11", 10, 100.0)
+        self.service.add_asset("HGLG11", 10, 120.0)
+        self.service.sell_asset("HGLG11", 5, 130.0)
+
+        with open(self.journal_path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["type"] for line in lines], ["BUY", "BUY", "SELL"])
+
+        items = self.service.load_portfolio()
+        self.assertEqual(items[0].quantity, 15)
+        self.assertAlmostEqual(items[0].average_price, 110.0)
+        self.assertEqual(len(self.service.get_transactions("HGLG11")), 3)
+
+    def test_trade_does_not_read_history(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        with patch.object(self.repository, '_read_journal') as read_journal:
+            self.service.add_asset("HGLG11", 10, 100.0)
+            self.service.sell_asset("HGLG11", 1, 100.0)
+        read_journal.assert_not_called()
+
+    def test_transaction_index_reads_journal_once_per_version(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        self.service.add_asset("MXRF11", 100, 10.0)
+        self.service.add_asset("HGLG11", 5, 110.0)
+        with patch.object(self.repository, '_read_journal', wraps=self.repository._read_journal) as read_journal:
+            # Um card por ativo: várias consultas na mesma versão leem o journal uma vez
+            for _ in range(5):
+                index = self.service.get_transactions_by_ticker()
+            self.assertEqual(read_journal.call_count, 1)
+            self.assertEqual(len(index["HGLG11"]), 2)
+            self.assertEqual(index["HGLG11"], self.service.get_transactions("HGLG11"))
+
+            self.service.sell_asset("MXRF11", 10, 11.0)
+            index = self.service.get_transactions_by_ticker()
+            self.assertEqual(read_journal.call_count, 3)  # get_transactions acima + reconstrução do índice
+            self.assertEqual([t.type for t in index["MXRF11"]], ["SELL", "BUY"])
+
+    def test_one_disk_read_per_rerun(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        with patch.object(self.repository, '_read_view', wraps=self.repository._read_view) as read_view:
+            # Um rerun do web.py: serviço novo e a carteira consultada por várias seções
+            rerun = PortfolioService(self.repository, user_id="ana")
+            for _ in range(5):
+                items = rerun.load_portfolio()
+            self.assertEqual(read_view.call_count, 1)
+            self.assertFalse(rerun.is_dirty)
+
+            # Alterar a cópia devolvida não afeta o estado em memória
+            items[0].quantity = 999
+            self.assertEqual(rerun.load_portfolio()[0].quantity, 10)
+            self.assertEqual(read_view.call_count, 1)
+
+            # Escrita de outra sessão muda a versão do repositório
+            PortfolioService(self.repository, user_id="ana").add_asset("MXRF11", 10, 10.0)
+            read_view.reset_mock()
+            self.assertEqual(len(rerun.load_portfolio()), 2)
+            rerun.load_portfolio()
+            self.assertEqual(read_view.call_count, 1)
+
+            # Escrita própria marca o estado como sujo
+            rerun.sell_asset("MXRF11", 10, 11.0)
+            self.assertTrue(rerun.is_dirty)
+            read_view.reset_mock()
+            self.assertEqual([i.ticker for i in rerun.load_portfolio()], ["HGLG11"])
+            self.assertEqual(read_view.call_count, 1)
+
+    def test_batch_matches_sequential_with_one_write(self):
+        operations = [
+            ("hglg11", 10, 100.0, "BUY"), ("MXRF11", 100, 10.0, "BUY"), ("HGLG11", 10, 120.0, "BUY"),
+            ("MXRF11", 100, 11.0, "SELL"), ("KNRI11", 5, 150.0, "BUY"), ("KNRI11", 0, 0.0, "REMOVE"),
+            ("XPML11", 3, 110.0, "BUY"), ("HGLG11", 5, 130.0, "SELL"),
+        ]
+        sequential = PortfolioService(self.repository, user_id="bia")
+        for ticker, quantity, price, kind in operations:
+            {"BUY": lambda: sequential.add_asset(ticker, quantity, price),
+             "SELL": lambda: sequential.sell_asset(ticker, quantity, price),
+             "REMOVE": lambda: sequential.remove_asset(ticker)}[kind]()
+
+        batch = [Transaction("2024-01-01T10:00:00", t, q, p, k) for t, q, p, k in operations]
+        self.service.load_portfolio()  # carteira nova: cria a visão vazia antes de medir
+        with patch.object(self.repository, '_append_journal', wraps=self.repository._append_journal) as append, \
+                patch.object(self.repository, '_write_view', wraps=self.repository._write_view) as write_view:
+            self.service.apply_batch(batch)
+        self.assertEqual(append.call_count, 1)
+        self.assertEqual(write_view.call_count, 1)
+
+        self.assertEqual(self.service.load_portfolio(), sequential.load_portfolio())
+        self.assertAlmostEqual(self.service.load_portfolio()[0].average_price, 110.0)
+        self.assertEqual(len(self.service.get_transactions()), 7)
+        # Recuperação pelo journal chega às mesmas posições
+        os.remove(self.portfolio_path)
+        self.assertEqual(self.service.load_portfolio(), sequential.load_portfolio())
+
+    def test_invalid_batch_writes_nothing(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        batch = [
+            Transaction("2024-01-01T10:00:00", "MXRF11", 10, 10.0, "BUY"),
+            Transaction("2024-01-01T10:00:00", "HGLG11", 11, 100.0, "SELL"),
+        ]
+        with self.assertRaisesRegex(ValueError, "Quantidade insuficiente"):
+            self.service.apply_batch(batch)
+        self.assertEqual([(i.ticker, i.quantity) for i in self.service.load_portfolio()], [("HGLG11", 10)])
+        self.assertEqual(len(self.service.get_transactions()), 1)
+
+    def test_bulk_remove(self):
+        for ticker in ("HGLG11", "MXRF11", "KNRI11"):
+            self.service.add_asset(ticker, 1, 10.0)
+        self.service.remove_assets(["hglg11", "KNRI11"])
+        self.assertEqual([i.ticker for i in self.service.load_portfolio()], ["MXRF11"])
+
+    def test_positions_rebuilt_from_journal_on_recovery(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        self.service.add_asset("MXRF11", 100, 10.0)
+        self.service.remove_asset("MXRF11")
+        expected = self.service.load_portfolio()
+
+        os.remove(self.portfolio_path)
+
+        self.assertEqual(self.service.load_portfolio(), expected)
+        self.assertEqual(self.service.get_transactions("MXRF11")[0].type, "BUY")
+
+    def test_journal_ahead_of_view_is_replayed(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        # Simula falha após gravar o journal e antes de atualizar as posições
+        with patch.object(self.repository, 'save_portfolio'):
+            self.service.add_asset("HGLG11", 10, 200.0)
+
+        items = self.service.load_portfolio()
+        self.assertEqual(items[0].quantity, 20)
+        self.assertAlmostEqual(items[0].average_price, 150.0)
+
+    def test_sell_validation_unchanged(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        with self.assertRaisesRegex(ValueError, "insuficiente"):
+            self.service.sell_asset("HGLG11", 11, 100.0)
+        with self.assertRaisesRegex(ValueError, "não encontrado"):
+            self.service.sell_asset("XPML11", 1, 100.0)
+        self.assertEqual(len(self.service.get_transactions()), 1)
+
+    def test_legacy_files_are_migrated(self):
+        legacy = [{"date": "2024-01-01T10:00:00", "ticker": "HGLG11", "quantity": 5, "price": 150.0, "type": "BUY"}]
+        with open(os.path.join(self.tmp_dir.name, "transactions_ana.json"), 'w') as f:
+            json.dump(legacy, f)
+        with open(self.portfolio_path, 'w') as f:
+            json.dump([{"ticker": "HGLG11", "quantity": 5, "average_price": 150.0}], f)
+
+        self.assertEqual(self.service.load_portfolio()[0].quantity, 5)
+        self.service.add_asset("HGLG11", 5, 150.0)
+
+        self.assertEqual(self.service.load_portfolio()[0].quantity, 10)
+        self.assertEqual(len(self.service.get_transactions()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
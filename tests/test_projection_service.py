@@ -0,0 +1,125 @@
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from core.services.projection_service import ProjectionService
+
+
+def simulate(initial_equity, monthly_contribution, target_income, monthly_yield, max_months=360):
+    """Simulação mês a mês original (referência da forma fechada)."""
+    months = 0
+    equity = initial_equity
+    income = equity * monthly_yield
+    points = []
+    while income < target_income and months < max_months:
+        months += 1
+        equity += income + monthly_contribution
+        income = equity * monthly_yield
+        if months % 6 == 0:
+            points.append({'mes': months, 'renda': income, 'patrimonio': equity})
+    return months, equity, points
+
+
+class TestProjectionService(unittest.TestCase):
+    def setUp(self):
+        self.service = ProjectionService()
+        self.rng = random.Random(7)
+
+    def random_case(self):
+        rng = self.rng
+        return (
+            rng.choice([0.0, rng.uniform(0, 1_000_000)]),
+            rng.choice([0.0, rng.uniform(0, 10_000)]),
+            rng.uniform(0, 20_000),
+            rng.choice([0.0, rng.uniform(0, 0.02)]),
+        )
+
+    def test_months_to_goal_matches_loop(self):
+        for _ in range(3000):
+            case = self.random_case()
+            expected, _, _ = simulate(*case)
+            self.assertEqual(self.service.months_to_goal(*case), expected, case)
+
+    def test_projection_points_match_loop(self):
+        for _ in range(200):
+            case = self.random_case()
+            months, equity, points = simulate(*case)
+            e0, contribution, _, y = case
+            self.assertAlmostEqual(
+                float(self.service.equity_after(months, e0, contribution, y)), equity, delta=max(1e-6, equity * 1e-9)
+            )
+            projected = self.service.projection(e0, contribution, y, months)
+            self.assertEqual([p['mes'] for p in projected], [p['mes'] for p in points])
+            for got, want in zip(projected, points):
+                self.assertAlmostEqual(got['patrimonio'], want['patrimonio'], delta=max(1e-6, want['patrimonio'] * 1e-9))
+                self.assertAlmostEqual(got['renda'], want['renda'], delta=max(1e-6, want['renda'] * 1e-9))
+
+    def test_edge_cases(self):
+        # Meta já atingida, yield zero e patrimônio zerado sem aportes
+        self.assertEqual(self.service.months_to_goal(100_000, 0, 500, 0.01), 0)
+        self.assertEqual(self.service.months_to_goal(100_000, 1_000, 500, 0.0), 360)
+        self.assertEqual(self.service.months_to_goal(0, 0, 500, 0.01), 360)
+        self.assertEqual(self.service.projection(0, 0, 0.01, 0), [])
+
+    def test_grid_matches_scalar_calls(self):
+        contributions = [0, 500, 1_000, 5_000]
+        targets = [100, 1_000, 10_000]
+        yields = [0.0, 0.006, 0.009]
+        grid = self.service.sensitivity_grid(20_000, contributions, targets, yields)
+        self.assertEqual(len(grid), len(contributions) * len(targets) * len(yields))
+        for row in grid.itertuples():
+            expected, _, _ = simulate(20_000, row.aporte_mensal, row.meta_renda, row.yield_mensal)
+            self.assertEqual(row.meses, expected)
+
+    def test_array_inputs_broadcast(self):
+        months = self.service.months_to_goal(10_000, np.array([100.0, 1_000.0]), 1_000, 0.008)
+        self.assertEqual(months.shape, (2,))
+        self.assertGreater(months[0], months[1])
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.service = ProjectionService()
+
+    def test_constant_yield_matches_closed_form(self):
+        # Sem dispersão, todas as trajetórias coincidem com a projeção determinística
+        result = self.service.simulate(30_000, 800, 2_000, [0.008], n_paths=500, seed=1)
+        expected = self.service.months_to_goal(30_000, 800, 2_000, 0.008)
+        self.assertTrue(np.all(result.months == expected))
+        self.assertEqual(set(result.percentiles().values()), {expected})
+        self.assertEqual(result.probability, 1.0)
+
+    def test_seed_is_reproducible_and_bands_are_ordered(self):
+        samples = np.linspace(0.005, 0.011, 12)
+        returns = np.linspace(-0.05, 0.05, 11)
+        a = self.service.simulate(30_000, 800, 2_000, samples, returns, n_paths=2_000, seed=3)
+        b = self.service.simulate(30_000, 800, 2_000, samples, returns, n_paths=2_000, seed=3)
+        np.testing.assert_array_equal(a.months, b.months)
+        p = a.percentiles()
+        self.assertLessEqual(p[5], p[50])
+        self.assertLessEqual(p[50], p[95])
+        bands = a.income_bands()
+        self.assertEqual(list(bands['mes'][:2]), [6, 12])
+        self.assertTrue((bands['p5'] <= bands['p95']).all())
+
+    def test_process_pool_splits_paths(self):
+        result = self.service.simulate(30_000, 800, 2_000, [0.006, 0.009], n_paths=1_001, seed=5, n_jobs=2)
+        self.assertEqual(len(result.months), 1_001)
+        self.assertEqual(result.income.shape[1], 1_001)
+
+    def test_yield_samples_from_history(self):
+        history = pd.DataFrame({
+            'Year': [2024, 2024, 2024],
+            'Month': [1, 1, 2],
+            'TotalReceived': [50.0, 30.0, 100.0],
+        })
+        np.testing.assert_allclose(self.service.yield_samples_from_history(history, 10_000), [0.008, 0.01])
+        self.assertEqual(len(self.service.yield_samples_from_history(pd.DataFrame(), 10_000)), 0)
+        with self.assertRaises(ValueError):
+            self.service.simulate(30_000, 800, 2_000, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
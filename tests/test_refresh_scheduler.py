@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.snapshot_fii_repository import SnapshotFIIRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from application.scheduler import portfolio_tickers
+from core.entities.fii import FII
+from core.services.b3_calendar import B3_TIMEZONE, B3Calendar, b3_holidays, easter
+from core.services.portfolio_service import PortfolioService
+from core.services.refresh_scheduler import RefreshScheduler
+
+
+def at(year, month, day, hour, minute=0):
+    return datetime(year, month, day, hour, minute, tzinfo=B3_TIMEZONE)
+
+
+class TestB3Calendar(unittest.TestCase):
+    def setUp(self):
+        self.calendar = B3Calendar()
+
+    def test_holidays(self):
+        self.assertEqual(easter(2026), date(2026, 4, 5))
+        holidays = b3_holidays(2026)
+        # Carnaval, Sexta-feira Santa, Corpus Christi e feriados fixos
+        for day in [date(2026, 2, 16), date(2026, 2, 17), date(2026, 4, 3), date(2026, 6, 4), date(2026, 11, 20), date(2026, 12, 24)]:
+            self.assertIn(day, holidays)
+        self.assertNotIn(date(2023, 11, 20), b3_holidays(2023))
+
+    def test_session_hours(self):
+        self.assertTrue(self.calendar.is_open(at(2026, 3, 2, 10)))
+        self.assertFalse(self.calendar.is_open(at(2026, 3, 2, 9, 59)))
+        self.assertFalse(self.calendar.is_open(at(2026, 3, 2, 18)))
+        self.assertFalse(self.calendar.is_open(at(2026, 3, 7, 12)))  # sábado
+        self.assertFalse(self.calendar.is_open(at(2026, 2, 17, 12)))  # carnaval
+        # Horário UTC é convertido para Brasília (13h UTC = 10h)
+        self.assertTrue(self.calendar.is_open(datetime(2026, 3, 2, 13, tzinfo=timezone.utc)))
+
+    def test_next_open_skips_weekends_and_holidays(self):
+        self.assertEqual(self.calendar.next_open(at(2026, 3, 6, 19)), at(2026, 3, 9, 10))
+        self.assertEqual(self.calendar.next_open(at(2026, 2, 13, 19)), at(2026, 2, 18, 10))
+        self.assertEqual(self.calendar.next_open(at(2026, 3, 2, 8)), at(2026, 3, 2, 10))
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    def setUp(self):
+        self.market = MagicMock()
+        self.dividends = MagicMock()
+        self.dividends.fetch_dividends.return_value = ({}, {})
+        self.scheduler = RefreshScheduler(
+            [self.market], self.dividends, lambda: ["HGLG11", "MXRF11", "HGLG11"], interval=timedelta(minutes=15)
+        )
+
+    def test_next_run_follows_trading_hours(self):
+        self.assertEqual(self.scheduler.next_run(at(2026, 3, 2, 11)), at(2026, 3, 2, 11, 15))
+        # Última execução logo após o fechamento, depois só na próxima abertura
+        self.assertEqual(self.scheduler.next_run(at(2026, 3, 2, 17, 55)), at(2026, 3, 2, 18, 10))
+        self.assertEqual(self.scheduler.next_run(at(2026, 3, 2, 18, 10)), at(2026, 3, 3, 10))
+        self.assertEqual(self.scheduler.next_run(at(2026, 3, 6, 22)), at(2026, 3, 9, 10))
+        self.assertEqual(self.scheduler.next_run(at(2026, 3, 2, 7)), at(2026, 3, 2, 10))
+
+    def test_run_once_refreshes_market_and_distinct_tickers(self):
+        self.scheduler.run_once()
+        self.market.refresh.assert_called_once()
+        self.dividends.fetch_dividends.assert_called_once_with(["HGLG11", "MXRF11"])
+        self.assertIsNotNone(self.scheduler.last_run)
+
+    def test_failures_are_isolated(self):
+        self.market.refresh.side_effect = RuntimeError("fonte fora do ar")
+        self.scheduler.run_once()
+        self.dividends.fetch_dividends.assert_called_once()
+
+    def test_thread_runs_immediately_and_stops(self):
+        ran = threading.Event()
+        self.market.refresh.side_effect = lambda **_: ran.set()
+        self.scheduler.start()
+        self.scheduler.start()  # idempotente
+        self.assertTrue(ran.wait(2))
+        self.scheduler.stop(timeout=2)
+        self.assertFalse(self.scheduler._thread.is_alive())
+        self.assertEqual(self.market.refresh.call_count, 1)
+
+
+class TestPrewarmInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_scheduled_snapshot_never_scrapes_on_read(self):
+        source = MagicMock()
+        source.get_all.return_value = [FII("HGLG11", 100.0, 10.0, 1.0, "Logística", 100000, 5.0)]
+        repo = SnapshotFIIRepository(source, name="agendado", max_age=timedelta(0), base_path=self.tmp_dir.name, auto_refresh=False)
+        repo.get_all()  # partida a frio
+        repo.get_all()
+        repo.get_all()
+        self.assertEqual(source.get_all.call_count, 1)
+
+    def test_union_of_portfolio_tickers(self):
+        json_repository = JsonPortfolioRepository()
+        json_repository.base_path = self.tmp_dir.name
+        sqlite_repository = SqlitePortfolioRepository(os.path.join(self.tmp_dir.name, "portfolio.db"))
+        try:
+            for repository in (json_repository, sqlite_repository):
+                PortfolioService(repository, user_id="ana").add_asset("HGLG11", 10, 100.0)
+                PortfolioService(repository, user_id="bia").add_asset("HGLG11", 5, 100.0)
+                PortfolioService(repository, user_id="bia").add_asset("MXRF11", 5, 10.0)
+                self.assertEqual(repository.list_users(), ["ana", "bia"])
+                self.assertEqual(portfolio_tickers(repository), {"HGLG11", "MXRF11"})
+        finally:
+            sqlite_repository.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
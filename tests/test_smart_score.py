@@ -0,0 +1,91 @@
+import math
+import random
+import unittest
+
+from core.entities.fii import FII
+from core.entities.portfolio import PortfolioItem
+from core.services.ai_analysis_service import SmartAnalysisService
+
+# Valores de fronteira das regras do Smart Score
+PVP_EDGES = [0.0, 0.69, 0.7, 0.79, 0.8, 1.05, 1.06, 1.2, 1.21, float('nan')]
+DY_EDGES = [0.0, 5.99, 6.0, 8.99, 9.0, 16.0, 16.01, float('nan')]
+LIQUIDITY_EDGES = [0.0, 200_000, 200_001, 1_000_000, 1_000_001, float('nan')]
+VACANCIA_EDGES = [0.0, 5.0, 5.01, 15.0, 15.01, float('nan')]
+SECTORS = ["Logística", "Shoppings", "Papel", "Híbrido", ""]
+
+
+def random_fii(rng, i):
+    def pick(edges, low, high):
+        return rng.choice(edges) if rng.random() < 0.3 else rng.uniform(low, high)
+
+    return FII(
+        ticker=f"T{i:04d}11",
+        price=rng.uniform(5, 300),
+        dividend_yield=pick(DY_EDGES, 0, 25),
+        pvp=pick(PVP_EDGES, 0.3, 1.6),
+        sector=rng.choice(SECTORS),
+        liquidity=pick(LIQUIDITY_EDGES, 0, 3_000_000),
+        vacancia=pick(VACANCIA_EDGES, 0, 40),
+    )
+
+
+def reference_recommend(service, fiis, budget, min_liquidity, portfolio_items):
+    # Implementação escalar original de recommend, usada como oráculo
+    market_map = {f.ticker: f for f in fiis}
+    portfolio_sectors = {market_map[i.ticker].sector for i in portfolio_items if i.ticker in market_map}
+    recommendations = []
+    for fii in fiis:
+        if fii.price <= budget and fii.liquidity >= min_liquidity:
+            analysis = service.analyze_fii(fii, portfolio_items)
+            if fii.sector and fii.sector not in portfolio_sectors and analysis["score"] >= 60:
+                analysis["score"] = min(analysis["score"] + 5, 100)
+                analysis["tags"].append("Diversificação (Novo Setor)")
+                analysis["analysis_text"] += " **Bônus de Diversificação:** Setor ainda não presente na sua carteira."
+            if analysis["score"] >= 60:
+                recommendations.append({"fii": fii, **analysis})
+    recommendations.sort(key=lambda x: (x["score"], x["in_portfolio"], x["fii"].dividend_yield), reverse=True)
+    return recommendations
+
+
+class TestSmartScoreBatch(unittest.TestCase):
+    def setUp(self):
+        self.service = SmartAnalysisService()
+
+    def test_batch_matches_analyze_fii(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            fiis = [random_fii(rng, i) for i in range(200)]
+            portfolio = [PortfolioItem(f.ticker, 10, 100.0) for f in rng.sample(fiis, 30)]
+
+            batch = self.service.score_batch(fiis, portfolio)
+
+            for row, fii in enumerate(fiis):
+                self.assertEqual(batch.analysis(row), self.service.analyze_fii(fii, portfolio), fii)
+
+    def test_recommend_matches_scalar_reference(self):
+        for seed in range(10):
+            rng = random.Random(100 + seed)
+            fiis = [random_fii(rng, i) for i in range(300)]
+            # Sem NaN no DY para que a ordenação de referência seja bem definida
+            fiis = [f for f in fiis if not math.isnan(f.dividend_yield)]
+            portfolio = [PortfolioItem(f.ticker, 10, 100.0) for f in rng.sample(fiis, 20)]
+
+            expected = reference_recommend(self.service, fiis, 150.0, 50_000, portfolio)
+            actual = self.service.recommend(fiis, 150.0, 50_000, portfolio)
+
+            self.assertEqual(actual, expected)
+
+    def test_recommend_top_k_matches_full_sort(self):
+        for seed in range(10):
+            rng = random.Random(200 + seed)
+            fiis = [random_fii(rng, i) for i in range(300)]
+            fiis = [f for f in fiis if not math.isnan(f.dividend_yield)]
+            portfolio = [PortfolioItem(f.ticker, 10, 100.0) for f in rng.sample(fiis, 20)]
+
+            full = self.service.recommend(fiis, 150.0, 50_000, portfolio)
+            for k in (0, 1, 5, 10, len(full), len(full) + 10):
+                self.assertEqual(self.service.recommend_top_k(k, fiis, 150.0, 50_000, portfolio), full[:k])
+
+
+if __name__ == '__main__':
+    unittest.main()
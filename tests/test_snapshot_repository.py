@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from adapters.repositories.snapshot_fii_repository import SnapshotFIIRepository
+from core.entities.fii import FII
+
+
+def make_fii(ticker, price=100.0):
+    return FII(ticker=ticker, price=price, dividend_yield=10.0, pvp=1.0, sector="Logística", liquidity=100000, vacancia=5.0)
+
+
+class TestSnapshotFIIRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = MagicMock()
+        self.source.get_all.return_value = [make_fii("HGLG11")]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_repo(self, max_age=timedelta(hours=1)):
+        return SnapshotFIIRepository(self.source, name="teste", max_age=max_age, base_path=self.tmp_dir.name)
+
+    def test_cold_start_scrapes_once_and_shares_snapshot(self):
+        fiis = self.make_repo().get_all()
+        self.assertEqual(fiis[0].ticker, "HGLG11")
+
+        # Outra instância (outro processo) lê do disco sem novo scrape
+        other = self.make_repo().get_all()
+        self.assertEqual(other, fiis)
+        self.assertEqual(self.source.get_all.call_count, 1)
+
+    def test_stale_snapshot_is_served_while_revalidating(self):
+        self.make_repo().get_all()
+        self.source.get_all.side_effect = lambda: (time.sleep(0.2), [make_fii("HGLG11", price=120.0)])[1]
+
+        repo = self.make_repo(max_age=timedelta(0))
+        stale = repo.get_all()
+        self.assertEqual(stale[0].price, 100.0)
+
+        repo._refresh_thread.join()
+        self.assertEqual(self.make_repo().get_all()[0].price, 120.0)
+
+    def test_empty_source_keeps_previous_snapshot(self):
+        repo = self.make_repo()
+        repo.get_all()
+        self.source.get_all.return_value = []
+
+        repo.refresh()
+
+        self.assertEqual(repo.get_all()[0].ticker, "HGLG11")
+        self.assertFalse(os.path.exists(repo.lock_path))
+
+    def test_refresh_reuses_snapshot_written_by_other_replica(self):
+        first, second = self.make_repo(), self.make_repo()
+        first.refresh(min_age=timedelta(minutes=7))
+        # A segunda réplica ainda não leu o arquivo; relê sob o lock e não consulta a fonte
+        second.refresh(min_age=timedelta(minutes=7))
+        self.assertEqual(self.source.get_all.call_count, 1)
+        self.assertEqual(second.get_all()[0].ticker, "HGLG11")
+
+        # Snapshot mais velho que min_age: nova busca
+        second.refresh(min_age=timedelta(0))
+        self.assertEqual(self.source.get_all.call_count, 2)
+
+    def test_universe_is_shared_and_versioned(self):
+        repo = self.make_repo()
+        first = repo.get_universe()
+        # Reruns e sessões recebem o mesmo objeto, sem cópias
+        self.assertIs(repo.get_universe(), first)
+
+        self.source.get_all.return_value = [make_fii("HGLG11", price=120.0)]
+        repo.refresh()
+        second = repo.get_universe()
+        self.assertIsNot(second, first)
+        self.assertGreater(second.version, first.version)
+        self.assertEqual(first.get("HGLG11").price, 100.0)
+        self.assertEqual(second.get("HGLG11").price, 120.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
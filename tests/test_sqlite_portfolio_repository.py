@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from application import migrate_to_sqlite
+from core.entities.portfolio import Transaction
+from core.services.portfolio_service import PortfolioService
+
+
+class TestSqlitePortfolioRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repository = SqlitePortfolioRepository(os.path.join(self.tmp_dir.name, "portfolio.db"))
+        self.service = PortfolioService(self.repository, user_id="ana")
+
+    def tearDown(self):
+        self.repository.close()
+        self.tmp_dir.cleanup()
+
+    def test_trades_and_queries(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        self.service.add_asset("MXRF11", 100, 10.0)
+        self.service.add_asset("HGLG11", 10, 120.0)
+        self.service.remove_asset("MXRF11")
+
+        items = self.service.load_portfolio()
+        self.assertEqual([(i.ticker, i.quantity) for i in items], [("HGLG11", 20)])
+        self.assertAlmostEqual(items[0].average_price, 110.0)
+        self.assertEqual(len(self.service.get_transactions("HGLG11")), 2)
+        self.assertEqual(len(self.service.get_transactions()), 3)
+        # Outro usuário não enxerga os dados
+        self.assertEqual(PortfolioService(self.repository, user_id="bia").load_portfolio(), [])
+
+    def test_transaction_index_is_rebuilt_only_on_new_transactions(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        self.service.add_asset("MXRF11", 100, 10.0)
+        with patch.object(self.repository, 'get_transactions', wraps=self.repository.get_transactions) as query:
+            for _ in range(5):
+                index = self.service.get_transactions_by_ticker()
+            self.assertEqual(query.call_count, 1)
+            self.assertEqual(set(index), {"HGLG11", "MXRF11"})
+
+            self.service.add_asset("HGLG11", 10, 120.0)
+            self.assertEqual(len(self.service.get_transactions_by_ticker()["HGLG11"]), 2)
+            self.assertEqual(query.call_count, 2)
+        self.assertEqual(PortfolioService(self.repository, user_id="bia").get_transactions_by_ticker(), {})
+
+    def test_one_positions_query_per_rerun(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        rerun = PortfolioService(self.repository, user_id="ana")
+        with patch.object(self.repository, '_read_positions', wraps=self.repository._read_positions) as read_positions:
+            for _ in range(5):
+                rerun.load_portfolio()
+            self.assertEqual(read_positions.call_count, 1)
+
+            self.service.add_asset("MXRF11", 10, 10.0)
+            read_positions.reset_mock()
+            self.assertEqual(len(rerun.load_portfolio()), 2)
+            self.assertEqual(read_positions.call_count, 1)
+
+    def test_batch_is_all_or_nothing(self):
+        batch = [Transaction("2024-01-01T10:00:00", "HGLG11", 10, 100.0, "BUY"),
+                 Transaction("2024-01-02T10:00:00", "HGLG11", 10, 120.0, "BUY"),
+                 Transaction("2024-01-03T10:00:00", "HGLG11", 5, 130.0, "SELL")]
+        self.service.apply_batch(batch)
+        items = self.service.load_portfolio()
+        self.assertEqual((items[0].quantity, items[0].average_price), (15, 110.0))
+
+        with self.assertRaises(ValueError):
+            self.service.apply_batch([Transaction("2024-01-04T10:00:00", "MXRF11", 1, 10.0, "SELL")])
+        self.assertEqual(len(self.service.get_transactions()), 3)
+
+    def test_ticker_query_uses_index(self):
+        plan = self.repository._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT date FROM transactions WHERE user_id = ? AND ticker = ? ORDER BY date DESC",
+            ("ana", "HGLG11"),
+        ).fetchall()
+        self.assertIn("idx_transactions_user_ticker_date", " ".join(str(row) for row in plan))
+
+    def test_positions_recovered_after_partial_write(self):
+        self.service.add_asset("HGLG11", 10, 100.0)
+        with patch.object(self.repository, 'save_portfolio'):
+            self.service.add_asset("HGLG11", 10, 200.0)
+
+        self.assertEqual(self.service.load_portfolio()[0].quantity, 20)
+
+    def test_migration_imports_json_files(self):
+        source_dir = self.tmp_dir.name
+        with open(os.path.join(source_dir, "portfolio_teste.json"), 'w') as f:
+            json.dump([{"ticker": "HGLG11", "quantity": 5, "average_price": 150.0}], f)
+        with open(os.path.join(source_dir, "transactions_teste.json"), 'w') as f:
+            json.dump([{"date": "2024-01-01T10:00:00", "ticker": "HGLG11", "quantity": 5, "price": 150.0, "type": "BUY"}], f)
+
+        db_path = os.path.join(source_dir, "migrated.db")
+        with patch('sys.argv', ["migrate_to_sqlite", "--source-dir", source_dir, "--db", db_path]), \
+                patch('builtins.print'):
+            migrate_to_sqlite.main()
+
+        migrated = SqlitePortfolioRepository(db_path)
+        self.assertEqual(migrated.load_portfolio("teste")[0].quantity, 5)
+        self.assertEqual(migrated.get_transactions("teste", "HGLG11")[0].price, 150.0)
+        migrated.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
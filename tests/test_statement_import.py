@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+from adapters.inputs.broker_statement_reader import BrokerStatementReader
+from adapters.repositories.json_portfolio_repository import JsonPortfolioRepository
+from adapters.repositories.sqlite_portfolio_repository import SqlitePortfolioRepository
+from core.entities.portfolio import PortfolioItem, Transaction
+from core.services.portfolio_service import PortfolioService
+from core.services.statement_import_service import StatementImportService
+
+# Formato do relatório de negociação da B3 exportado em CSV (separador ";" e números brasileiros)
+B3_CSV = """Data do Negócio;Tipo de Movimentação;Mercado;Prazo/Vencimento;Instituição;Código de Negociação;Quantidade;Preço;Valor
+10/01/2024;Compra;Mercado à Vista;-;XP INVESTIMENTOS;HGLG11;10;R$ 100,00;R$ 1.000,00
+10/01/2024;Compra;Mercado Fracionário;-;XP INVESTIMENTOS;MXRF11F;1.000;10,50;10.500,00
+15/02/2024;Compra;Mercado à Vista;-;XP INVESTIMENTOS;HGLG11;10;120,00;1.200,00
+15/02/2024;Compra;Mercado à Vista;-;XP INVESTIMENTOS;HGLG11;10;120,00;1.200,00
+01/03/2024;Venda;Mercado à Vista;-;XP INVESTIMENTOS;HGLG11;5;130,00;650,00
+01/03/2024;Rendimento;-;-;XP INVESTIMENTOS;HGLG11;30;1,10;33,00
+;;;;;Total;;;14.550,00
+"""
+
+BROKER_CSV = """date,ticker,type,quantity,price
+2024-01-10,knri11,C,3,150.5
+2024-01-11,XPML11 - XP MALLS,V,1,110
+"""
+
+
+class TestBrokerStatementReader(unittest.TestCase):
+    def test_b3_statement_is_normalized(self):
+        reader = BrokerStatementReader()
+        transactions = [t for chunk in reader.read(io.BytesIO(B3_CSV.encode("utf-8")), "negociacao.csv") for t in chunk]
+
+        self.assertEqual(len(transactions), 5)
+        self.assertEqual((reader.rows_read, reader.skipped), (7, 2))
+        first, fractional = transactions[0], transactions[1]
+        self.assertEqual((first.date, first.ticker, first.type, first.quantity, first.price),
+                         ("2024-01-10T00:00:00", "HGLG11", "BUY", 10, 100.0))
+        self.assertEqual((fractional.ticker, fractional.quantity, fractional.price), ("MXRF11", 1000, 10.5))
+        self.assertEqual(transactions[-1].type, "SELL")
+
+    def test_comma_separated_export_and_chunks(self):
+        reader = BrokerStatementReader(chunksize=1)
+        chunks = list(reader.read(io.BytesIO(BROKER_CSV.encode("utf-8")), "corretora.csv"))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([(t.ticker, t.type, t.price) for c in chunks for t in c],
+                         [("KNRI11", "BUY", 150.5), ("XPML11", "SELL", 110.0)])
+
+    def test_missing_column(self):
+        with self.assertRaisesRegex(ValueError, "preco"):
+            list(BrokerStatementReader().read(io.BytesIO(b"data;ticker;tipo;quantidade\n"), "x.csv"))
+
+    @unittest.skipUnless(find_spec("openpyxl"), "openpyxl não instalado")
+    def test_xlsx(self):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.active
+        for line in B3_CSV.splitlines():
+            sheet.append(line.split(";"))
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        transactions = [t for chunk in BrokerStatementReader().read(buffer, "negociacao.xlsx") for t in chunk]
+        self.assertEqual(len(transactions), 5)
+
+
+class TestStatementImportService(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.json_repository = JsonPortfolioRepository()
+        self.json_repository.base_path = self.tmp_dir.name
+        self.sqlite_repository = SqlitePortfolioRepository(os.path.join(self.tmp_dir.name, "portfolio.db"))
+
+    def tearDown(self):
+        self.sqlite_repository.close()
+        self.tmp_dir.cleanup()
+
+    def import_csv(self, repository, chunksize=2):
+        reader = BrokerStatementReader(chunksize=chunksize)
+        service = StatementImportService(repository, "ana")
+        return service.import_transactions(reader.read(io.BytesIO(B3_CSV.encode("utf-8")), "negociacao.csv"))
+
+    def test_import_applies_positions_and_is_idempotent(self):
+        for repository in (self.json_repository, self.sqlite_repository):
+            portfolio = PortfolioService(repository, user_id="ana")
+            # Lançamento manual posterior ao extrato e um ativo excluído manualmente
+            portfolio.add_asset("KNRI11", 2, 150.0)
+            portfolio.remove_asset("KNRI11")
+
+            summary = self.import_csv(repository)
+            self.assertEqual((summary.imported, summary.duplicates), (5, 0))
+
+            items = {item.ticker: item for item in portfolio.load_portfolio()}
+            self.assertEqual(set(items), {"HGLG11", "MXRF11"})
+            # Mesmas regras de add_asset: PM (10x100 + 20x120) / 30; a venda não altera o PM
+            self.assertEqual(items["HGLG11"].quantity, 25)
+            self.assertAlmostEqual(items["HGLG11"].average_price, 3400 / 30)
+            self.assertEqual(len(portfolio.get_transactions("HGLG11")), 4)
+
+            # Reimportar o mesmo arquivo não duplica (inclusive as duas compras idênticas)
+            again = self.import_csv(repository, chunksize=10)
+            self.assertEqual((again.imported, again.duplicates), (0, 5))
+            self.assertEqual(portfolio.load_portfolio()[0].quantity, 25)
+
+    def test_newest_first_statement_is_applied_chronologically(self):
+        # Relatório da B3: operação mais recente primeiro; a venda de KNRI11 não tem posição
+        statement = """Data do Negócio;Tipo de Movimentação;Código de Negociação;Quantidade;Preço
+20/03/2024;Venda;HGLG11;5;130,00
+15/03/2024;Venda;KNRI11;1;150,00
+10/01/2024;Compra;HGLG11;10;100,00
+"""
+        for repository in (self.json_repository, self.sqlite_repository):
+            reader = BrokerStatementReader(chunksize=1)
+            summary = StatementImportService(repository, "ana").import_transactions(
+                reader.read(io.BytesIO(statement.encode("utf-8")), "negociacao.csv")
+            )
+
+            self.assertEqual((summary.imported, summary.duplicates), (2, 0))
+            self.assertEqual([(t.ticker, t.type) for t in summary.rejected], [("KNRI11", "SELL")])
+            self.assertEqual([(i.ticker, i.quantity) for i in repository.load_portfolio("ana")], [("HGLG11", 5)])
+            # Journal em ordem cronológica (a recuperação reaplica na mesma ordem) e sem a venda rejeitada
+            self.assertEqual([t.type for t in repository.iter_journal("ana")], ["BUY", "SELL"])
+
+    def test_import_keeps_positions_without_journal_history(self):
+        # Carteira legada: posições sem histórico e um ativo excluído antes de REMOVE existir no journal
+        legacy_items = [PortfolioItem("PLAG11", 11, 48.5), PortfolioItem("MXRF11", 24, 9.97)]
+        legacy_transactions = [Transaction("2023-05-02T00:00:00", "KNRI11", 2, 150.0, "BUY")]
+        with open(os.path.join(self.tmp_dir.name, "portfolio_ana.json"), "w") as f:
+            json.dump([vars(item) for item in legacy_items], f)
+        with open(os.path.join(self.tmp_dir.name, "transactions_ana.json"), "w") as f:
+            json.dump([vars(t) for t in legacy_transactions], f)
+        self.sqlite_repository.import_user("ana", legacy_items, legacy_transactions)
+
+        for repository in (self.json_repository, self.sqlite_repository):
+            self.import_csv(repository)
+            items = {item.ticker: (item.quantity, item.average_price) for item in repository.load_portfolio("ana")}
+            self.assertEqual(set(items), {"PLAG11", "MXRF11", "HGLG11"})
+            self.assertEqual(items["PLAG11"], (11, 48.5))
+            # MXRF11: 24 @ 9,97 + 1000 @ 10,50 do extrato
+            self.assertEqual(items["MXRF11"][0], 1024)
+            self.assertAlmostEqual(items["MXRF11"][1], (24 * 9.97 + 1000 * 10.5) / 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()